@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import agents, calls, health, webhooks, monitor
+from app.api.api_v1.endpoints import agents, calls, health, webhooks, monitor, debug, analytics, schedules
 
 api_router = APIRouter()
 
@@ -8,3 +8,6 @@ api_router.include_router(agents.router, prefix="/agents", tags=["agents"])
 api_router.include_router(calls.router, prefix="/calls", tags=["calls"])
 api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
 api_router.include_router(monitor.router, prefix="/monitor", tags=["monitor"])
+api_router.include_router(schedules.router, prefix="/schedules", tags=["schedules"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
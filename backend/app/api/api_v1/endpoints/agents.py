@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from typing import List, Dict, Any
 from app.core.database import supabase
 from app.models.agent import AgentConfiguration, AgentConfigurationCreate
+from app.services.agent_config_cache import agent_config_cache
+from app.services.conversation_engine import flow_registry
 
 router = APIRouter()
 
@@ -18,11 +20,21 @@ async def get_agents():
 
 @router.put("/{agent_id}", response_model=AgentConfiguration)
 async def update_agent(agent_id: str, agent: AgentConfigurationCreate):
+    # Reject a flow the conversation engine could not compile before it reaches the database
+    if agent.flow_definition is not None:
+        try:
+            flow_registry.compile(agent_id, agent.flow_definition)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid flow definition: {str(e)}")
+
     try:
         # Update only our database - webhook will read from here during conversations
         agent_data = agent.model_dump()
+        if "flow_definition" not in agent.model_fields_set:
+            agent_data.pop("flow_definition")
         
         response = supabase.table("agent_configurations").update(agent_data).eq("id", agent_id).execute()
+        agent_config_cache.invalidate(agent_id)
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Agent not found")
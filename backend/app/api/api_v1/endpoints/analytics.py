@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from app.core.database import supabase
+
+router = APIRouter()
+
+ROLLUP_COLUMNS = "agent_configuration_id,bucket_start,status,emergency_type,call_count,duration_samples,total_duration_seconds"
+
+def summarize_rollups(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fold rollup rows into dashboard KPIs
+    """
+    total_calls = 0
+    duration_samples = 0
+    total_duration = 0
+    by_status: Dict[str, int] = {}
+    by_emergency_type: Dict[str, int] = {}
+    
+    for row in rows:
+        count = row["call_count"]
+        total_calls += count
+        duration_samples += row["duration_samples"]
+        total_duration += row["total_duration_seconds"]
+        by_status[row["status"]] = by_status.get(row["status"], 0) + count
+        if row["emergency_type"]:
+            by_emergency_type[row["emergency_type"]] = by_emergency_type.get(row["emergency_type"], 0) + count
+    
+    emergencies = sum(by_emergency_type.values())
+    completed = by_status.get("completed", 0)
+    
+    return {
+        "total_calls": total_calls,
+        "completed_calls": completed,
+        "emergency_calls": emergencies,
+        "completion_rate": completed / total_calls if total_calls else 0.0,
+        "emergency_rate": emergencies / total_calls if total_calls else 0.0,
+        "average_duration_seconds": total_duration / duration_samples if duration_samples else None,
+        "by_status": by_status,
+        "by_emergency_type": by_emergency_type
+    }
+
+@router.get("/kpis")
+async def get_kpis(agent_id: Optional[str] = None):
+    """
+    Dashboard KPIs served from the all-time rollups (a handful of rows per agent)
+    """
+    try:
+        query = supabase.table("call_rollups").select(ROLLUP_COLUMNS).eq("granularity", "all").gt("call_count", 0)
+        if agent_id:
+            query = query.eq("agent_configuration_id", agent_id)
+        rows = query.execute().data
+        
+        agents: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            agents.setdefault(row["agent_configuration_id"], []).append(row)
+        
+        return {
+            **summarize_rollups(rows),
+            "agents": {agent: summarize_rollups(agent_rows) for agent, agent_rows in agents.items()}
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching KPIs: {str(e)}")
+
+@router.get("/timeseries")
+async def get_timeseries(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    agent_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """
+    KPIs per hour or day bucket (by call creation time) from the rollups
+    """
+    try:
+        query = supabase.table("call_rollups").select(ROLLUP_COLUMNS).eq("granularity", granularity).gt("call_count", 0)
+        if agent_id:
+            query = query.eq("agent_configuration_id", agent_id)
+        if start:
+            query = query.gte("bucket_start", start.isoformat())
+        if end:
+            query = query.lt("bucket_start", end.isoformat())
+        rows = query.order("bucket_start").execute().data
+        
+        buckets: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            buckets.setdefault(row["bucket_start"], []).append(row)
+        
+        return {
+            "granularity": granularity,
+            "buckets": [
+                {"bucket_start": bucket_start, **summarize_rollups(bucket_rows)}
+                for bucket_start, bucket_rows in buckets.items()
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching KPI time series: {str(e)}")
@@ -1,17 +1,29 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import datetime
 from app.core.database import supabase
+from app.core.serialization import model_columns, trusted_rows
 from app.models.call import Call, CallCreate, CallResult
 # transcript_processor removed - using Retell AI post-call analysis instead
 from app.services.retell_client import retell_client
+from app.services.conversation_engine import ConversationEngine
+from app.services.transcript_search import transcript_search
+from app.services.call_export import stream_call_export, decode_cursor
+from app.services.call_dialer import dial_call, normalize_phone_e164, CallDialError
+from app.services.post_call_metrics import summarize_metrics
 
 router = APIRouter()
 
+# Rows selected with exactly the response model's fields are returned without re-validation
+CALL_COLUMNS = model_columns(Call)
+CALL_RESULT_COLUMNS = model_columns(CallResult)
+
 @router.get("/", response_model=List[Call])
 async def get_calls():
     try:
-        response = supabase.table("calls").select("*").order("created_at", desc=True).execute()
-        return response.data
+        response = supabase.table("calls").select(CALL_COLUMNS).order("created_at", desc=True).execute()
+        return trusted_rows(response.data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching calls: {str(e)}")
 
@@ -41,68 +53,107 @@ async def trigger_retell_call(call_id: str):
     Trigger actual Retell AI call for an existing call record
     """
     try:
-        from app.services.retell_client import retell_client
-        
-        # Get call details
-        call_response = supabase.table("calls").select("*").eq("id", call_id).execute()
-        if not call_response.data:
-            raise HTTPException(status_code=404, detail="Call not found")
-        
-        call_data = call_response.data[0]
-        
-        # Get agent configuration separately
-        agent_response = supabase.table("agent_configurations").select("*").eq("id", call_data["agent_configuration_id"]).execute()
-        if not agent_response.data:
-            raise HTTPException(status_code=404, detail="Agent configuration not found")
-        
-        agent_config = agent_response.data[0]
-        
-        # Get the actual Retell AI agent ID
-        retell_agent_id = agent_config.get("retell_agent_id")
-        if not retell_agent_id:
-            raise HTTPException(status_code=400, detail="Agent not synced with Retell AI. Please sync the agent first.")
-        
-        # Format phone number for Retell AI (ensure proper E.164 format with dashes)
-        phone = call_data["driver_phone"]
-        if not phone.startswith("+"):
-            raise HTTPException(status_code=400, detail="Phone number must start with + (E.164 format)")
-        
-        # Ensure dashes are in the right places for Retell AI format
-        if "-" not in phone and len(phone.replace("+", "").replace("-", "")) >= 10:
-            # Add dashes: +1-555-123-4567
-            clean_phone = phone.replace("+", "").replace("-", "").replace(" ", "")
-            if len(clean_phone) == 11 and clean_phone.startswith("1"):
-                formatted_phone = f"+{clean_phone[0]}-{clean_phone[1:4]}-{clean_phone[4:7]}-{clean_phone[7:]}"
-            elif len(clean_phone) == 10:
-                formatted_phone = f"+1-{clean_phone[0:3]}-{clean_phone[3:6]}-{clean_phone[6:]}"
-            else:
-                formatted_phone = phone
-        else:
-            formatted_phone = phone
-
-        # Create Retell AI call with proper metadata
-        retell_response = await retell_client.create_phone_call(
-            agent_id=retell_agent_id,
-            to_number=formatted_phone,
-            metadata={
-                "driver_name": call_data["driver_name"],
-                "load_number": call_data["load_number"],
-                "call_db_id": call_id,
-                "agent_id": call_data["agent_configuration_id"]
-            }
-        )
-        
-        # Update call with Retell AI call ID
-        supabase.table("calls").update({
-            "retell_call_id": retell_response.get("call_id"),
-            "status": "in_progress"
-        }).eq("id", call_id).execute()
-        
+        retell_response = await dial_call(call_id)
         return {"message": "Call triggered successfully", "retell_call_id": retell_response.get("call_id")}
-        
+    except CallDialError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error triggering call: {str(e)}")
 
+@router.get("/search")
+async def search_calls(
+    q: str = Query(..., min_length=1, description="Search terms, e.g. \"I-10 delayed\""),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100)
+):
+    """
+    Full-text search over call transcripts
+    Results are ranked by relevance and include a highlighted snippet
+    """
+    try:
+        found = transcript_search.search(q, limit=page_size, offset=(page - 1) * page_size)
+        return {
+            "query": q,
+            "total": found["total"],
+            "page": page,
+            "page_size": page_size,
+            "results": found["results"]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching calls: {str(e)}")
+
+@router.get("/export")
+async def export_calls(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    page_size: int = Query(1000, ge=1, le=5000)
+):
+    """
+    Stream calls with their results as NDJSON or CSV, oldest first
+    Filter with start (inclusive) / end (exclusive); pass the cursor of the last
+    received record to resume an interrupted export
+    """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"calls.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        stream_call_export(
+            export_format=format,
+            compress=gzip,
+            start=start.isoformat() if start else None,
+            end=end.isoformat() if end else None,
+            cursor=cursor,
+            page_size=page_size
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/by-driver/{phone}", response_model=List[Call])
+async def get_calls_by_driver(
+    phone: str,
+    limit: int = Query(10, ge=1, le=200),
+    before: Optional[datetime] = None
+):
+    """
+    Most recent calls to a driver phone, in any formatting (matched on its E.164 form)
+    Pass the created_at of the last call as before to page further back
+    """
+    try:
+        query = supabase.table("calls").select(CALL_COLUMNS).eq("driver_phone_e164", normalize_phone_e164(phone))
+        if before:
+            query = query.lt("created_at", before.isoformat())
+        response = query.order("created_at", desc=True).limit(limit).execute()
+        return trusted_rows(response.data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching driver calls: {str(e)}")
+
+@router.get("/by-load/{load_number}", response_model=List[Call])
+async def get_calls_by_load(
+    load_number: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None
+):
+    """
+    Call history of a load, most recent first
+    """
+    try:
+        query = supabase.table("calls").select(CALL_COLUMNS).eq("load_number", load_number)
+        if before:
+            query = query.lt("created_at", before.isoformat())
+        response = query.order("created_at", desc=True).limit(limit).execute()
+        return trusted_rows(response.data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching load calls: {str(e)}")
+
 @router.get("/{call_id}", response_model=Call)
 async def get_call(call_id: str):
     try:
@@ -116,8 +167,8 @@ async def get_call(call_id: str):
 @router.get("/{call_id}/results", response_model=List[CallResult])
 async def get_call_results(call_id: str):
     try:
-        response = supabase.table("call_results").select("*").eq("call_id", call_id).execute()
-        return response.data
+        response = supabase.table("call_results").select(CALL_RESULT_COLUMNS).eq("call_id", call_id).execute()
+        return trusted_rows(response.data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching call results: {str(e)}")
 
@@ -153,9 +204,14 @@ async def get_call_transcript(call_id: str):
         duration = call_data.get('duration_seconds') or call_data.get('duration') or 0
         duration_formatted = f"{duration // 60}:{duration % 60:02d}" if duration > 0 else "N/A"
         
-        # Generate analysis based on call status and structured data
+        # Prefer the derived post-call metrics; fall back to a status-based summary while they are pending
+        metrics_response = supabase.table("call_results").select("metrics").eq("call_id", call_id).not_.is_("metrics", "null").order("created_at", desc=True).limit(1).execute()
+        metrics = metrics_response.data[0]["metrics"] if metrics_response.data else None
+        
         analysis = "No analysis available"
-        if call_data.get("status") == "completed" and call_data.get("structured_data"):
+        if metrics:
+            analysis = summarize_metrics(metrics)
+        elif call_data.get("status") == "completed" and call_data.get("structured_data"):
             analysis = "Call completed successfully. Structured data extracted and processed."
         elif call_data.get("status") == "completed":
             analysis = "Call completed successfully. Analysis shows professional driver check-in protocol followed."
@@ -169,7 +225,8 @@ async def get_call_transcript(call_id: str):
             "duration_formatted": duration_formatted,
             "cost": "N/A",  # Cost calculation would be implemented based on duration
             "status": call_data.get("status", "Unknown"),
-            "structured_data": call_data.get("structured_data")
+            "structured_data": call_data.get("structured_data"),
+            "metrics": metrics
         }
         
     except Exception as e:
@@ -183,8 +240,6 @@ async def test_conversation_engine():
     Test endpoint to verify ConversationEngine works
     """
     try:
-        from app.services.conversation_engine import ConversationEngine
-        
         # Test agent config
         agent_config = {
             "scenario": "driver_checkin",
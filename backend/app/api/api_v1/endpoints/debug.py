@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.core.config import settings
+from app.core.profiling import profiler
+from app.core.tracing import span_buffer
+from app.core.startup import startup_metrics
+
+router = APIRouter()
+
+def require_debug_token(token: Optional[str]):
+    """Debug endpoints are only served when a token is configured and matches"""
+    if not settings.DEBUG_TOKEN or token != settings.DEBUG_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def download_profile(x_debug_token: Optional[str] = Header(None)):
+    """
+    Download aggregated profile samples in collapsed stack format (flamegraph.pl / speedscope)
+    """
+    require_debug_token(x_debug_token)
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"Content-Disposition": "attachment; filename=profile.collapsed"}
+    )
+
+@router.get("/profile/stats")
+async def profile_stats(x_debug_token: Optional[str] = Header(None)):
+    """
+    Get profiler sample counters
+    """
+    require_debug_token(x_debug_token)
+    return {"enabled": settings.PROFILER_ENABLED, **profiler.stats()}
+
+@router.delete("/profile")
+async def reset_profile(x_debug_token: Optional[str] = Header(None)):
+    """
+    Discard collected samples
+    """
+    require_debug_token(x_debug_token)
+    profiler.reset()
+    return {"status": "reset"}
+
+@router.get("/traces")
+async def get_traces(trace_id: Optional[str] = None, x_debug_token: Optional[str] = Header(None)):
+    """
+    Get buffered spans as OTLP/JSON, optionally for a single trace
+    """
+    require_debug_token(x_debug_token)
+    return span_buffer.to_otlp(trace_id)
+
+@router.post("/traces/export")
+async def export_traces(x_debug_token: Optional[str] = Header(None)):
+    """
+    Flush buffered spans to the OTLP/JSON lines export file
+    """
+    require_debug_token(x_debug_token)
+    exported = span_buffer.export_to_file(settings.TRACE_EXPORT_PATH)
+    return {"exported_spans": exported, "path": settings.TRACE_EXPORT_PATH}
+
+@router.get("/startup")
+async def get_startup_metrics(x_debug_token: Optional[str] = Header(None)):
+    """
+    Get cold-start timings (module import and each warm-up step)
+    """
+    require_debug_token(x_debug_token)
+    return startup_metrics
@@ -1,61 +1,210 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
+from typing import Dict, Optional
 import json
 from datetime import datetime
+from app.services.call_dispatcher import call_dispatcher
+from app.services.admission import admission_controller
+from app.services.replay_buffer import monitor_replay_buffer
+from app.services.conversation_engine import analysis_cache
+from app.services.connection_manager import monitor_connections, MonitorConnection
+from app.services.call_snapshots import call_snapshots, snapshot_connections
+from app.services.emergency_alerts import emergency_alerts, alert_connections
+from app.services.post_call_metrics import post_call_pipeline
+from app.services.payload_dedup import payload_dedup
+from app.services.stale_call_reconciler import stale_call_reconciler
+from app.core.tracing import span, current_trace_id
+from app.core.serialization import dumps, loads
 
 router = APIRouter()
 
-# Store active WebSocket connections
-active_connections: List[WebSocket] = []
-
-async def connect_websocket(websocket: WebSocket):
-    """Connect a new WebSocket client"""
-    await websocket.accept()
-    active_connections.append(websocket)
-
-def disconnect_websocket(websocket: WebSocket):
-    """Disconnect a WebSocket client"""
-    if websocket in active_connections:
-        active_connections.remove(websocket)
-
 async def broadcast_webhook_event(event_data: Dict):
     """Broadcast webhook event to all connected clients"""
-    if not active_connections:
+    call_id = event_data.get("call_id")
+    # The call grid is updated in place; subscribers get it as a coalesced diff on the next tick
+    call_snapshots.record(event_data)
+    if len(monitor_connections) == 0 and not call_id:
         return
         
     message = {
         "timestamp": datetime.now().isoformat(),
         "type": "webhook_event",
+        "trace_id": current_trace_id(),
         "data": event_data
     }
     
-    # Send to all connected clients
-    disconnected = []
-    for connection in active_connections:
-        try:
-            await connection.send_text(json.dumps(message))
-        except:
-            disconnected.append(connection)
+    # Sequence per call so reconnecting clients can resume from the replay buffer
+    if call_id:
+        message["call_id"] = call_id
+        message["seq"] = monitor_replay_buffer.next_seq(call_id)
+    text = dumps(message)
+    if call_id:
+        monitor_replay_buffer.append(call_id, message["seq"], text)
     
-    # Remove disconnected clients
-    for connection in disconnected:
-        disconnect_websocket(connection)
+    # Queue for every connected client; their writer tasks do the actual sends
+    with span("broadcast_webhook_event", event_type=str(event_data.get("event_type")), clients=len(monitor_connections)):
+        monitor_connections.broadcast(message, call_id=call_id, json_text=text)
 
 @router.websocket("/conversation")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time conversation monitoring"""
-    await connect_websocket(websocket)
+    """
+    WebSocket endpoint for real-time conversation monitoring
+    Query parameters negotiate the wire format: encoding=json (text frames, default) or
+    msgpack (binary frames), and transcript=full (default) or delta. permessage-deflate
+    is negotiated by the server itself when the client offers it.
+    """
+    connection = await monitor_connections.connect(websocket)
+    if connection is None:
+        return
+    try:
+        while True:
+            # Clients may ask to catch up: {"action": "resume", "call_id": "...", "since_seq": N}
+            # Without call_id every buffered call is replayed; live messages may interleave, dedupe by seq
+            # Any message (including {"action": "pong"} replies to server pings) keeps the connection alive
+            request = parse_client_message(await websocket.receive_text())
+            connection.touch()
+            if request.get("action") == "resume":
+                await replay_events(connection, request)
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the socket was already closed by the server (idle reaping, slow consumer)
+        pass
+    finally:
+        await monitor_connections.disconnect(connection)
+
+@router.websocket("/snapshots")
+async def snapshot_endpoint(websocket: WebSocket):
+    """
+    WebSocket endpoint for the dashboard call grid
+    Sends the full grid ({"type": "snapshot"}) on connect, then at most MONITOR_SNAPSHOT_HZ
+    {"type": "snapshot_diff", "seq", "changed", "removed"} messages per second carrying only
+    the calls that changed since the previous one. Accepts the same encoding parameter.
+    """
+    connection = await snapshot_connections.connect(websocket)
+    if connection is None:
+        return
     try:
+        await call_snapshots.subscribe(connection)
         while True:
-            # Keep connection alive
+            # Only pongs are expected; a client that missed a diff (seq gap) reconnects for a fresh snapshot
             await websocket.receive_text()
-    except WebSocketDisconnect:
-        disconnect_websocket(websocket)
+            connection.touch()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        await snapshot_connections.disconnect(connection)
+
+@router.websocket("/alerts")
+async def alert_endpoint(websocket: WebSocket):
+    """
+    WebSocket endpoint for emergency alerts
+    Unacknowledged alerts are sent on connect, new ones as soon as they are detected.
+    Dispatchers acknowledge with {"action": "ack", "alert_id": "...", "by": "name"};
+    every subscriber then receives {"type": "alert_acknowledged"}.
+    """
+    connection = await alert_connections.connect(websocket)
+    if connection is None:
+        return
+    try:
+        emergency_alerts.subscribe(connection)
+        while True:
+            request = parse_client_message(await websocket.receive_text())
+            connection.touch()
+            if request.get("action") == "ack" and request.get("alert_id"):
+                emergency_alerts.acknowledge(str(request["alert_id"]), request.get("by"))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        await alert_connections.disconnect(connection)
+
+@router.get("/alerts")
+async def list_alerts(limit: int = 50):
+    """Recent emergency alerts, newest first, with delivery and acknowledgment latency"""
+    return {
+        "alerts": emergency_alerts.recent(limit),
+        "stats": emergency_alerts.stats()
+    }
+
+@router.post("/alerts/{alert_id}/ack")
+async def acknowledge_alert(alert_id: str, by: Optional[str] = None):
+    """Acknowledge an emergency alert outside the WebSocket"""
+    alert = emergency_alerts.acknowledge(alert_id, by)
+    if alert is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
+
+def parse_client_message(text: str) -> Dict:
+    """Parse a JSON control message from a monitor client, ignoring anything else"""
+    try:
+        request = json.loads(text)
+    except ValueError:
+        return {}
+    return request if isinstance(request, dict) else {}
+
+def parse_seq(value) -> Optional[int]:
+    """A client-supplied since_seq as a non-negative int, or None when it is not one"""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return None
+    try:
+        seq = int(value)
+    except (TypeError, ValueError):
+        return None
+    return seq if seq >= 0 else None
+
+async def replay_events(connection: MonitorConnection, request: Dict):
+    """Send buffered events after the client's last seen seq, from memory only"""
+    call_id = request.get("call_id")
+    since = request.get("since") or {}
+    if call_id:
+        positions = {str(call_id): parse_seq(request.get("since_seq"))}
+    elif isinstance(since, dict):
+        positions = {buffered_id: 0 for buffered_id in monitor_replay_buffer.call_ids()}
+        positions.update({str(key): parse_seq(value) for key, value in since.items()})
+    else:
+        positions = {None: None}
+    invalid = [key for key, seq in positions.items() if seq is None]
+    if invalid:
+        await connection.send(connection.encode({
+            "timestamp": datetime.now().isoformat(),
+            "type": "error",
+            "error": "invalid_resume",
+            "detail": "since_seq values must be non-negative integers",
+            "call_ids": [key for key in invalid if key is not None]
+        }))
+        return
+    
+    for replay_call_id, since_seq in positions.items():
+        replay = monitor_replay_buffer.since(replay_call_id, since_seq)
+        for text in replay["messages"]:
+            await connection.send(text if connection.protocol.encoding == "json" else connection.encode(loads(text)))
+        await connection.send(connection.encode({
+            "timestamp": datetime.now().isoformat(),
+            "type": "replay_complete",
+            "call_id": replay_call_id,
+            "last_seq": replay["last_seq"],
+            "truncated": replay["truncated"]
+        }))
 
 @router.get("/status")
 async def monitor_status():
     """Get monitor status"""
     return {
-        "active_connections": len(active_connections),
+        "active_connections": len(monitor_connections),
+        "connections": monitor_connections.stats(),
+        "call_dispatch": call_dispatcher.stats(),
+        "admission": admission_controller.stats(),
+        "replay_buffer": monitor_replay_buffer.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "snapshots": call_snapshots.stats(),
+        "emergency_alerts": emergency_alerts.stats(),
+        "post_call_metrics": post_call_pipeline.stats(),
+        "payload_dedup": payload_dedup.stats(),
+        "snapshot_connections": snapshot_connections.stats(),
+        "stale_call_reconciler": stale_call_reconciler.stats(),
         "status": "running"
     }
+
+@router.post("/reconcile")
+async def reconcile_stale_calls():
+    """Run a stale-call reconciliation pass now instead of waiting for the next interval"""
+    return await stale_call_reconciler.run_once()
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException
+from typing import List
+from datetime import datetime, timezone
+from app.core.database import supabase
+from app.models.schedule import CheckCallSchedule, CheckCallScheduleCreate
+from app.services.check_call_scheduler import check_call_scheduler
+
+router = APIRouter()
+
+@router.get("/", response_model=List[CheckCallSchedule])
+async def get_schedules():
+    try:
+        response = supabase.table("check_call_schedules").select("*").eq("active", True).order("next_run_at").execute()
+        return response.data
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching schedules: {str(e)}")
+
+@router.post("/", response_model=CheckCallSchedule)
+async def create_schedule(schedule: CheckCallScheduleCreate):
+    """
+    Schedule recurring check calls for a load, every interval_minutes
+    """
+    try:
+        schedule_data = schedule.model_dump(exclude={"first_run_at"})
+        schedule_data["next_run_at"] = (schedule.first_run_at or datetime.now(timezone.utc)).isoformat()
+        response = supabase.table("check_call_schedules").insert(schedule_data).execute()
+        created = response.data[0]
+        check_call_scheduler.add(created)
+        return created
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating schedule: {str(e)}")
+
+@router.get("/status")
+async def get_scheduler_status():
+    return check_call_scheduler.stats()
+
+@router.delete("/{schedule_id}")
+async def cancel_schedule(schedule_id: str):
+    """
+    Stop the recurring check calls of a schedule
+    """
+    try:
+        response = supabase.table("check_call_schedules").update({"active": False}).eq("id", schedule_id).execute()
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        check_call_scheduler.remove(schedule_id)
+        return {"message": "Schedule cancelled", "schedule_id": schedule_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error cancelling schedule: {str(e)}")
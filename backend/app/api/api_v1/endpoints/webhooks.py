@@ -1,9 +1,20 @@
 from fastapi import APIRouter, Request, HTTPException
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
-import re
 from app.core.database import supabase
+from app.core.tracing import span, log
+from app.core.config import settings
+from app.core.serialization import loads
 from app.services.conversation_engine import ConversationEngine
+from app.services.session_store import session_store
+from app.services.information_extractor import information_extractor
+from app.services.call_dispatcher import call_dispatcher
+from app.services.admission import admission_controller, AdmissionRejected, EventPriority
+from app.services.transcript_search import transcript_search
+from app.services.agent_config_cache import agent_config_cache
+from app.services.emergency_alerts import emergency_alerts
+from app.services.post_call_metrics import post_call_pipeline
+from app.services.payload_dedup import payload_dedup
 from app.api.api_v1.endpoints.monitor import broadcast_webhook_event
 
 router = APIRouter()
@@ -14,19 +25,27 @@ async def retell_webhook(request: Request):
     ENHANCED webhook with intelligent conversation guidance
     Responds to Retell AI events and provides dynamic conversation logic
     """
+    with span("retell_webhook") as webhook_span:
+        return await _handle_retell_webhook(request, webhook_span)
+
+async def _handle_retell_webhook(request: Request, webhook_span) -> Dict[str, Any]:
     try:
         # Get the raw request body
-        body = await request.body()
-        data = json.loads(body)
+        with span("webhook.parse_json"):
+            body = await request.body()
+            data = loads(body)
         
         event_type = data.get("event")
         call_id = data.get("call_id")
+        if webhook_span:
+            webhook_span.set_attribute("event_type", str(event_type))
+            webhook_span.set_attribute("call_id", str(call_id))
         
         # Debug: Print event info
-        print(f"EVENT DEBUG:")
-        print(f"   Event type: {event_type}")
-        print(f"   Call ID: {call_id}")
-        print(f"   Available keys: {list(data.keys())}")
+        log(f"EVENT DEBUG:")
+        log(f"   Event type: {event_type}")
+        log(f"   Call ID: {call_id}")
+        log(f"   Available keys: {list(data.keys())}")
         
         possible_call_ids = [
             data.get("call_id"),
@@ -34,74 +53,23 @@ async def retell_webhook(request: Request):
             data.get("call") if isinstance(data.get("call"), str) else None
         ]
         
+        # Admission control: emergencies and live turns first, post-call processing is shed under load
+        priority = classify_event_priority(data)
+        async with admission_controller.admit(priority):
+            # Events of the same call are processed one at a time, in arrival order
+            actor_call_id = next((possible_id for possible_id in possible_call_ids if possible_id), None)
+            return await call_dispatcher.submit(
+                actor_call_id,
+                lambda call_state: process_retell_event(data, call_state)
+            )
         
-        # Broadcast event to live monitor
-        await broadcast_webhook_event({
-            "event_type": event_type,
-            "call_id": call_id,
-            "raw_data": data
-        })
-        
-        if event_type == "call_started":
-            # Initialize conversation context
-            result = await handle_call_start(data)
-            await broadcast_webhook_event({
-                "event_type": "call_initialized",
-                "call_id": call_id,
-                "result": result
-            })
-            return result
-            
-        elif event_type == "call_ended":
-            # Process the complete call - pass the call object, not the root data
-            call_object = data.get("call", {})
-            result = await handle_call_completion(call_object)
-            
-            # Broadcast call completion with full results to frontend
-            await broadcast_webhook_event({
-                "event_type": "call_completed",
-                "call_id": call_object.get("call_id"),
-                "call_data": result
-            })
-            return result
-            
-        elif event_type == "agent_response_required":
-            # CRITICAL: Provide dynamic conversation guidance
-            result = await handle_conversation_guidance(data)
-            await broadcast_webhook_event({
-                "event_type": "agent_response",
-                "call_id": call_id,
-                "user_input": data.get("last_user_input"),
-                "agent_response": result.get("response"),
-                "conversation_state": result.get("conversation_state"),
-                "emergency_check": result.get("emergency_check", False)
-            })
-            return result
-            
-        elif event_type == "user_speech":
-            # Analyze user speech for emergency triggers
-            result = await analyze_user_speech(data)
-            await broadcast_webhook_event({
-                "event_type": "user_speech",
-                "call_id": call_id,
-                "speech": data.get("transcript"),
-                "result": result
-            })
-            return result
-            
-        elif event_type == "call_analyzed":
-            # Handle post-call analysis from Retell AI
-            call_object = data.get("call", {})
-            result = await handle_call_analysis(call_object)
-            await broadcast_webhook_event({
-                "event_type": "call_analyzed",
-                "call_id": call_object.get("call_id"),
-                "analysis_data": result
-            })
-            return result
-            
-        return {"status": "success"}
-        
+    except AdmissionRejected as e:
+        log(f"Shedding {event_type} event for call {call_id}: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         await broadcast_webhook_event({
             "event_type": "webhook_error",
@@ -110,11 +78,109 @@ async def retell_webhook(request: Request):
         })
         raise HTTPException(status_code=500, detail=f"Webhook error: {str(e)}")
 
-async def handle_call_completion(call_data: Dict[str, Any]):
+def classify_event_priority(data: Dict[str, Any]) -> EventPriority:
+    """
+    Map a Retell AI event to its admission priority class
+    """
+    event_type = data.get("event")
+    
+    if event_type in ("agent_response_required", "user_speech"):
+        speech = data.get("last_user_input") or data.get("user_speech") or ""
+        if detect_emergency_triggers(speech):
+            return EventPriority.CRITICAL
+        return EventPriority.LIVE
+    
+    if event_type == "call_started":
+        return EventPriority.LIVE
+    
+    return EventPriority.POST_CALL
+
+async def process_retell_event(data: Dict[str, Any], call_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Route a single Retell AI event to its handler
+    Runs inside the call's actor, so call_state is private to this call
+    """
+    with span(f"event.{data.get('event')}"):
+        return await _route_retell_event(data, call_state)
+
+async def _route_retell_event(data: Dict[str, Any], call_state: Dict[str, Any]) -> Dict[str, Any]:
+    event_type = data.get("event")
+    call_object = data.get("call") if isinstance(data.get("call"), dict) else {}
+    call_id = data.get("call_id") or call_object.get("call_id")
+    
+    # Broadcast event to live monitor
+    await broadcast_webhook_event({
+        "event_type": event_type,
+        "call_id": call_id,
+        "raw_data": data
+    })
+    
+    if event_type == "call_started":
+        # Initialize conversation context
+        result = await handle_call_start(data, call_state)
+        await broadcast_webhook_event({
+            "event_type": "call_initialized",
+            "call_id": call_id,
+            "result": result
+        })
+        return result
+        
+    elif event_type == "call_ended":
+        # Process the complete call - pass the call object, not the root data
+        call_object = data.get("call", {})
+        result = await handle_call_completion(call_object, call_state)
+        
+        # Broadcast call completion with full results to frontend
+        await broadcast_webhook_event({
+            "event_type": "call_completed",
+            "call_id": call_object.get("call_id"),
+            "call_data": result
+        })
+        return result
+        
+    elif event_type == "agent_response_required":
+        # CRITICAL: Provide dynamic conversation guidance
+        result = await handle_conversation_guidance(data)
+        await broadcast_webhook_event({
+            "event_type": "agent_response",
+            "call_id": call_id,
+            "user_input": data.get("last_user_input"),
+            "agent_response": result.get("response"),
+            "conversation_state": result.get("conversation_state"),
+            "emergency_check": result.get("emergency_check", False)
+        })
+        return result
+        
+    elif event_type == "user_speech":
+        # Analyze user speech for emergency triggers
+        result = await analyze_user_speech(data)
+        await broadcast_webhook_event({
+            "event_type": "user_speech",
+            "call_id": call_id,
+            "speech": data.get("transcript"),
+            "result": result
+        })
+        return result
+        
+    elif event_type == "call_analyzed":
+        # Handle post-call analysis from Retell AI
+        call_object = data.get("call", {})
+        result = await handle_call_analysis(call_object, call_state)
+        await broadcast_webhook_event({
+            "event_type": "call_analyzed",
+            "call_id": call_object.get("call_id"),
+            "analysis_data": result
+        })
+        return result
+        
+    return {"status": "success"}
+
+async def handle_call_completion(call_data: Dict[str, Any], call_state: Optional[Dict[str, Any]] = None):
     """
     Process completed call data and extract structured information
     Based on Retell AI webhook documentation structure
     """
+    call_state = call_state if call_state is not None else {}
     # Extract data from the correct fields according to Retell AI docs
     call_id = call_data.get("call_id")
     transcript = call_data.get("transcript", "")
@@ -130,12 +196,16 @@ async def handle_call_completion(call_data: Dict[str, Any]):
     driver_name = dynamic_vars.get("driver_name", "Web Test Driver")
     load_number = dynamic_vars.get("load_number", f"WEB-{call_id[:8] if call_id else 'TEST'}")
     
-    print(f"CALL COMPLETION DATA:")
-    print(f"   Call ID: {call_id}")
-    print(f"   Duration: {duration_seconds}s")
-    print(f"   Transcript length: {len(transcript)} chars")
-    print(f"   Driver: {driver_name}")
-    print(f"   Load: {load_number}")
+    log(f"CALL COMPLETION DATA:")
+    log(f"   Call ID: {call_id}")
+    log(f"   Duration: {duration_seconds}s")
+    log(f"   Transcript length: {len(transcript)} chars")
+    log(f"   Driver: {driver_name}")
+    log(f"   Load: {load_number}")
+    
+    # Conversation is over, the session snapshot is no longer needed
+    if call_id:
+        await session_store.delete(call_id)
     
     # Prepare result data for frontend
     result_data = {
@@ -148,8 +218,16 @@ async def handle_call_completion(call_data: Dict[str, Any]):
         "load_number": load_number
     }
     
-    # Update call record - try metadata first, then retell_call_id lookup
-    call_db_id = call_data.get("metadata", {}).get("call_db_id")
+    # A retried or repeated call_ended carries the same call object: nothing left to write
+    payload_hash, duplicate = payload_dedup.check(call_state, "call_payload", call_data)
+    if duplicate:
+        log(f"Skipping duplicate call_ended payload for {call_id} ({payload_hash[:12]})")
+        result_data["database_call_id"] = call_state.get("call_db_id")
+        return result_data
+    transcript_hash, _ = payload_dedup.check(call_state, "transcript", transcript)
+    
+    # Update call record - try metadata first, then the call's actor state, then retell_call_id lookup
+    call_db_id = call_data.get("metadata", {}).get("call_db_id") or call_state.get("call_db_id")
     
     if not call_db_id and call_id:
         # Try to find call by retell_call_id if metadata is missing
@@ -157,44 +235,47 @@ async def handle_call_completion(call_data: Dict[str, Any]):
             call_response = supabase.table("calls").select("id").eq("retell_call_id", call_id).execute()
             if call_response.data:
                 call_db_id = call_response.data[0]["id"]
-                print(f"Found call by retell_call_id: {call_db_id}")
+                log(f"Found call by retell_call_id: {call_db_id}")
         except Exception as e:
-            print(f"Error looking up call by retell_call_id: {e}")
+            log(f"Error looking up call by retell_call_id: {e}")
     
     if call_db_id:
-        # Update call status
-        supabase.table("calls").update({
-            "status": "completed",
-            "completed_at": "now()",
-            "duration_seconds": duration
-        }).eq("id", call_db_id).execute()
-        print(f"Updated call {call_db_id} to completed status")
+        # Update call status; rows already holding this transcript are left untouched
+        with span("supabase.update", table="calls"):
+            supabase.table("calls").update({
+                "status": "completed",
+                "completed_at": "now()",
+                "duration_seconds": duration_seconds,
+                "transcript": transcript,
+                "transcript_hash": transcript_hash
+            }).eq("id", call_db_id).or_(f"transcript_hash.is.null,transcript_hash.neq.{transcript_hash}").execute()
+        log(f"Updated call {call_db_id} to completed status")
         
         # Save transcript
-        supabase.table("call_transcripts").insert({
-            "call_id": call_db_id,
-            "transcript_data": call_data,
-            "raw_transcript": transcript
-        }).execute()
+        save_call_payload(call_db_id, call_data, transcript, payload_hash)
+        payload_dedup.mark_written(call_state, "call_payload", payload_hash)
+        payload_dedup.mark_written(call_state, "transcript", transcript_hash)
         
         # Extract structured data from Retell AI's post-call analysis
         retell_analysis = call_data.get("post_call_analysis", {})
-        print(f"Retell AI post-call analysis data: {retell_analysis}")
+        log(f"Retell AI post-call analysis data: {retell_analysis}")
         
         if retell_analysis:
             # Save structured results from Retell AI
-            supabase.table("call_results").insert({
-                "call_id": call_db_id,
-                "call_outcome": retell_analysis.get("call_outcome", "Unknown"),
-                "structured_data": retell_analysis,
-                "confidence_score": 1.0  # Retell AI analysis is highly reliable
-            }).execute()
-            print(f"Saved Retell AI structured data for call {call_db_id}: {list(retell_analysis.keys())}")
+            with span("supabase.insert", table="call_results"):
+                supabase.table("call_results").insert({
+                    "call_id": call_db_id,
+                    "call_outcome": retell_analysis.get("call_outcome", "Unknown"),
+                    "structured_data": retell_analysis,
+                    "confidence_score": 1.0  # Retell AI analysis is highly reliable
+                }).execute()
+            log(f"Saved Retell AI structured data for call {call_db_id}: {list(retell_analysis.keys())}")
         else:
-            print(f"No post-call analysis data received from Retell AI")
+            log(f"No post-call analysis data received from Retell AI")
         
         # Update result data with database call ID
         result_data["database_call_id"] = call_db_id
+        call_state["call_db_id"] = call_db_id
     else:
         # Create a call record for external calls (triggered outside our system)
         if call_id and call_id != "None":
@@ -212,20 +293,20 @@ async def handle_call_completion(call_data: Dict[str, Any]):
                     "load_number": load_number,
                     "status": "completed",
                     "retell_call_id": call_id,
-                    "duration_seconds": duration,
-                    "completed_at": "now()"
+                    "duration_seconds": duration_seconds,
+                    "completed_at": "now()",
+                    "transcript": transcript,
+                    "transcript_hash": transcript_hash
                 }).execute()
                 
                 if new_call.data:
                     call_db_id = new_call.data[0]["id"]
-                    print(f"Created new call record for external call: {call_db_id}")
+                    log(f"Created new call record for external call: {call_db_id}")
                     
                     # Save transcript
-                    supabase.table("call_transcripts").insert({
-                        "call_id": call_db_id,
-                        "transcript_data": call_data,
-                        "raw_transcript": transcript
-                    }).execute()
+                    save_call_payload(call_db_id, call_data, transcript, payload_hash)
+                    payload_dedup.mark_written(call_state, "call_payload", payload_hash)
+                    payload_dedup.mark_written(call_state, "transcript", transcript_hash)
                     
                     # Save structured data if available
                     retell_analysis = call_data.get("post_call_analysis", {})
@@ -236,50 +317,85 @@ async def handle_call_completion(call_data: Dict[str, Any]):
                             "structured_data": retell_analysis,
                             "confidence_score": 1.0
                         }).execute()
-                        print(f"Saved structured data for external call: {call_db_id}")
+                        log(f"Saved structured data for external call: {call_db_id}")
                     
                     # Update result data with database call ID
                     result_data["database_call_id"] = call_db_id
+                    call_state["call_db_id"] = call_db_id
                     result_data["driver_name"] = driver_name
                     result_data["load_number"] = load_number
                         
             except Exception as e:
-                print(f"Error creating call record for external call: {e}")
+                log(f"Error creating call record for external call: {e}")
         else:
-            print(f"No valid call_id received: {call_id}")
+            log(f"No valid call_id received: {call_id}")
+    
+    if call_db_id:
+        transcript_search.index_transcript(call_db_id, transcript, {
+            "driver_name": result_data["driver_name"],
+            "load_number": result_data["load_number"],
+            "status": "completed"
+        })
+        # Heavier transcript analysis runs in worker processes, off the webhook's path
+        if settings.POST_CALL_METRICS_ENABLED:
+            post_call_pipeline.submit(call_db_id, call_data)
     
     return result_data
 
-async def handle_call_analysis(call_data: Dict[str, Any]):
+def save_call_payload(call_db_id: str, call_data: Dict[str, Any], transcript: str, payload_hash: str):
+    """
+    Store the Retell call object keyed by its content hash
+    The (call_id, content_hash) unique index turns a repeat of a stored payload into a no-op
+    """
+    with span("supabase.insert", table="call_transcripts"):
+        supabase.table("call_transcripts").upsert({
+            "call_id": call_db_id,
+            "content_hash": payload_hash,
+            "transcript_data": call_data,
+            "raw_transcript": transcript
+        }, on_conflict="call_id,content_hash", ignore_duplicates=True).execute()
+
+async def handle_call_analysis(call_data: Dict[str, Any], call_state: Optional[Dict[str, Any]] = None):
     """
     Process call analysis data from Retell AI call_analyzed event
     """
+    call_state = call_state if call_state is not None else {}
     call_id = call_data.get("call_id")
     # Try different possible field names for analysis data
     call_analysis = (call_data.get("call_analysis") or 
                     call_data.get("custom_analysis_data") or 
                     {})
     
-    print(f"CALL ANALYSIS RECEIVED:")
-    print(f"   Call ID: {call_id}")
-    print(f"   Analysis keys: {list(call_analysis.keys())}")
-    print(f"   Full analysis data: {json.dumps(call_analysis, indent=2)}")
-    print(f"   All call data keys: {list(call_data.keys())}")
+    log(f"CALL ANALYSIS RECEIVED:")
+    log(f"   Call ID: {call_id}")
+    log(f"   Analysis keys: {list(call_analysis.keys())}")
+    log(f"   Full analysis data: {json.dumps(call_analysis, indent=2)}")
+    log(f"   All call data keys: {list(call_data.keys())}")
     
     # Update the call record with analysis data
     if call_id:
         try:
-            # Find the call by retell_call_id
-            call_response = supabase.table("calls").select("id").eq("retell_call_id", call_id).execute()
-            if call_response.data:
-                call_db_id = call_response.data[0]["id"]
-                
-                # Update the call with analysis data
-                supabase.table("calls").update({
-                    "structured_data": call_analysis
-                }).eq("id", call_db_id).execute()
-                
-                print(f"Updated call {call_db_id} with analysis data")
+            # call_ended for this call already ran in the same actor and resolved the row
+            call_db_id = call_state.get("call_db_id")
+            if not call_db_id:
+                # Find the call by retell_call_id
+                call_response = supabase.table("calls").select("id").eq("retell_call_id", call_id).execute()
+                if call_response.data:
+                    call_db_id = call_response.data[0]["id"]
+                    call_state["call_db_id"] = call_db_id
+            
+            if call_db_id:
+                # Update the call with analysis data, unless this exact analysis is already stored
+                analysis_hash, duplicate = payload_dedup.check(call_state, "analysis", call_analysis)
+                if duplicate:
+                    log(f"Analysis for call {call_db_id} unchanged ({analysis_hash[:12]}), skipping write")
+                else:
+                    with span("supabase.update", table="calls"):
+                        supabase.table("calls").update({
+                            "structured_data": call_analysis
+                        }).eq("id", call_db_id).execute()
+                    payload_dedup.mark_written(call_state, "analysis", analysis_hash)
+                    log(f"Updated call {call_db_id} with analysis data")
                 
                 return {
                     "call_id": call_id,
@@ -288,7 +404,7 @@ async def handle_call_analysis(call_data: Dict[str, Any]):
                     "status": "analysis_complete"
                 }
         except Exception as e:
-            print(f"Error updating call with analysis: {e}")
+            log(f"Error updating call with analysis: {e}")
     
     return {
         "call_id": call_id,
@@ -296,28 +412,31 @@ async def handle_call_analysis(call_data: Dict[str, Any]):
         "status": "analysis_received"
     }
 
-async def handle_call_start(call_data: Dict[str, Any]) -> Dict[str, Any]:
+async def handle_call_start(call_data: Dict[str, Any], call_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Initialize conversation when call starts
     """
+    call_state = call_state if call_state is not None else {}
     call_id = call_data.get("call_id")
     metadata = call_data.get("metadata", {})
     
-    print(f"Call start debug - call_id: {call_id}, metadata: {metadata}")
+    log(f"Call start debug - call_id: {call_id}, metadata: {metadata}")
     
     # Only update database if we have a valid call_db_id
     call_db_id = metadata.get("call_db_id")
     if call_db_id and call_db_id != "None":
         try:
-            supabase.table("calls").update({
-                "status": "in_progress",
-                "retell_call_id": call_id
-            }).eq("id", call_db_id).execute()
-            print(f"Updated call {call_db_id} status to in_progress")
+            with span("supabase.update", table="calls"):
+                supabase.table("calls").update({
+                    "status": "in_progress",
+                    "retell_call_id": call_id
+                }).eq("id", call_db_id).execute()
+            log(f"Updated call {call_db_id} status to in_progress")
+            call_state["call_db_id"] = call_db_id
         except Exception as e:
-            print(f"Failed to update call status: {e}")
+            log(f"Failed to update call status: {e}")
     else:
-        print(f"No valid call_db_id in metadata, skipping database update")
+        log(f"No valid call_db_id in metadata, skipping database update")
     
     # Get agent configuration (use default if no agent_id)
     agent_id = metadata.get("agent_id", "logistics-agent")
@@ -352,18 +471,38 @@ async def handle_conversation_guidance(call_data: Dict[str, Any]) -> Dict[str, A
     conversation_engine = ConversationEngine(agent_config)
     
     # Analyze conversation context and determine next response
-    response_guidance = conversation_engine.get_next_response(
-        conversation_history=conversation_history,
-        last_user_input=last_user_input,
-        driver_name=metadata.get("driver_name"),
-        load_number=metadata.get("load_number")
-    )
+    with span("conversation_engine.get_next_response", history_turns=len(conversation_history)):
+        if call_id:
+            response_guidance = await conversation_engine.get_call_response(
+                call_id,
+                conversation_history=conversation_history,
+                last_user_input=last_user_input,
+                driver_name=metadata.get("driver_name"),
+                load_number=metadata.get("load_number")
+            )
+        else:
+            response_guidance = conversation_engine.get_next_response(
+                conversation_history=conversation_history,
+                last_user_input=last_user_input,
+                driver_name=metadata.get("driver_name"),
+                load_number=metadata.get("load_number")
+            )
+    
+    # The engine's patterns catch emergencies the keyword triggers miss
+    emergency_type = response_guidance.get("emergency_type")
+    if emergency_type:
+        emergency_alerts.raise_alert(
+            call_id, emergency_type, source="conversation_engine",
+            driver_name=metadata.get("driver_name"),
+            load_number=metadata.get("load_number"),
+            utterance=last_user_input
+        )
     
     return {
         "response": response_guidance["message"],
         "conversation_state": response_guidance["state"],
         "follow_up_questions": response_guidance.get("follow_ups", []),
-        "emergency_check": False
+        "emergency_check": bool(emergency_type)
     }
 
 async def switch_to_emergency_protocol(call_data: Dict[str, Any], emergency_type: str) -> Dict[str, Any]:
@@ -378,21 +517,32 @@ async def switch_to_emergency_protocol(call_data: Dict[str, Any], emergency_type
     }
     
     response = emergency_responses.get(emergency_type, emergency_responses["general"])
+    metadata = call_data.get("metadata", {})
+    
+    # Alert dispatchers before anything else touches the network
+    emergency_alerts.raise_alert(
+        call_data.get("call_id"), emergency_type, source="webhook",
+        driver_name=metadata.get("driver_name"),
+        load_number=metadata.get("load_number"),
+        utterance=call_data.get("last_user_input")
+    )
     
     # Log emergency trigger
-    call_id = call_data.get("metadata", {}).get("call_db_id")
+    call_id = metadata.get("call_db_id")
     if call_id:
-        supabase.table("calls").update({
-            "status": "emergency",
-            "emergency_triggered": True,
-            "emergency_type": emergency_type
-        }).eq("id", call_id).execute()
+        with span("supabase.update", table="calls", emergency_type=emergency_type):
+            supabase.table("calls").update({
+                "status": "emergency",
+                "emergency_triggered": True,
+                "emergency_type": emergency_type
+            }).eq("id", call_id).execute()
     
     return {
         "response": response,
         "conversation_state": "EMERGENCY_PROTOCOL",
         "priority": "HIGH",
         "emergency_type": emergency_type,
+        "emergency_check": True,
         "next_steps": ["gather_safety_info", "get_location", "escalate_to_human"]
     }
 
@@ -426,6 +576,13 @@ async def analyze_user_speech(call_data: Dict[str, Any]) -> Dict[str, Any]:
     # Check for emergency
     emergency = detect_emergency_triggers(user_speech)
     if emergency:
+        metadata = call_data.get("metadata", {})
+        emergency_alerts.raise_alert(
+            call_data.get("call_id"), emergency, source="user_speech",
+            driver_name=metadata.get("driver_name"),
+            load_number=metadata.get("load_number"),
+            utterance=user_speech
+        )
         return {"emergency_detected": True, "emergency_type": emergency}
     
     # Analyze speech quality and cooperation level
@@ -470,33 +627,13 @@ def extract_key_information(speech: str) -> Dict[str, Any]:
     """
     Extract location, status, and other key information from speech
     """
-    info = {}
-    
-    # Location patterns
-    location_patterns = [
-        r"(I-\d+|US-\d+|Highway \d+|Route \d+)",
-        r"mile marker \d+",
-        r"(\w+, \w{2}|\w+ \w+, \w{2})"
-    ]
-    
-    for pattern in location_patterns:
-        match = re.search(pattern, speech, re.IGNORECASE)
-        if match:
-            info["location_mentioned"] = match.group()
-            break
-    
-    # Status indicators
-    status_indicators = {
-        "arrived": ["arrived", "here", "at the", "dock"],
-        "driving": ["driving", "on the road", "en route", "heading"],
-        "delayed": ["delayed", "running late", "behind", "traffic"],
-        "unloading": ["unloading", "dock", "backing up", "delivery"]
-    }
+    extracted = information_extractor.extract(speech)
+    info = extracted.to_dict()
     
-    for status, indicators in status_indicators.items():
-        if any(indicator in speech.lower() for indicator in indicators):
-            info["status_indicated"] = status
-            break
+    if extracted.location:
+        info["location_mentioned"] = extracted.location
+    if extracted.driver_status:
+        info["status_indicated"] = extracted.driver_status
     
     return info
 
@@ -505,11 +642,12 @@ async def get_agent_configuration(agent_id: str) -> Dict[str, Any]:
     Get agent configuration from database
     """
     try:
-        response = supabase.table("agent_configurations").select("*").eq("id", agent_id).execute()
-        if response.data:
-            return response.data[0]
+        with span("get_agent_configuration", agent_id=str(agent_id)):
+            agent_config = agent_config_cache.get(agent_id)
+        if agent_config:
+            return agent_config
     except Exception as e:
-        print(f"Error getting agent config: {e}")
+        log(f"Error getting agent config: {e}")
     
     # Return default configuration
     return {
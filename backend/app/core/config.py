@@ -1,5 +1,9 @@
 from pydantic_settings import BaseSettings
 from typing import List
+import os
+
+# backend/, so on-disk defaults don't depend on the working directory the server starts in
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 class Settings(BaseSettings):
     # API Configuration
@@ -15,11 +19,102 @@ class Settings(BaseSettings):
     
     # Retell AI Configuration
     RETELL_API_KEY: str = ""
+    # Point at mock_retell_server.py (e.g. http://localhost:8090) to dial without placing real calls; empty uses Retell
+    RETELL_BASE_URL: str = ""
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = ""
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
     
+    # Conversation sessions
+    SESSION_CACHE_SIZE: int = 1000
+    
+    # Per-call event dispatch
+    CALL_DISPATCH_SHARDS: int = 16
+    CALL_DISPATCH_SHARD_CONCURRENCY: int = 8
+    CALL_STATE_RETENTION: int = 1000
+    
+    # Webhook admission control (concurrency budget per priority class)
+    ADMISSION_CRITICAL_CONCURRENCY: int = 64
+    ADMISSION_LIVE_CONCURRENCY: int = 32
+    ADMISSION_POST_CALL_CONCURRENCY: int = 4
+    ADMISSION_POST_CALL_MAX_WAITING: int = 16
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    
+    # Sampling profiler (disabled by default)
+    PROFILER_ENABLED: bool = False
+    PROFILER_SAMPLE_RATE: float = 0.05
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_PATHS: List[str] = ["/api/v1/webhooks/retell"]
+    PROFILER_EVENT_TYPES: List[str] = []
+    
+    # Tracing (in-process ring buffer, exported as OTLP/JSON)
+    TRACING_ENABLED: bool = True
+    TRACE_BUFFER_SIZE: int = 4096
+    TRACE_EXPORT_PATH: str = "traces/spans.otlp.jsonl"
+    
+    # Token required by /debug endpoints (profiles, traces); empty disables them
+    DEBUG_TOKEN: str = ""
+    
+    # Monitor replay buffer (per-call ring buffer for reconnecting clients)
+    MONITOR_REPLAY_MAX_CALLS: int = 200
+    MONITOR_REPLAY_EVENTS_PER_CALL: int = 500
+    MONITOR_REPLAY_BYTES_PER_CALL: int = 512 * 1024
+    # Per-call sequence counters outlive evicted logs so seq never restarts for a known call
+    MONITOR_REPLAY_MAX_SEQUENCES: int = 10000
+    
+    # Monitor WebSocket connections (app-level ping/pong, idle reaping, per-connection send budget)
+    MONITOR_MAX_CONNECTIONS: int = 5000
+    MONITOR_PING_INTERVAL_SECONDS: float = 20.0
+    MONITOR_IDLE_TIMEOUT_SECONDS: float = 60.0
+    MONITOR_SEND_QUEUE_BYTES: int = 1024 * 1024
+    MONITOR_SEND_TIMEOUT_SECONDS: float = 10.0
+    
+    # Dashboard call grid (/monitor/snapshots): coalesced diffs per second, how long finished calls stay listed,
+    # when calls without events (lost call_ended) are dropped, and the most calls kept
+    MONITOR_SNAPSHOT_HZ: float = 4.0
+    MONITOR_SNAPSHOT_RETENTION_SECONDS: float = 300.0
+    MONITOR_SNAPSHOT_IDLE_SECONDS: float = 1800.0
+    MONITOR_SNAPSHOT_MAX_CALLS: int = 5000
+    
+    # Emergency alert channel (/monitor/alerts): alerts kept for late joiners and acknowledgment tracking
+    EMERGENCY_ALERT_MAX_CONNECTIONS: int = 500
+    EMERGENCY_ALERT_HISTORY: int = 500
+    
+    # Transcript search backend: "postgres" (calls.transcript_tsv GIN index) or "local" (in-memory index)
+    TRANSCRIPT_SEARCH_BACKEND: str = "postgres"
+    
+    # Recurring check calls (quiet hours are local hours in CHECK_CALL_TIMEZONE)
+    CHECK_CALL_SCHEDULER_ENABLED: bool = True
+    CHECK_CALL_MAX_CONCURRENT_CALLS: int = 10
+    CHECK_CALL_QUIET_HOURS_START: int = 21
+    CHECK_CALL_QUIET_HOURS_END: int = 7
+    CHECK_CALL_TIMEZONE: str = "America/Chicago"
+    CHECK_CALL_RETRY_MINUTES: int = 10
+    
+    # Agent configurations read by the webhook are cached for this long
+    AGENT_CONFIG_CACHE_TTL_SECONDS: float = 30.0
+    
+    # LRU of conversation turn analyses keyed by (flow, state, counters, utterance); 0 disables
+    ANALYSIS_CACHE_SIZE: int = 4096
+    
+    # Warm clients, patterns and caches in the lifespan before serving traffic
+    STARTUP_WARM_UP: bool = True
+    
+    # Derived post-call metrics (talk ratio, gaps, interruptions, timeline) computed in worker processes
+    POST_CALL_METRICS_ENABLED: bool = True
+    POST_CALL_METRICS_WORKERS: int = 2
+    
+    # Calls stuck in in_progress/emergency (lost call_ended webhook) are repaired from Retell's call details
+    STALE_CALL_RECONCILER_ENABLED: bool = True
+    STALE_CALL_INTERVAL_SECONDS: float = 300.0
+    STALE_CALL_AFTER_MINUTES: int = 30
+    STALE_CALL_BATCH_SIZE: int = 100
+    STALE_CALL_CONCURRENCY: int = 8
+    # Finished Retell call details never change, so they are cached on disk across restarts; empty disables.
+    # There is no retention limit (one small JSON file per reconciled call): prune old files externally if needed
+    RETELL_CALL_CACHE_DIR: str = os.path.join(BACKEND_DIR, "retell_call_cache")
+    
     # Environment
     ENVIRONMENT: str = "development"
     
@@ -1,3 +1,4 @@
+from typing import Any, Optional
 from supabase import create_client, Client
 from app.core.config import settings
 
@@ -5,5 +6,26 @@ from app.core.config import settings
 def get_supabase_client() -> Client:
     return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
+class LazySupabaseClient:
+    """
+    Stand-in for the Supabase client that creates it on first use
+    Keeps imports cheap; the application lifespan warms it up before serving.
+    """
+
+    def __init__(self):
+        self._client: Optional[Client] = None
+
+    def get(self) -> Client:
+        if self._client is None:
+            self._client = get_supabase_client()
+        return self._client
+
+    def warm_up(self):
+        """Create the client and open its HTTP connection with a trivial query"""
+        self.get().table("agent_configurations").select("id").limit(1).execute()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
 # Global client instance
-supabase: Client = get_supabase_client()
+supabase: LazySupabaseClient = LazySupabaseClient()
@@ -0,0 +1,154 @@
+from typing import Dict, Any, List, Optional
+from collections import Counter
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from app.core.config import settings
+from app.core.serialization import peek_string_field
+
+class SamplingProfiler:
+    """
+    Stack sampling profiler for the event loop thread
+    A background thread samples the loop thread's stack while at least one sampled
+    request is in flight and aggregates the stacks in collapsed (flamegraph) format.
+    Samples taken while other requests share the loop are attributed to them too.
+    """
+
+    def __init__(self, interval_ms: float = 5.0, max_depth: int = 64):
+        self.interval = interval_ms / 1000.0
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.profiled_requests = 0
+        self._active: Dict[int, str] = {}
+        self._tokens = itertools.count()
+        self._target_thread: Optional[int] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, label: str) -> int:
+        """Start sampling the calling thread on behalf of a request, returns a token for end()"""
+        with self._lock:
+            token = next(self._tokens)
+            self._active[token] = label
+            self._target_thread = threading.get_ident()
+            self.profiled_requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return token
+
+    def end(self, token: int):
+        with self._lock:
+            self._active.pop(token, None)
+            if not self._active:
+                self._wakeup.clear()
+
+    def _run(self):
+        own_file = __file__
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                target = self._target_thread
+                labels = list(self._active.values())
+            frame = sys._current_frames().get(target) if target else None
+            if frame is not None and labels:
+                stack: List[str] = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    if code.co_filename != own_file:
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(labels[0] if len(labels) == 1 else "concurrent requests")
+                with self._lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """Profile in collapsed stack format, one 'frame;frame;frame count' line per stack"""
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self.profiled_requests = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "samples": self.samples,
+                "distinct_stacks": len(self.stacks),
+                "profiled_requests": self.profiled_requests,
+                "active_requests": len(self._active)
+            }
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a random sample of matching requests
+    Requests match by path prefix and, for JSON webhooks, optionally by the "event" field
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler, sample_rate: float,
+                 paths: List[str], event_types: List[str]):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.paths = paths
+        self.event_types = set(event_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(scope["path"].startswith(path) for path in self.paths):
+            return await self.app(scope, receive, send)
+        if random.random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        label = f"{scope['method']} {scope['path']}"
+        if self.event_types:
+            body, receive = await self._buffer_body(receive)
+            event_type = self._event_type(body)
+            if event_type not in self.event_types:
+                return await self.app(scope, receive, send)
+            label = f"{label} [{event_type}]"
+
+        token = self.profiler.begin(label)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.end(token)
+
+    async def _buffer_body(self, receive):
+        """Read the whole request body and return a receive callable that replays it"""
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay
+
+    def _event_type(self, body: bytes) -> Optional[str]:
+        # Only the label is needed here; the handler parses the full payload
+        return peek_string_field(body, "event")
+
+# Global profiler instance, only fed when the middleware is enabled
+profiler = SamplingProfiler(interval_ms=settings.PROFILER_INTERVAL_MS)
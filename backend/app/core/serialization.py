@@ -0,0 +1,52 @@
+from typing import Any, Optional, List, Dict, Type
+import re
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+# Unknown types (Decimal, UUID subclasses, enums from services) fall back to str like json.dumps(default=str)
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str"""
+    return orjson.loads(data)
+
+def dumps(value: Any) -> str:
+    return orjson.dumps(value, default=str, option=DUMPS_OPTIONS).decode()
+
+def dumps_bytes(value: Any, sort_keys: bool = False) -> bytes:
+    options = DUMPS_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else DUMPS_OPTIONS
+    return orjson.dumps(value, default=str, option=options)
+
+_field_patterns: Dict[str, "re.Pattern[bytes]"] = {}
+
+def peek_string_field(body: bytes, key: str) -> Optional[str]:
+    """
+    First "key": "value" string in a JSON body without parsing the rest of it
+    Meant for labels and routing hints (Retell puts "event" first), not for data.
+    """
+    pattern = _field_patterns.get(key)
+    if pattern is None:
+        pattern = re.compile(rb'"' + re.escape(key.encode()) + rb'"\s*:\s*"([^"\\]{0,200})"')
+        _field_patterns[key] = pattern
+    match = pattern.search(body)
+    return match.group(1).decode() if match else None
+
+def model_columns(model: Type[BaseModel]) -> str:
+    """Supabase select list holding exactly the fields of a response model"""
+    return ",".join(model.model_fields)
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson (what FastAPI's deprecated ORJSONResponse did)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+def trusted_rows(rows: List[Dict[str, Any]]) -> FastJSONResponse:
+    """
+    Serialize database rows as they are, skipping response_model re-validation
+    Only for rows selected with model_columns of the endpoint's response model, so the
+    payload has the same shape the model would have produced.
+    """
+    return FastJSONResponse(rows)
@@ -0,0 +1,45 @@
+from typing import Dict, Any, Callable, Set
+import asyncio
+import time
+from app.core.database import supabase
+from app.core.tracing import log
+from app.services.agent_config_cache import agent_config_cache
+from app.services.conversation_engine import ConversationEngine
+from app.services.retell_client import retell_client
+
+# Cold-start timings in milliseconds, filled in by app.main and the lifespan warm-up
+startup_metrics: Dict[str, Any] = {"import_ms": None, "warm_up_ms": {}, "warm_up_errors": {}}
+
+# Background warm-up steps; referenced here so they are not garbage-collected mid-run
+_background: Set[asyncio.Task] = set()
+
+def _timed(name: str, step: Callable[[], Any]):
+    started = time.perf_counter()
+    try:
+        step()
+    except Exception as e:
+        startup_metrics["warm_up_errors"][name] = str(e)
+        log(f"Warm-up step {name} failed: {e}")
+    startup_metrics["warm_up_ms"][name] = round((time.perf_counter() - started) * 1000, 1)
+
+def _warm_conversation_engine():
+    # Runs the extractor and engine once so lazy regex/state setup is not paid by the first webhook
+    ConversationEngine({"scenario": "driver_checkin"}).get_next_response(
+        conversation_history=[],
+        last_user_input="I'm on I-10 near Dallas, should arrive at 3pm",
+        driver_name="Warm Up",
+        load_number="WARM-UP"
+    )
+
+async def warm_up():
+    """
+    Prepare everything the webhook hot path touches before the first request
+    The Retell SDK is only needed to place calls, so it loads in the background.
+    """
+    _timed("supabase_connection", supabase.warm_up)
+    _timed("agent_config_cache", agent_config_cache.prime)
+    _timed("conversation_engine", _warm_conversation_engine)
+    task = asyncio.create_task(asyncio.to_thread(_timed, "retell_client", lambda: retell_client.client))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    log(f"Warm-up finished: {startup_metrics['warm_up_ms']}")
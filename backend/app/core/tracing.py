@@ -0,0 +1,148 @@
+from typing import Dict, Any, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import os
+import secrets
+import threading
+import time
+from app.core.config import settings
+
+SERVICE_NAME = "voicefleet-api"
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "start_ns", "end_ns",
+                 "attributes", "status_code", "status_message")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status_code}
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+class SpanRingBuffer:
+    """Bounded in-process exporter keeping the most recent finished spans"""
+
+    def __init__(self, max_spans: int):
+        self.spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_otlp(self, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """Buffered spans as an OTLP/JSON ExportTraceServiceRequest"""
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans if trace_id is None or span.trace_id == trace_id]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": spans
+                }]
+            }]
+        }
+
+    def export_to_file(self, path: str) -> int:
+        """Append buffered spans to an OTLP/JSON lines file and clear the buffer"""
+        payload = self.to_otlp()
+        count = len(payload["resourceSpans"][0]["scopeSpans"][0]["spans"])
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a") as export_file:
+            export_file.write(json.dumps(payload) + "\n")
+        with self._lock:
+            self.spans.clear()
+        return count
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+span_buffer = SpanRingBuffer(settings.TRACE_BUFFER_SIZE)
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Trace the enclosed block; nested spans share the trace of their parent
+    Works in sync and async code since the active span is held in a context variable
+    """
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        parent_span_id=parent.span_id if parent else None,
+        attributes=attributes
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+        current.status_code = STATUS_OK
+    except Exception as e:
+        current.status_code = STATUS_ERROR
+        current.status_message = str(e)
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        span_buffer.export(current)
+
+def current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+def log(message: str):
+    """Print a log line tagged with the active trace ID"""
+    trace_id = current_trace_id()
+    print(f"[trace={trace_id}] {message}" if trace_id else message)
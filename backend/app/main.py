@@ -1,12 +1,48 @@
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, profiler
+from app.core.startup import startup_metrics, warm_up
+from app.core.tracing import log
 from app.api.api_v1.api import api_router
+from app.services.check_call_scheduler import check_call_scheduler
+from app.services.connection_manager import monitor_connections
+from app.services.call_snapshots import call_snapshots
+from app.services.emergency_alerts import alert_connections
+from app.services.post_call_metrics import post_call_pipeline
+from app.services.stale_call_reconciler import stale_call_reconciler
+from app.services.transcript_search import transcript_search
+
+startup_metrics["import_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log(f"Application modules imported in {startup_metrics['import_ms']}ms")
+    if settings.STARTUP_WARM_UP:
+        await warm_up()
+    await transcript_search.start()
+    if settings.CHECK_CALL_SCHEDULER_ENABLED:
+        await check_call_scheduler.start()
+    if settings.STALE_CALL_RECONCILER_ENABLED:
+        await stale_call_reconciler.start()
+    yield
+    await check_call_scheduler.stop()
+    await stale_call_reconciler.stop()
+    await transcript_search.stop()
+    await monitor_connections.close_all()
+    await call_snapshots.stop()
+    await alert_connections.close_all()
+    await post_call_pipeline.shutdown()
 
 app = FastAPI(
     title="VoiceFleet API",
     description="Backend API for VoiceFleet smart logistics platform",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -17,6 +53,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in sampling profiler; when disabled the middleware is not installed at all
+if settings.PROFILER_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=profiler,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        paths=settings.PROFILER_PATHS,
+        event_types=settings.PROFILER_EVENT_TYPES,
+    )
+
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, Any
 from datetime import datetime
 
 class AgentConfigurationBase(BaseModel):
@@ -9,7 +9,7 @@ class AgentConfigurationBase(BaseModel):
     enable_filler_words: Optional[bool] = False
 
 class AgentConfigurationCreate(AgentConfigurationBase):
-    pass
+    flow_definition: Optional[Dict[str, Any]] = None  # Custom conversation flow; omit to keep the current one
 
 class AgentConfiguration(AgentConfigurationBase):
     id: str
@@ -19,6 +19,7 @@ class AgentConfiguration(AgentConfigurationBase):
     language: str  # Keep language for Retell integration
     responsiveness: float  # Keep responsiveness for Retell integration
     retell_agent_id: Optional[str] = None
+    flow_definition: Optional[Dict[str, Any]] = None  # Overrides the built-in flow of the scenario
     created_at: datetime
     updated_at: datetime
 
@@ -39,6 +39,7 @@ class CallResultBase(BaseModel):
     structured_data: Dict[str, Any]
     confidence_score: Optional[float] = None
     processing_notes: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
 
 class CallResult(CallResultBase):
     id: str
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class CheckCallScheduleBase(BaseModel):
+    driver_name: str
+    driver_phone: str
+    load_number: str
+    agent_configuration_id: str
+    interval_minutes: int = Field(120, gt=0)
+
+class CheckCallScheduleCreate(CheckCallScheduleBase):
+    first_run_at: Optional[datetime] = None  # Defaults to now
+
+class CheckCallSchedule(CheckCallScheduleBase):
+    id: str
+    next_run_at: datetime
+    active: bool = True
+    last_run_at: Optional[datetime] = None
+    last_call_id: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
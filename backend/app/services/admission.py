@@ -0,0 +1,112 @@
+from typing import Dict, Any, Optional
+from enum import Enum
+from contextlib import asynccontextmanager
+import asyncio
+from app.core.config import settings
+
+class EventPriority(Enum):
+    """Priority classes for incoming webhook traffic, most urgent first"""
+    CRITICAL = "critical"      # Emergency events
+    LIVE = "live"              # Live-turn guidance while the driver is on the line
+    POST_CALL = "post_call"    # Completion and analysis payloads
+
+class AdmissionRejected(Exception):
+    """Raised when a low-priority event is shed because the server is saturated"""
+
+    def __init__(self, priority: EventPriority, retry_after: int):
+        super().__init__(f"Server busy, {priority.value} events are being shed")
+        self.priority = priority
+        self.retry_after = retry_after
+
+class PriorityLane:
+    """Concurrency budget and counters for one priority class"""
+
+    def __init__(self, priority: EventPriority, concurrency: int, max_waiting: Optional[int] = None):
+        self.priority = priority
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.concurrency
+
+class AdmissionController:
+    """
+    Admission control with one lane per priority class
+    Each class has its own concurrency budget, so live conversations never queue
+    behind analytics. Critical and live events wait for a slot; post-call events
+    are shed with a retry hint when their lane is full or live traffic is queueing.
+    """
+
+    def __init__(self, budgets: Dict[EventPriority, int], post_call_max_waiting: int, retry_after: int):
+        self.retry_after = retry_after
+        self.lanes = {
+            priority: PriorityLane(
+                priority,
+                concurrency,
+                max_waiting=post_call_max_waiting if priority == EventPriority.POST_CALL else None
+            )
+            for priority, concurrency in budgets.items()
+        }
+
+    def _should_shed(self, lane: PriorityLane) -> bool:
+        if lane.max_waiting is None:
+            return False
+        live_backlog = self.lanes[EventPriority.LIVE].waiting + self.lanes[EventPriority.CRITICAL].waiting
+        return live_backlog > 0 or (lane.saturated and lane.waiting >= lane.max_waiting)
+
+    @asynccontextmanager
+    async def admit(self, priority: EventPriority):
+        """Hold a slot in the priority's lane for the duration of the block"""
+        lane = self.lanes[priority]
+        if self._should_shed(lane):
+            lane.shed += 1
+            raise AdmissionRejected(priority, self.retry_after)
+
+        lane.waiting += 1
+        try:
+            await lane.slots.acquire()
+        finally:
+            lane.waiting -= 1
+
+        lane.in_flight += 1
+        lane.admitted += 1
+        try:
+            yield
+        finally:
+            lane.in_flight -= 1
+            lane.slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            priority.value: {
+                "concurrency": lane.concurrency,
+                "in_flight": lane.in_flight,
+                "waiting": lane.waiting,
+                "admitted": lane.admitted,
+                "shed": lane.shed
+            }
+            for priority, lane in self.lanes.items()
+        }
+
+# Global admission controller
+admission_controller = AdmissionController(
+    budgets={
+        EventPriority.CRITICAL: settings.ADMISSION_CRITICAL_CONCURRENCY,
+        EventPriority.LIVE: settings.ADMISSION_LIVE_CONCURRENCY,
+        EventPriority.POST_CALL: settings.ADMISSION_POST_CALL_CONCURRENCY
+    },
+    post_call_max_waiting=settings.ADMISSION_POST_CALL_MAX_WAITING,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS
+)
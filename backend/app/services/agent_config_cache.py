@@ -0,0 +1,38 @@
+from typing import Dict, Any, Optional, Tuple
+import time
+from app.core.config import settings
+from app.core.database import supabase
+
+class AgentConfigCache:
+    """
+    Short-lived cache of agent_configurations rows read on every webhook
+    Primed at startup; entries expire after ttl_seconds and are dropped when an agent is updated.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def get(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(agent_id)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+        response = supabase.table("agent_configurations").select("*").eq("id", agent_id).execute()
+        if not response.data:
+            return None
+        self.entries[agent_id] = (time.monotonic(), response.data[0])
+        return response.data[0]
+
+    def prime(self) -> int:
+        """Load every agent configuration; returns how many were cached"""
+        response = supabase.table("agent_configurations").select("*").execute()
+        now = time.monotonic()
+        for row in response.data or []:
+            self.entries[row["id"]] = (now, row)
+        return len(response.data or [])
+
+    def invalidate(self, agent_id: str):
+        self.entries.pop(agent_id, None)
+
+# Global cache instance
+agent_config_cache = AgentConfigCache(settings.AGENT_CONFIG_CACHE_TTL_SECONDS)
@@ -0,0 +1,66 @@
+from typing import Dict, Any
+from app.core.database import supabase
+from app.services.retell_client import retell_client
+
+class CallDialError(Exception):
+    """A call record that cannot be dialed; status_code mirrors the HTTP error to report"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def normalize_phone_e164(phone: str) -> str:
+    """Digits-only E.164 form matching calls.driver_phone_e164 (10-digit numbers are assumed to be +1)"""
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    return f"+1{digits}" if len(digits) == 10 else f"+{digits}"
+
+def format_retell_phone(phone: str) -> str:
+    """Format an E.164 number the way Retell AI expects it (+1-555-123-4567)"""
+    if not phone.startswith("+"):
+        raise CallDialError(400, "Phone number must start with + (E.164 format)")
+
+    if "-" not in phone and len(phone.replace("+", "").replace("-", "")) >= 10:
+        clean_phone = phone.replace("+", "").replace("-", "").replace(" ", "")
+        if len(clean_phone) == 11 and clean_phone.startswith("1"):
+            return f"+{clean_phone[0]}-{clean_phone[1:4]}-{clean_phone[4:7]}-{clean_phone[7:]}"
+        if len(clean_phone) == 10:
+            return f"+1-{clean_phone[0:3]}-{clean_phone[3:6]}-{clean_phone[6:]}"
+    return phone
+
+async def dial_call(call_id: str) -> Dict[str, Any]:
+    """
+    Place the Retell AI phone call for an existing call record
+    Shared by the manual trigger endpoint and the check-call scheduler
+    """
+    call_response = supabase.table("calls").select("*").eq("id", call_id).execute()
+    if not call_response.data:
+        raise CallDialError(404, "Call not found")
+
+    call_data = call_response.data[0]
+
+    agent_response = supabase.table("agent_configurations").select("*").eq("id", call_data["agent_configuration_id"]).execute()
+    if not agent_response.data:
+        raise CallDialError(404, "Agent configuration not found")
+
+    retell_agent_id = agent_response.data[0].get("retell_agent_id")
+    if not retell_agent_id:
+        raise CallDialError(400, "Agent not synced with Retell AI. Please sync the agent first.")
+
+    retell_response = await retell_client.create_phone_call(
+        agent_id=retell_agent_id,
+        to_number=format_retell_phone(call_data["driver_phone"]),
+        metadata={
+            "driver_name": call_data["driver_name"],
+            "load_number": call_data["load_number"],
+            "call_db_id": call_id,
+            "agent_id": call_data["agent_configuration_id"]
+        }
+    )
+
+    supabase.table("calls").update({
+        "retell_call_id": retell_response.get("call_id"),
+        "status": "in_progress"
+    }).eq("id", call_id).execute()
+
+    return retell_response
@@ -0,0 +1,121 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+from collections import OrderedDict
+import asyncio
+import contextvars
+import zlib
+from app.core.config import settings
+
+# Handler run inside a call actor; receives the per-call state dict shared by all events of the call
+CallHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+class CallActor:
+    """Mailbox for one active call; events are processed strictly in arrival order"""
+
+    def __init__(self, call_id: str, state: Dict[str, Any]):
+        self.call_id = call_id
+        self.state = state
+        self.mailbox: "asyncio.Queue[Tuple[CallHandler, contextvars.Context, asyncio.Future]]" = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+class DispatchShard:
+    """Registry of call actors hashed to this shard, with its own concurrency budget"""
+
+    def __init__(self, concurrency: int, max_retained_states: int):
+        self.actors: Dict[str, CallActor] = {}
+        self.states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.concurrency = concurrency
+        self.max_retained_states = max_retained_states
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    def state_for(self, call_id: str) -> Dict[str, Any]:
+        state = self.states.get(call_id)
+        if state is None:
+            state = {}
+            self.states[call_id] = state
+        self.states.move_to_end(call_id)
+        while len(self.states) > self.max_retained_states:
+            self.states.popitem(last=False)
+        return state
+
+class CallEventDispatcher:
+    """
+    Per-call actor executor for webhook events
+    Each active call gets a lightweight mailbox drained by a single task, so events of
+    one call never overlap, while calls hashed to different shards run in parallel.
+    Actors exit once their mailbox is empty; per-call state is retained for late events.
+    """
+
+    def __init__(self, num_shards: int = 16, shard_concurrency: int = 8, max_retained_states: int = 1000):
+        self.shards: List[DispatchShard] = [
+            DispatchShard(shard_concurrency, max_retained_states) for _ in range(num_shards)
+        ]
+
+    def _shard_for(self, call_id: str) -> DispatchShard:
+        return self.shards[zlib.crc32(call_id.encode()) % len(self.shards)]
+
+    async def submit(self, call_id: Optional[str], handler: CallHandler) -> Any:
+        """Queue handler behind earlier events of the same call and wait for its result"""
+        if not call_id:
+            return await handler({})
+
+        shard = self._shard_for(call_id)
+        actor = shard.actors.get(call_id)
+        if actor is None:
+            actor = CallActor(call_id, shard.state_for(call_id))
+            shard.actors[call_id] = actor
+
+        future = asyncio.get_running_loop().create_future()
+        # Handlers run in the submitter's context so tracing spans keep their parent
+        actor.mailbox.put_nowait((handler, contextvars.copy_context(), future))
+        if actor.task is None or actor.task.done():
+            actor.task = asyncio.create_task(self._drain(shard, actor))
+
+        return await future
+
+    async def _drain(self, shard: DispatchShard, actor: CallActor):
+        try:
+            while not actor.mailbox.empty():
+                handler, context, future = actor.mailbox.get_nowait()
+                async with shard.slots:
+                    try:
+                        result = await context.run(asyncio.ensure_future, handler(actor.state))
+                        if not future.done():
+                            future.set_result(result)
+                    except BaseException as e:
+                        if not future.done():
+                            if isinstance(e, asyncio.CancelledError):
+                                future.cancel()
+                            else:
+                                future.set_exception(e)
+                        # A cancelled handler only fails its own event; cancelling the drainer stops it
+                        stopping = isinstance(e, asyncio.CancelledError) and asyncio.current_task().cancelling()
+                        if stopping or not isinstance(e, (Exception, asyncio.CancelledError)):
+                            raise
+        finally:
+            # Events queued behind a drainer that died would otherwise wait forever
+            while not actor.mailbox.empty():
+                _, _, future = actor.mailbox.get_nowait()
+                future.cancel()
+            if shard.actors.get(actor.call_id) is actor:
+                shard.actors.pop(actor.call_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shards": len(self.shards),
+            "active_calls": sum(len(shard.actors) for shard in self.shards),
+            "queued_events": sum(actor.mailbox.qsize() for shard in self.shards for actor in shard.actors.values())
+        }
+
+# Global dispatcher instance
+call_dispatcher = CallEventDispatcher(
+    num_shards=settings.CALL_DISPATCH_SHARDS,
+    shard_concurrency=settings.CALL_DISPATCH_SHARD_CONCURRENCY,
+    max_retained_states=settings.CALL_STATE_RETENTION
+)
@@ -0,0 +1,117 @@
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+import base64
+import csv
+import io
+import uuid
+import zlib
+from datetime import datetime
+from app.core.database import supabase
+from app.core.serialization import dumps
+
+EXPORT_COLUMNS = [
+    "id", "created_at", "completed_at", "status", "agent_configuration_id",
+    "driver_name", "driver_phone", "load_number", "pickup_location", "delivery_location",
+    "retell_call_id", "duration_seconds", "emergency_triggered", "emergency_type", "transcript"
+]
+RESULT_COLUMNS = ["call_outcome", "structured_data", "confidence_score", "created_at"]
+CSV_HEADER = EXPORT_COLUMNS + ["results", "cursor"]
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(f"{row['created_at']}|{row['id']}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    (created_at, id) of the last exported row; raises ValueError on a malformed cursor
+    Cursors come from clients and end up in a PostgREST filter, so both parts are parsed
+    and only their normalized forms are returned.
+    """
+    try:
+        created_at, call_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(call_id))
+    except Exception:
+        raise ValueError("Invalid export cursor")
+
+def iter_call_pages(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 1000,
+    columns: Optional[str] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Page through calls with their results embedded (or the given select columns), oldest first
+    Keyset pagination on (created_at, id) keeps every page an index range scan,
+    so deep pages cost the same as the first one.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    columns = columns or ",".join(EXPORT_COLUMNS) + f",call_results({','.join(RESULT_COLUMNS)})"
+
+    while True:
+        query = supabase.table("calls").select(columns)
+        if start:
+            query = query.gte("created_at", start)
+        if end:
+            query = query.lt("created_at", end)
+        if after:
+            created_at, call_id = after
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt."{call_id}")')
+        rows = query.order("created_at").order("id").limit(page_size).execute().data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+def _ndjson_page(rows: List[Dict[str, Any]]) -> str:
+    lines = []
+    for row in rows:
+        record = {column: row.get(column) for column in EXPORT_COLUMNS}
+        record["results"] = row.get("call_results") or []
+        record["cursor"] = encode_cursor(row)
+        lines.append(dumps(record))
+    return "\n".join(lines) + "\n"
+
+def _csv_page(rows: List[Dict[str, Any]], include_header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(CSV_HEADER)
+    for row in rows:
+        writer.writerow(
+            [row.get(column) for column in EXPORT_COLUMNS]
+            + [dumps(row.get("call_results") or []), encode_cursor(row)]
+        )
+    return buffer.getvalue()
+
+def stream_call_export(
+    export_format: str = "ndjson",
+    compress: bool = False,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 1000
+) -> Iterator[bytes]:
+    """
+    Encoded export chunks, one per page, so memory stays bounded by page_size
+    Every record carries the cursor to resume the export right after it.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    first_page = True
+
+    for rows in iter_call_pages(start, end, cursor, page_size):
+        if export_format == "csv":
+            chunk = _csv_page(rows, include_header=first_page and not cursor).encode()
+        else:
+            chunk = _ndjson_page(rows).encode()
+        first_page = False
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    if first_page and export_format == "csv" and not cursor:
+        header = _csv_page([], include_header=True).encode()
+        yield compressor.compress(header) if compressor else header
+    if compressor:
+        yield compressor.flush()
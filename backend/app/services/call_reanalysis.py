@@ -0,0 +1,172 @@
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+import json
+import multiprocessing
+import os
+import time
+from app.core.database import supabase
+from app.services.call_export import iter_call_pages, encode_cursor
+from app.services.post_call_metrics import compute_call_metrics, derive_outcome
+
+# calls columns plus the stored Retell call objects needed to re-score a call
+REANALYSIS_COLUMNS = "id,created_at,transcript,call_transcripts(transcript_data)"
+
+# (calls.id, metrics or None, error or None)
+ChunkResult = Tuple[str, Optional[Dict[str, Any]], Optional[str]]
+
+def analyze_chunk(items: List[Tuple[str, Dict[str, Any]]]) -> List[ChunkResult]:
+    """Score a chunk of calls in a worker process; one bad transcript does not fail the chunk"""
+    results = []
+    for call_id, call_data in items:
+        try:
+            results.append((call_id, compute_call_metrics(call_data), None))
+        except Exception as e:
+            results.append((call_id, None, f"{type(e).__name__}: {e}"))
+    return results
+
+def _call_data(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The stored Retell call object of a row, or its plain transcript when that is all there is"""
+    for stored in reversed(row.get("call_transcripts") or []):
+        if isinstance(stored.get("transcript_data"), dict):
+            return stored["transcript_data"]
+    if row.get("transcript"):
+        return {"transcript": row["transcript"]}
+    return None
+
+@dataclass
+class ReanalysisCheckpoint:
+    """Progress of a re-analysis run, saved after every page whose results are written"""
+    start: Optional[str] = None
+    end: Optional[str] = None
+    cursor: Optional[str] = None
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: Optional[str] = None
+    finished: bool = False
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ReanalysisCheckpoint"]:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str):
+        self.updated_at = datetime.now().isoformat()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(temp_path, path)
+
+class CallReanalysisJob:
+    """
+    Re-scores stored calls with the current engine across a process pool
+    Calls are streamed oldest first in keyset pages; each page is split into chunks
+    for the workers while the previous page's results are bulk-written, and the
+    checkpoint only advances past a page once its results are stored, so an
+    interrupted run resumes without skipping or redoing work.
+    """
+
+    def __init__(self, checkpoint: ReanalysisCheckpoint, checkpoint_path: str,
+                 workers: Optional[int] = None, page_size: int = 500, chunk_size: int = 25,
+                 dry_run: bool = False, on_progress: Optional[Callable[["CallReanalysisJob"], None]] = None):
+        self.checkpoint = checkpoint
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers or os.cpu_count() or 1
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.on_progress = on_progress
+        self.total: Optional[int] = None
+        self.run_processed = 0
+        self.run_started = time.monotonic()
+
+    def count_calls(self) -> int:
+        query = supabase.table("calls").select("id", count="exact")
+        if self.checkpoint.start:
+            query = query.gte("created_at", self.checkpoint.start)
+        if self.checkpoint.end:
+            query = query.lt("created_at", self.checkpoint.end)
+        return query.limit(1).execute().count or 0
+
+    def run(self):
+        self.total = self.count_calls()
+        pages = iter_call_pages(
+            self.checkpoint.start, self.checkpoint.end, self.checkpoint.cursor,
+            self.page_size, columns=REANALYSIS_COLUMNS
+        )
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            pending = None
+            for rows in pages:
+                submitted = self._submit_page(executor, rows)
+                # Write the previous page while the workers score this one
+                if pending:
+                    self._finish_page(*pending)
+                pending = (rows, submitted)
+            if pending:
+                self._finish_page(*pending)
+        finally:
+            executor.shutdown(cancel_futures=True)
+        self.checkpoint.finished = True
+        self._save_checkpoint()
+
+    def _submit_page(self, executor: ProcessPoolExecutor, rows: List[Dict[str, Any]]) -> Tuple[List[Future], int]:
+        items = []
+        for row in rows:
+            call_data = _call_data(row)
+            if call_data is not None:
+                items.append((row["id"], call_data))
+        futures = [
+            executor.submit(analyze_chunk, items[i:i + self.chunk_size])
+            for i in range(0, len(items), self.chunk_size)
+        ]
+        return futures, len(rows) - len(items)
+
+    def _finish_page(self, rows: List[Dict[str, Any]], submitted: Tuple[List[Future], int]):
+        futures, skipped = submitted
+        results: List[ChunkResult] = []
+        for future in futures:
+            results.extend(future.result())
+
+        scored = [(call_id, metrics) for call_id, metrics, error in results if metrics is not None]
+        if not self.dry_run:
+            self.store(scored)
+
+        self.checkpoint.cursor = encode_cursor(rows[-1])
+        self.checkpoint.processed += len(rows)
+        self.checkpoint.skipped += skipped
+        self.checkpoint.failed += len(results) - len(scored)
+        self._save_checkpoint()
+        self.run_processed += len(rows)
+        if self.on_progress:
+            self.on_progress(self)
+
+    def _save_checkpoint(self):
+        # A dry run writes no results, so its progress must not make a real run skip those calls
+        if not self.dry_run:
+            self.checkpoint.save(self.checkpoint_path)
+
+    def store(self, scored: List[Tuple[str, Dict[str, Any]]]):
+        """Replace the derived metrics rows of these calls in one replace_call_metrics RPC (one transaction)"""
+        if not scored:
+            return
+        supabase.rpc("replace_call_metrics", {"results": [
+            {
+                "call_id": call_id,
+                "call_outcome": derive_outcome(metrics),
+                "structured_data": metrics["extracted"],
+                "metrics": metrics,
+                "processing_notes": "Derived post-call metrics (re-analysis)"
+            }
+            for call_id, metrics in scored
+        ]}).execute()
+
+    def rate(self) -> float:
+        """Calls per second in this run"""
+        elapsed = time.monotonic() - self.run_started
+        return self.run_processed / elapsed if elapsed > 0 else 0.0
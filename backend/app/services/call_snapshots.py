@@ -0,0 +1,193 @@
+from typing import Dict, Any, Optional, Set
+from datetime import datetime
+import asyncio
+import time
+from collections import OrderedDict
+from app.core.config import settings
+from app.services.connection_manager import ConnectionManager
+
+# Grid status implied by each monitor event type
+EVENT_STATUS = {
+    "call_started": "in_progress",
+    "call_initialized": "in_progress",
+    "agent_response_required": "in_progress",
+    "agent_response": "in_progress",
+    "user_speech": "in_progress",
+    "call_ended": "ended",
+    "call_completed": "completed",
+    "call_analyzed": "analyzed"
+}
+FINISHED_STATUSES = {"ended", "completed", "analyzed"}
+
+def _call_details(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Driver and load of a call from whichever event payload carries them"""
+    raw = event_data.get("raw_data") or {}
+    call = raw.get("call") if isinstance(raw.get("call"), dict) else raw
+    sources = (
+        call.get("retell_llm_dynamic_variables") or {},
+        call.get("metadata") or {},
+        event_data.get("call_data") or {}
+    )
+    details = {}
+    for key in ("driver_name", "load_number"):
+        for source in sources:
+            if isinstance(source, dict) and source.get(key):
+                details[key] = source[key]
+                break
+    return details
+
+class CallSnapshotAggregator:
+    """
+    Live grid of active calls, pushed as one coalesced diff per tick
+    Events only update the in-memory row and mark it dirty (O(1)); a ticker running at
+    hz sends the changed and removed rows to snapshot subscribers, so fan-out cost is
+    bounded by the tick rate however many events arrive. Finished calls are dropped
+    from the grid after retention_seconds, calls without events for idle_seconds (a
+    lost call_ended) and the least recently active beyond max_calls are dropped too.
+    Expiry runs on every event, so the grid stays bounded with no dashboard connected.
+    """
+
+    def __init__(self, connections: ConnectionManager, hz: float, retention_seconds: float,
+                 idle_seconds: float, max_calls: int):
+        self.connections = connections
+        self.interval = 1.0 / hz if hz > 0 else 0.25
+        self.retention_seconds = retention_seconds
+        self.idle_seconds = idle_seconds
+        self.max_calls = max_calls
+        self.calls: Dict[str, Dict[str, Any]] = {}
+        # Both ordered oldest first, so expiry only looks at the entries it drops
+        self.finished_at: "OrderedDict[str, float]" = OrderedDict()
+        self.active_at: "OrderedDict[str, float]" = OrderedDict()
+        self.dirty: Set[str] = set()
+        self.removed: Set[str] = set()
+        self.seq = 0
+        self.events = 0
+        self.ticks = 0
+        self.expired = 0
+        self._ticker: Optional[asyncio.Task] = None
+
+    def record(self, event_data: Dict[str, Any]):
+        call_id = event_data.get("call_id")
+        if not call_id:
+            return
+        event_type = event_data.get("event_type")
+        row = self.calls.get(call_id)
+        if row is None:
+            row = {"call_id": call_id, "status": "in_progress", "event_count": 0, "emergency": False}
+            self.calls[call_id] = row
+            self.removed.discard(call_id)
+        row.update(_call_details(event_data))
+        row["status"] = EVENT_STATUS.get(event_type, row["status"])
+        row["last_event"] = event_type
+        row["event_count"] += 1
+        row["updated_at"] = datetime.now().isoformat()
+        if event_data.get("conversation_state"):
+            row["conversation_state"] = event_data["conversation_state"]
+        if event_data.get("emergency_check"):
+            row["emergency"] = True
+        now = time.monotonic()
+        self.active_at[call_id] = now
+        self.active_at.move_to_end(call_id)
+        if row["status"] in FINISHED_STATUSES:
+            self.finished_at[call_id] = now
+            self.finished_at.move_to_end(call_id)
+        # Without subscribers there is nobody to diff against; a new one gets the full grid
+        if len(self.connections):
+            self.dirty.add(call_id)
+        self.events += 1
+        self._expire(now)
+
+    def full_snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": "snapshot",
+            "timestamp": datetime.now().isoformat(),
+            "seq": self.seq,
+            "calls": list(self.calls.values())
+        }
+
+    async def subscribe(self, connection):
+        """Send the whole grid to a new subscriber and make sure the ticker runs"""
+        await connection.send(connection.encode(self.full_snapshot()))
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._run())
+
+    def _expire(self, now: float):
+        finished_cutoff = now - self.retention_seconds
+        while self.finished_at:
+            call_id, finished = next(iter(self.finished_at.items()))
+            if finished >= finished_cutoff:
+                break
+            self._drop(call_id)
+        idle_cutoff = now - self.idle_seconds
+        while self.active_at:
+            call_id, active = next(iter(self.active_at.items()))
+            if active >= idle_cutoff and len(self.active_at) <= self.max_calls:
+                break
+            self._drop(call_id)
+
+    def _drop(self, call_id: str):
+        self.calls.pop(call_id, None)
+        self.finished_at.pop(call_id, None)
+        self.active_at.pop(call_id, None)
+        self.dirty.discard(call_id)
+        if len(self.connections):
+            self.removed.add(call_id)
+        self.expired += 1
+
+    def tick(self) -> Optional[Dict[str, Any]]:
+        """Build the diff since the last tick, or None when nothing changed"""
+        self._expire(time.monotonic())
+        if not self.dirty and not self.removed:
+            return None
+        self.seq += 1
+        diff = {
+            "type": "snapshot_diff",
+            "timestamp": datetime.now().isoformat(),
+            "seq": self.seq,
+            "changed": [dict(self.calls[call_id]) for call_id in self.dirty if call_id in self.calls],
+            "removed": list(self.removed)
+        }
+        self.dirty.clear()
+        self.removed.clear()
+        return diff
+
+    async def _run(self):
+        while len(self.connections):
+            await asyncio.sleep(self.interval)
+            diff = self.tick()
+            if diff:
+                self.ticks += 1
+                self.connections.broadcast(diff)
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+        await self.connections.close_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_calls": len(self.calls),
+            "expired_calls": self.expired,
+            "subscribers": len(self.connections),
+            "events": self.events,
+            "diffs_sent": self.ticks,
+            "tick_interval_ms": round(self.interval * 1000, 1)
+        }
+
+# Snapshot subscribers get their own connection pool, limits and heartbeats
+snapshot_connections = ConnectionManager(
+    max_connections=settings.MONITOR_MAX_CONNECTIONS,
+    ping_interval=settings.MONITOR_PING_INTERVAL_SECONDS,
+    idle_timeout=settings.MONITOR_IDLE_TIMEOUT_SECONDS,
+    max_queued_bytes=settings.MONITOR_SEND_QUEUE_BYTES,
+    send_timeout=settings.MONITOR_SEND_TIMEOUT_SECONDS
+)
+
+# Global aggregator for the dashboard call grid
+call_snapshots = CallSnapshotAggregator(
+    snapshot_connections,
+    hz=settings.MONITOR_SNAPSHOT_HZ,
+    retention_seconds=settings.MONITOR_SNAPSHOT_RETENTION_SECONDS,
+    idle_seconds=settings.MONITOR_SNAPSHOT_IDLE_SECONDS,
+    max_calls=settings.MONITOR_SNAPSHOT_MAX_CALLS
+)
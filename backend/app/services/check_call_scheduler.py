@@ -0,0 +1,244 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import asyncio
+import heapq
+import itertools
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.tracing import span, log
+from app.services.call_dialer import dial_call
+
+# Calls still in_progress after this long are assumed to have ended without a webhook
+MAX_CALL_MINUTES = 60
+CAPACITY_RETRY_SECONDS = 60
+
+def parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+class QuietHours:
+    """Local-time window (start hour to end hour, may wrap midnight) in which drivers are not called"""
+
+    def __init__(self, start_hour: int, end_hour: int, tz_name: str):
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.tz = ZoneInfo(tz_name)
+
+    def resume_at(self, moment: datetime) -> Optional[datetime]:
+        """End of the quiet window containing moment, or None when calls are allowed"""
+        if self.start_hour == self.end_hour:
+            return None
+        local = moment.astimezone(self.tz)
+        if self.start_hour < self.end_hour:
+            quiet = self.start_hour <= local.hour < self.end_hour
+        else:
+            quiet = local.hour >= self.start_hour or local.hour < self.end_hour
+        if not quiet:
+            return None
+        resume = local.replace(hour=self.end_hour, minute=0, second=0, microsecond=0)
+        if resume <= local:
+            resume += timedelta(days=1)
+        return resume.astimezone(timezone.utc)
+
+class CheckCallScheduler:
+    """
+    Fires recurring check-in calls for active loads
+    Due times live in a min-heap (O(log n) insert/pop) with lazy invalidation, and a
+    single task sleeps until the earliest one. Before dialing, a worker claims the run
+    by moving next_run_at with an update conditional on its old value, so concurrent
+    workers and restarts never dial the same run twice.
+    """
+
+    def __init__(self, max_concurrent_calls: int, quiet_hours: QuietHours, retry_minutes: int):
+        self.max_concurrent_calls = max_concurrent_calls
+        self.quiet_hours = quiet_hours
+        self.retry_minutes = retry_minutes
+        self.schedules: Dict[str, Dict[str, Any]] = {}
+        self.due: Dict[str, float] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dial_slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._firing: Set[asyncio.Task] = set()
+        self.fired = 0
+        self.deferred = 0
+        self.failed = 0
+
+    async def start(self):
+        """Reload active schedules from the database and start the timer task"""
+        self._wakeup = asyncio.Event()
+        self._dial_slots = asyncio.Semaphore(self.max_concurrent_calls)
+        try:
+            response = supabase.table("check_call_schedules").select("*").eq("active", True).execute()
+            for row in response.data or []:
+                self.add(row)
+            log(f"Check-call scheduler loaded {len(self.schedules)} active schedules")
+        except Exception as e:
+            log(f"Check-call scheduler could not load schedules: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._firing, return_exceptions=True)
+            self._task = None
+
+    def add(self, schedule: Dict[str, Any]):
+        """Track a schedule row (new or updated) at its next_run_at"""
+        self.schedules[schedule["id"]] = schedule
+        self._push(schedule["id"], parse_timestamp(schedule["next_run_at"]))
+
+    def remove(self, schedule_id: str):
+        self.schedules.pop(schedule_id, None)
+        self.due.pop(schedule_id, None)
+
+    def _push(self, schedule_id: str, run_at: datetime):
+        due = run_at.timestamp()
+        self.due[schedule_id] = due
+        heapq.heappush(self._heap, (due, next(self._sequence), schedule_id))
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            now = datetime.now(timezone.utc).timestamp()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, schedule_id = heapq.heappop(self._heap)
+                # Entries superseded by a reschedule or removal are dropped here
+                if self.due.get(schedule_id) != due:
+                    continue
+                del self.due[schedule_id]
+                task = loop.create_task(self._fire(schedule_id))
+                self._firing.add(task)
+                task.add_done_callback(self._firing.discard)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _active_call_count(self) -> int:
+        cutoff = (datetime.now(timezone.utc) - timedelta(minutes=MAX_CALL_MINUTES)).isoformat()
+        response = supabase.table("calls").select("id", count="exact").eq("status", "in_progress").gte("updated_at", cutoff).limit(1).execute()
+        return response.count or 0
+
+    async def _fire(self, schedule_id: str):
+        schedule = self.schedules.get(schedule_id)
+        if schedule is None:
+            return
+        now = datetime.now(timezone.utc)
+
+        resume_at = self.quiet_hours.resume_at(now)
+        if resume_at:
+            if self._claim(schedule, resume_at):
+                self.deferred += 1
+            return
+
+        async with self._dial_slots:
+            with span("scheduler.check_call", schedule_id=schedule_id, load_number=schedule["load_number"]):
+                call_id = None
+                try:
+                    if self._active_call_count() >= self.max_concurrent_calls:
+                        if self._claim(schedule, now + timedelta(seconds=CAPACITY_RETRY_SECONDS)):
+                            self.deferred += 1
+                        return
+
+                    # Only the worker whose claim moves next_run_at dials; the others resync and skip
+                    if not self._claim(schedule, now + timedelta(minutes=schedule["interval_minutes"]), {"last_run_at": now.isoformat()}):
+                        return
+                    call = supabase.table("calls").insert({
+                        "agent_configuration_id": schedule["agent_configuration_id"],
+                        "driver_name": schedule["driver_name"],
+                        "driver_phone": schedule["driver_phone"],
+                        "load_number": schedule["load_number"],
+                        "notes": "Scheduled check call"
+                    }).execute().data[0]
+                    call_id = call["id"]
+                    await dial_call(call_id)
+                    supabase.table("check_call_schedules").update({
+                        "last_call_id": call_id,
+                        "last_error": None
+                    }).eq("id", schedule_id).execute()
+                    self.fired += 1
+                    log(f"Scheduled check call placed for load {schedule['load_number']}: {call_id}")
+                except Exception as e:
+                    self.failed += 1
+                    log(f"Scheduled check call failed for load {schedule['load_number']}: {e}")
+                    if call_id:
+                        self._mark_call_failed(call_id, e)
+                    self._claim(schedule, now + timedelta(minutes=self.retry_minutes), {"last_error": str(e)})
+
+    def _claim(self, schedule: Dict[str, Any], run_at: datetime, extra: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Move an active schedule from the next_run_at this worker knows to run_at
+        Every worker runs its own timer, so the update is conditional on next_run_at:
+        exactly one worker wins each run. A lost claim (another worker, or a schedule
+        cancelled elsewhere) resyncs the local copy from the database instead.
+        """
+        update = {"next_run_at": run_at.isoformat(), **(extra or {})}
+        try:
+            response = supabase.table("check_call_schedules").update(update).eq("id", schedule["id"]).eq("active", True).eq("next_run_at", schedule["next_run_at"]).execute()
+        except Exception as e:
+            log(f"Could not claim schedule {schedule['id']}: {e}")
+            if schedule["id"] in self.schedules:
+                self._push(schedule["id"], datetime.now(timezone.utc) + timedelta(minutes=self.retry_minutes))
+            return False
+        if not response.data:
+            self._resync(schedule["id"])
+            return False
+        schedule.update(response.data[0])
+        if schedule["id"] in self.schedules:
+            self._push(schedule["id"], run_at)
+        return True
+
+    def _resync(self, schedule_id: str):
+        try:
+            response = supabase.table("check_call_schedules").select("*").eq("id", schedule_id).eq("active", True).execute()
+        except Exception as e:
+            log(f"Could not reload schedule {schedule_id}: {e}")
+            self._push(schedule_id, datetime.now(timezone.utc) + timedelta(minutes=self.retry_minutes))
+            return
+        if response.data:
+            self.add(response.data[0])
+        else:
+            self.remove(schedule_id)
+
+    def _mark_call_failed(self, call_id: str, error: Exception):
+        """A call row inserted for a dial that failed would otherwise stay pending forever"""
+        try:
+            supabase.table("calls").update({
+                "status": "failed",
+                "notes": f"Scheduled check call failed: {error}"
+            }).eq("id", call_id).eq("status", "pending").execute()
+        except Exception as e:
+            log(f"Could not mark call {call_id} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        next_due = min(self.due.values()) if self.due else None
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "active_schedules": len(self.schedules),
+            "next_due_at": datetime.fromtimestamp(next_due, timezone.utc).isoformat() if next_due else None,
+            "firing": len(self._firing),
+            "fired": self.fired,
+            "deferred": self.deferred,
+            "failed": self.failed
+        }
+
+# Global scheduler instance, started with the application
+check_call_scheduler = CheckCallScheduler(
+    max_concurrent_calls=settings.CHECK_CALL_MAX_CONCURRENT_CALLS,
+    quiet_hours=QuietHours(
+        settings.CHECK_CALL_QUIET_HOURS_START,
+        settings.CHECK_CALL_QUIET_HOURS_END,
+        settings.CHECK_CALL_TIMEZONE
+    ),
+    retry_minutes=settings.CHECK_CALL_RETRY_MINUTES
+)
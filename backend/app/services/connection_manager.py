@@ -0,0 +1,274 @@
+from typing import Dict, Any, Optional, Set, FrozenSet, Callable
+from collections import deque, OrderedDict
+from datetime import datetime
+import asyncio
+import time
+from fastapi import WebSocket
+from app.core.config import settings
+from app.services.monitor_protocol import MonitorProtocol, TranscriptDeltaTracker, Payload, encode
+
+# Calls per connection for which transcript keys already received are remembered (delta mode)
+MAX_DELTA_CALLS_PER_CONNECTION = 256
+
+# WebSocket close codes
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_GOING_AWAY = 1001
+
+class MonitorConnection:
+    """
+    One dashboard connection with its own send queue and writer task
+    Broadcasts only append to the queue, so a slow or half-open client never
+    stalls fan-out to the others; queued bytes are accounted per connection.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queued_bytes: int, protocol: MonitorProtocol):
+        self.websocket = websocket
+        self.max_queued_bytes = max_queued_bytes
+        self.protocol = protocol
+        # call_id -> transcript keys this client holds a full value for
+        self.transcript_keys: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self.queue: deque = deque()
+        self.queued_bytes = 0
+        # (payload, on_sent) pairs written before anything in queue, outside the byte budget
+        self.urgent: deque = deque()
+        self.last_seen = time.monotonic()
+        self.connected_at = time.monotonic()
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self.writer: Optional[asyncio.Task] = None
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def encode(self, message: Dict[str, Any]) -> Payload:
+        return encode(message, self.protocol.encoding)
+
+    def received_transcripts(self, call_id: str, keys: FrozenSet[str]):
+        if not keys:
+            return
+        self.transcript_keys[call_id] = self.transcript_keys.get(call_id, frozenset()) | keys
+        self.transcript_keys.move_to_end(call_id)
+        while len(self.transcript_keys) > MAX_DELTA_CALLS_PER_CONNECTION:
+            self.transcript_keys.popitem(last=False)
+
+    def enqueue(self, text: Payload) -> bool:
+        """Queue a message without waiting; False when the client is too far behind"""
+        if self.closed:
+            return False
+        if self.queued_bytes + len(text) > self.max_queued_bytes and self.queue:
+            return False
+        self.queue.append(text)
+        self.queued_bytes += len(text)
+        self._drained.clear()
+        self._ready.set()
+        return True
+
+    def enqueue_urgent(self, text: Payload, on_sent: Optional[Callable[["MonitorConnection"], None]] = None) -> bool:
+        """Queue a message ahead of all regular traffic; on_sent runs once it is written to the socket"""
+        if self.closed:
+            return False
+        self.urgent.append((text, on_sent))
+        self._drained.clear()
+        self._ready.set()
+        return True
+
+    async def send(self, text: Payload):
+        """Queue a message, waiting for the queue to drain first if it is over budget"""
+        while not self.closed and self.queue and self.queued_bytes + len(text) > self.max_queued_bytes:
+            await self._drained.wait()
+        self.enqueue(text)
+
+    async def run_writer(self, send_timeout: float, on_failure):
+        try:
+            while not self.closed:
+                if self.urgent:
+                    text, on_sent = self.urgent.popleft()
+                    await self._write(text, send_timeout)
+                    if on_sent:
+                        on_sent(self)
+                    continue
+                if not self.queue:
+                    self._drained.set()
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                text = self.queue.popleft()
+                self.queued_bytes -= len(text)
+                await self._write(text, send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await on_failure(self, CLOSE_GOING_AWAY)
+
+    async def _write(self, text: Payload, send_timeout: float):
+        if isinstance(text, bytes):
+            await asyncio.wait_for(self.websocket.send_bytes(text), send_timeout)
+        else:
+            await asyncio.wait_for(self.websocket.send_text(text), send_timeout)
+        self.sent_messages += 1
+        self.sent_bytes += len(text)
+
+class ConnectionManager:
+    """
+    Registry of monitor WebSocket connections
+    Enforces a connection limit, pings idle clients and reaps the ones that stop
+    answering, and disconnects clients whose send queue exceeds its byte budget.
+    """
+
+    def __init__(self, max_connections: int, ping_interval: float, idle_timeout: float,
+                 max_queued_bytes: int, send_timeout: float, max_tracked_calls: int = 200):
+        self.max_connections = max_connections
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.max_queued_bytes = max_queued_bytes
+        self.send_timeout = send_timeout
+        self.connections: Set[MonitorConnection] = set()
+        self.transcripts = TranscriptDeltaTracker(max_tracked_calls)
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Disconnects started by broadcast(); referenced so they run to completion
+        self._disconnecting: Set[asyncio.Task] = set()
+        self.rejected = 0
+        self.reaped = 0
+        self.slow_consumers = 0
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    async def connect(self, websocket: WebSocket) -> Optional[MonitorConnection]:
+        """
+        Accept a client, or close it right away when the server is at capacity or
+        the requested protocol (?encoding=json|msgpack&transcript=full|delta) is unknown
+        """
+        if len(self.connections) >= self.max_connections:
+            self.rejected += 1
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+            return None
+        try:
+            protocol = MonitorProtocol.from_query(websocket.query_params)
+        except ValueError:
+            self.rejected += 1
+            await websocket.close(code=CLOSE_POLICY_VIOLATION)
+            return None
+        await websocket.accept()
+        connection = MonitorConnection(websocket, self.max_queued_bytes, protocol)
+        connection.writer = asyncio.create_task(connection.run_writer(self.send_timeout, self.disconnect))
+        self.connections.add(connection)
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        return connection
+
+    async def disconnect(self, connection: MonitorConnection, code: Optional[int] = None):
+        if connection.closed:
+            return
+        connection.closed = True
+        connection._drained.set()
+        self.connections.discard(connection)
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        if code is not None:
+            try:
+                await asyncio.wait_for(connection.websocket.close(code=code), self.send_timeout)
+            except Exception:
+                pass
+
+    def broadcast(self, message: Dict[str, Any], call_id: Optional[str] = None, json_text: Optional[str] = None) -> int:
+        """
+        Queue message for every client in the encoding it negotiated
+        Each distinct (encoding, delta keys) variant is encoded once per broadcast, not per client.
+        Returns how many clients were dropped as slow consumers.
+        """
+        previous, transcript_keys = self.transcripts.advance(call_id, message) if call_id else ({}, frozenset())
+        payloads: Dict[Any, Payload] = {}
+        dropped = []
+
+        for connection in self.connections:
+            delta_keys: FrozenSet[str] = frozenset()
+            if previous and connection.protocol.transcript_mode == "delta":
+                delta_keys = connection.transcript_keys.get(call_id, frozenset())
+            variant = (connection.protocol.encoding, delta_keys)
+            payload = payloads.get(variant)
+            if payload is None:
+                if delta_keys:
+                    body = TranscriptDeltaTracker.with_deltas(
+                        message, {path: value for path, value in previous.items() if path[-1] in delta_keys}
+                    )
+                    payload = connection.encode(body)
+                elif json_text is not None and connection.protocol.encoding == "json":
+                    payload = json_text
+                else:
+                    payload = connection.encode(message)
+                payloads[variant] = payload
+
+            if not connection.enqueue(payload):
+                dropped.append(connection)
+            elif call_id and connection.protocol.transcript_mode == "delta":
+                connection.received_transcripts(call_id, transcript_keys)
+
+        for connection in dropped:
+            self.slow_consumers += 1
+            task = asyncio.create_task(self.disconnect(connection, CLOSE_POLICY_VIOLATION))
+            self._disconnecting.add(task)
+            task.add_done_callback(self._disconnecting.discard)
+        return len(dropped)
+
+    def broadcast_urgent(self, message: Dict[str, Any], on_sent: Optional[Callable[[MonitorConnection], None]] = None) -> int:
+        """Queue message ahead of everything already waiting for every client; returns how many were queued"""
+        payloads: Dict[str, Payload] = {}
+        queued = 0
+        for connection in self.connections:
+            encoding = connection.protocol.encoding
+            if encoding not in payloads:
+                payloads[encoding] = connection.encode(message)
+            if connection.enqueue_urgent(payloads[encoding], on_sent):
+                queued += 1
+        return queued
+
+    async def _run_heartbeat(self):
+        while self.connections:
+            await asyncio.sleep(self.ping_interval)
+            now = time.monotonic()
+            ping = {"type": "ping", "timestamp": datetime.now().isoformat()}
+            for connection in list(self.connections):
+                if now - connection.last_seen > self.idle_timeout:
+                    self.reaped += 1
+                    await self.disconnect(connection, CLOSE_GOING_AWAY)
+                elif now - connection.last_seen >= self.ping_interval:
+                    connection.enqueue(connection.encode(ping))
+
+    async def close_all(self):
+        for connection in list(self.connections):
+            await self.disconnect(connection, CLOSE_GOING_AWAY)
+        await asyncio.gather(*self._disconnecting, return_exceptions=True)
+        if self._heartbeat:
+            self._heartbeat.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        protocols: Dict[str, int] = {}
+        for connection in self.connections:
+            name = f"{connection.protocol.encoding}/{connection.protocol.transcript_mode}"
+            protocols[name] = protocols.get(name, 0) + 1
+        return {
+            "connections": len(self.connections),
+            "protocols": protocols,
+            "max_connections": self.max_connections,
+            "queued_bytes": sum(connection.queued_bytes for connection in self.connections),
+            "max_queued_bytes_per_connection": self.max_queued_bytes,
+            "rejected": self.rejected,
+            "reaped_idle": self.reaped,
+            "dropped_slow_consumers": self.slow_consumers
+        }
+
+# Global manager for conversation monitor clients
+monitor_connections = ConnectionManager(
+    max_connections=settings.MONITOR_MAX_CONNECTIONS,
+    ping_interval=settings.MONITOR_PING_INTERVAL_SECONDS,
+    idle_timeout=settings.MONITOR_IDLE_TIMEOUT_SECONDS,
+    max_queued_bytes=settings.MONITOR_SEND_QUEUE_BYTES,
+    send_timeout=settings.MONITOR_SEND_TIMEOUT_SECONDS,
+    max_tracked_calls=settings.MONITOR_REPLAY_MAX_CALLS
+)
@@ -1,7 +1,12 @@
 from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
 from enum import Enum
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from app.core.config import settings
+from app.services.session_store import session_store
+from app.services.information_extractor import information_extractor
+from app.services.conversation_flows import FlowRegistry, FLOW_DEFINITIONS, SCENARIO_ALIASES
 
 class ConversationState(Enum):
     """Conversation states for tracking flow"""
@@ -14,6 +19,9 @@ class ConversationState(Enum):
     CLOSING = "closing"
     ESCALATION = "escalation"
 
+# Scenario flows compiled to transition tables, shared by all engine instances
+flow_registry = FlowRegistry(FLOW_DEFINITIONS, SCENARIO_ALIASES, frozenset(state.value for state in ConversationState))
+
 class DriverCooperationLevel(Enum):
     """Driver cooperation assessment"""
     COOPERATIVE = "cooperative"
@@ -33,6 +41,83 @@ class ConversationContext:
     retry_count: int
     unclear_responses: int
 
+    def to_snapshot(self) -> Dict[str, Any]:
+        """Serialize context into a compact, JSON-safe snapshot"""
+        return {
+            "s": self.state.value,
+            "d": self.driver_name,
+            "l": self.load_number,
+            "c": self.cooperation_level.value,
+            "i": self.information_gathered,
+            "e": self.emergency_detected,
+            "r": self.retry_count,
+            "u": self.unclear_responses
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> "ConversationContext":
+        """Rebuild context from a snapshot produced by to_snapshot()"""
+        return cls(
+            state=ConversationState(snapshot["s"]),
+            driver_name=snapshot.get("d", ""),
+            load_number=snapshot.get("l", ""),
+            cooperation_level=DriverCooperationLevel(snapshot["c"]),
+            information_gathered=dict(snapshot.get("i") or {}),
+            emergency_detected=bool(snapshot.get("e", False)),
+            retry_count=int(snapshot.get("r", 0)),
+            unclear_responses=int(snapshot.get("u", 0))
+        )
+
+@dataclass(frozen=True)
+class TurnAnalysis:
+    """Outcome of analyzing one utterance in a given state, independent of driver and load"""
+    next_state: ConversationState
+    emergency_type: Optional[str] = None
+    cooperation_level: Optional[DriverCooperationLevel] = None
+    unclear: bool = False
+    noisy: bool = False
+    retried: bool = False
+    extracted_info: Dict[str, Any] = field(default_factory=dict)
+
+class AnalysisCache:
+    """Bounded LRU of turn analyses with hit/miss counters"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple, TurnAnalysis]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[TurnAnalysis]:
+        analysis = self.entries.get(key)
+        if analysis is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return analysis
+
+    def put(self, key: Tuple, analysis: TurnAnalysis):
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = analysis
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Shared by all engine instances; entries are keyed by compiled flow so agents never mix
+analysis_cache = AnalysisCache(settings.ANALYSIS_CACHE_SIZE)
+
 class ConversationEngine:
     """
     Intelligent conversation engine for dynamic response guidance
@@ -45,6 +130,7 @@ class ConversationEngine:
     def __init__(self, agent_config: Dict[str, Any]):
         self.agent_config = agent_config
         self.scenario = agent_config.get("scenario", "driver_checkin")
+        self.flow = flow_registry.for_agent(agent_config)
         self.max_retries = 3
         self.max_unclear_responses = 2
         
@@ -86,39 +172,81 @@ class ConversationEngine:
         """
         Analyze user input and update conversation context
         Returns updated context and response guidance
+        
+        The analysis only depends on the flow, the current state, the retry/unclear
+        counters and the utterance, so repeated phrases are served from the cache. The key
+        keeps the utterance's case: extraction relies on it ("US 60", "OR", "Mobile").
         """
+        user_input = user_input.strip()
+        key = (
+            self.flow,
+            context.state,
+            min(context.retry_count, self.max_retries),
+            min(context.unclear_responses, self.max_unclear_responses),
+            user_input
+        )
+        analysis = analysis_cache.get(key)
+        if analysis is None:
+            analysis = self._analyze(user_input, context)
+            analysis_cache.put(key, analysis)
+        return self._apply_analysis(analysis, context)
+
+    def _analyze(self, user_input: str, context: ConversationContext) -> "TurnAnalysis":
+        """Run the regex stages for one utterance without touching the context"""
         # Clean and normalize input
         normalized_input = user_input.lower().strip()
         
         # Check for emergency triggers first (highest priority)
-        emergency_type = self._detect_emergency(normalized_input)
+        emergency_type = self.detect_emergency(normalized_input)
         if emergency_type:
-            context.emergency_detected = True
-            context.state = ConversationState.EMERGENCY_PROTOCOL
-            return context, self._generate_emergency_response(emergency_type, context)
+            return TurnAnalysis(emergency_type=emergency_type, next_state=ConversationState.EMERGENCY_PROTOCOL)
         
         # Assess cooperation level
-        context.cooperation_level = self._assess_cooperation(normalized_input)
+        cooperation_level = self.assess_cooperation(normalized_input)
         
         # Check for unclear/garbled speech
-        if self._is_unclear_response(user_input):
-            context.unclear_responses += 1
-            if context.unclear_responses >= self.max_unclear_responses:
-                return context, self._handle_noisy_environment(context)
+        unclear = self._is_unclear_response(user_input)
+        if unclear and context.unclear_responses + 1 >= self.max_unclear_responses:
+            return TurnAnalysis(cooperation_level=cooperation_level, unclear=True, noisy=True, next_state=context.state)
         
         # Extract information based on current state
-        extracted_info = self._extract_information(normalized_input, context.state)
-        context.information_gathered.update(extracted_info)
+        extracted_info = self._extract_information(user_input, context.state)
+        
+        # Determine next state
+        retried = cooperation_level == DriverCooperationLevel.UNCOOPERATIVE
+        next_state = self._determine_next_state(context, cooperation_level, extracted_info)
+        
+        return TurnAnalysis(
+            cooperation_level=cooperation_level,
+            unclear=unclear,
+            retried=retried,
+            extracted_info=extracted_info,
+            next_state=next_state
+        )
+
+    def _apply_analysis(self, analysis: "TurnAnalysis", context: ConversationContext) -> Tuple[ConversationContext, Dict[str, Any]]:
+        """Update the context with an analysis and render its guidance for this driver"""
+        if analysis.emergency_type:
+            context.emergency_detected = True
+            context.state = analysis.next_state
+            return context, self._generate_emergency_response(analysis.emergency_type, context)
         
-        # Determine next state and response
-        next_state = self._determine_next_state(context, extracted_info)
-        context.state = next_state
+        context.cooperation_level = analysis.cooperation_level
+        if analysis.unclear:
+            context.unclear_responses += 1
+        if analysis.noisy:
+            return context, self._handle_noisy_environment(context)
+        
+        context.information_gathered.update(analysis.extracted_info)
+        if analysis.retried:
+            context.retry_count += 1
+        context.state = analysis.next_state
         
-        response_guidance = self._generate_response_guidance(context, extracted_info)
+        response_guidance = self._generate_response_guidance(context, analysis.extracted_info)
         
         return context, response_guidance
 
-    def _detect_emergency(self, user_input: str) -> Optional[str]:
+    def detect_emergency(self, user_input: str) -> Optional[str]:
         """Detect emergency triggers in user speech"""
         for emergency_type, patterns in self.emergency_patterns.items():
             for pattern in patterns:
@@ -126,7 +254,7 @@ class ConversationEngine:
                     return emergency_type
         return None
 
-    def _assess_cooperation(self, user_input: str) -> DriverCooperationLevel:
+    def assess_cooperation(self, user_input: str) -> DriverCooperationLevel:
         """Assess driver cooperation level"""
         # Check for hostile/negative indicators first
         for pattern in self.cooperation_indicators["negative"]:
@@ -157,155 +285,27 @@ class ConversationEngine:
         return any(unclear_indicators)
 
     def _extract_information(self, user_input: str, current_state: ConversationState) -> Dict[str, Any]:
-        """Extract relevant information based on conversation state"""
-        extracted = {}
-        
-        # Location patterns
-        location_patterns = [
-            r"(i-\d+|us-\d+|highway\s+\d+|route\s+\d+)",
-            r"mile\s+marker\s+\d+",
-            r"(\w+,\s+\w{2}|\w+\s+\w+,\s+\w{2})",  # City, State
-            r"(dock\s+\d+|door\s+\d+|bay\s+\d+)"
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, user_input, re.IGNORECASE)
-            if match:
-                extracted["location"] = match.group()
-                break
-        
-        # Status indicators
-        status_keywords = {
-            "arrived": ["arrived", "here", "at the", "made it"],
-            "driving": ["driving", "on the road", "en route", "heading", "on my way"],
-            "delayed": ["delayed", "running late", "behind", "stuck", "traffic"],
-            "unloading": ["unloading", "unload", "dock", "backing up", "delivery"]
-        }
-        
-        for status, keywords in status_keywords.items():
-            if any(keyword in user_input for keyword in keywords):
-                extracted["driver_status"] = status
-                break
-        
-        # Time-related information
-        time_patterns = [
-            r"(\d{1,2}:\d{2})",  # Time format
-            r"(\d+)\s+(minutes?|hours?)",  # Duration
-            r"(tomorrow|today|tonight|morning|afternoon|evening)"
-        ]
-        
-        for pattern in time_patterns:
-            match = re.search(pattern, user_input, re.IGNORECASE)
-            if match:
-                extracted["timing_info"] = match.group()
-                break
-        
-        return extracted
+        """Extract relevant information (location, status, timing) in a single pass"""
+        return information_extractor.extract(user_input).to_dict()
 
-    def _determine_next_state(self, context: ConversationContext, extracted_info: Dict[str, Any]) -> ConversationState:
+    def _determine_next_state(self, context: ConversationContext, cooperation_level: DriverCooperationLevel, extracted_info: Dict[str, Any]) -> ConversationState:
         """Determine next conversation state based on context and extracted info"""
-        current_state = context.state
-        
         # Handle uncooperative drivers
-        if context.cooperation_level == DriverCooperationLevel.UNCOOPERATIVE:
-            context.retry_count += 1
-            if context.retry_count >= self.max_retries:
+        if cooperation_level == DriverCooperationLevel.UNCOOPERATIVE:
+            if context.retry_count + 1 >= self.max_retries:
                 return ConversationState.ESCALATION
         
-        # State transitions for driver check-in scenario
-        if self.scenario == "driver_checkin":
-            if current_state == ConversationState.OPENING:
-                return ConversationState.GATHERING_STATUS
-            
-            elif current_state == ConversationState.GATHERING_STATUS:
-                if "driver_status" in extracted_info:
-                    if extracted_info["driver_status"] in ["arrived", "unloading"]:
-                        return ConversationState.CLOSING
-                    else:
-                        return ConversationState.LOCATION_UPDATE
-                return ConversationState.GATHERING_STATUS  # Stay and retry
-            
-            elif current_state == ConversationState.LOCATION_UPDATE:
-                if "location" in extracted_info:
-                    return ConversationState.ETA_CONFIRMATION
-                return ConversationState.LOCATION_UPDATE  # Stay and retry
-            
-            elif current_state == ConversationState.ETA_CONFIRMATION:
-                if "timing_info" in extracted_info:
-                    return ConversationState.CLOSING
-                return ConversationState.ETA_CONFIRMATION  # Stay and retry
-        
-        return current_state
+        # Scenario-specific transitions come from the compiled flow table
+        return ConversationState(self.flow.next_state(context.state.value, extracted_info))
 
     def _generate_response_guidance(self, context: ConversationContext, extracted_info: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate response guidance based on context and state"""
-        driver_name = context.driver_name
-        load_number = context.load_number
-        state = context.state
-        
-        if state == ConversationState.OPENING:
-            return {
-                "message": f"Hi {driver_name}, this is dispatch with a check call on load {load_number}. Can you give me an update on your status?",
-                "state": "opening",
-                "follow_ups": ["What's your current status?", "Where are you right now?"],
-                "priority": "normal"
-            }
-        
-        elif state == ConversationState.GATHERING_STATUS:
-            if context.cooperation_level == DriverCooperationLevel.UNCOOPERATIVE:
-                return {
-                    "message": f"I understand you might be busy {driver_name}, but I need a quick status update on load {load_number}. Are you driving, arrived, or delayed?",
-                    "state": "gathering_status_retry",
-                    "follow_ups": ["Just need to know if you're driving or arrived"],
-                    "priority": "high"
-                }
-            else:
-                return {
-                    "message": "Thank you. Can you tell me your current location and status?",
-                    "state": "gathering_status",
-                    "follow_ups": ["Where are you currently?", "Are you driving or have you arrived?"],
-                    "priority": "normal"
-                }
-        
-        elif state == ConversationState.LOCATION_UPDATE:
-            return {
-                "message": "What's your current location? Are you on the highway or at the destination?",
-                "state": "location_update",
-                "follow_ups": ["Which highway or mile marker?", "Are you at the pickup or delivery location?"],
-                "priority": "normal"
-            }
-        
-        elif state == ConversationState.ETA_CONFIRMATION:
-            return {
-                "message": "Great! What's your estimated time of arrival or completion?",
-                "state": "eta_confirmation",
-                "follow_ups": ["How much longer do you think?", "When should we expect completion?"],
-                "priority": "normal"
-            }
-        
-        elif state == ConversationState.CLOSING:
-            return {
-                "message": f"Perfect! Thanks for the update {driver_name}. Drive safely and call if you need anything.",
-                "state": "closing",
-                "follow_ups": [],
-                "priority": "normal"
-            }
-        
-        elif state == ConversationState.ESCALATION:
-            return {
-                "message": f"{driver_name}, I'm going to connect you with a human dispatcher who can better assist you. Please hold on.",
-                "state": "escalation",
-                "follow_ups": [],
-                "priority": "high"
-            }
-        
-        # Default fallback
-        return {
-            "message": "I understand. Can you provide more details about your current situation?",
-            "state": "gathering_info",
-            "follow_ups": ["What's your current status?"],
-            "priority": "normal"
-        }
+        """Generate response guidance from the flow's pre-built template for the current state"""
+        return self.flow.render(
+            context.state.value,
+            context.cooperation_level.value,
+            context.driver_name,
+            context.load_number
+        )
 
     def _generate_emergency_response(self, emergency_type: str, context: ConversationContext) -> Dict[str, Any]:
         """Generate appropriate emergency response"""
@@ -344,7 +344,7 @@ class ConversationEngine:
     def get_initial_context(self, driver_name: str, load_number: str) -> ConversationContext:
         """Initialize conversation context"""
         return ConversationContext(
-            state=ConversationState.OPENING,
+            state=ConversationState(self.flow.initial_state),
             driver_name=driver_name,
             load_number=load_number,
             cooperation_level=DriverCooperationLevel.NEUTRAL,
@@ -361,19 +361,77 @@ class ConversationEngine:
                          load_number: str) -> Dict[str, Any]:
         """
         Main interface method for getting next response guidance
-        Used by webhook for real-time conversation guidance
+        Stateless: without a call the state is inferred from the history alone,
+        live calls go through get_call_response
         """
-        # Initialize or retrieve conversation context
-        # In a real implementation, this would be stored in database/cache
         context = self.get_initial_context(driver_name, load_number)
         
         # If we have conversation history, determine current state
         if conversation_history:
-            # Analyze the conversation flow to determine current state
-            # This is a simplified version - in reality would be more sophisticated
+            # Without a session we cannot know the exact state, assume status gathering
             context.state = ConversationState.GATHERING_STATUS
         
         # Analyze the user input and get response guidance
         updated_context, response_guidance = self.analyze_user_input(last_user_input, context)
         
         return response_guidance
+
+    async def get_call_response(self,
+                                call_id: str,
+                                conversation_history: List[Dict[str, str]],
+                                last_user_input: str,
+                                driver_name: str,
+                                load_number: str) -> Dict[str, Any]:
+        """
+        Response guidance for a live call, used by the webhook
+        The context is restored from the shared session store, only the history delta
+        since the last snapshot is replayed, and a new snapshot is saved
+        """
+        history = conversation_history or []
+        snapshot = await session_store.load(call_id)
+        
+        if snapshot:
+            context = ConversationContext.from_snapshot(snapshot.context)
+            replay_from = min(snapshot.history_length, len(history))
+            skip_input = snapshot.last_user_input
+        else:
+            context = self.get_initial_context(driver_name, load_number)
+            replay_from = 0
+            skip_input = None
+        
+        # The current input is normally the last user turn of the history - analyze it once
+        delta = history[replay_from:]
+        if delta and _is_user_turn(delta[-1]) and _turn_text(delta[-1]) == last_user_input.strip():
+            delta = delta[:-1]
+        
+        for turn in delta:
+            if not _is_user_turn(turn):
+                continue
+            text = _turn_text(turn)
+            if skip_input is not None and text == skip_input:
+                # Already analyzed as last_user_input before it landed in the history
+                skip_input = None
+                continue
+            skip_input = None
+            if text:
+                context, _ = self.analyze_user_input(text, context)
+        
+        context, response_guidance = self.analyze_user_input(last_user_input, context)
+        
+        await session_store.save(
+            call_id,
+            context.to_snapshot(),
+            history_length=len(history),
+            last_user_input=last_user_input.strip(),
+            expected_version=snapshot.version if snapshot else None
+        )
+        
+        return response_guidance
+
+
+def _is_user_turn(turn: Dict[str, Any]) -> bool:
+    return isinstance(turn, dict) and turn.get("role") == "user"
+
+
+def _turn_text(turn: Dict[str, Any]) -> str:
+    return (turn.get("content") or "").strip()
@@ -0,0 +1,193 @@
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
+from app.core.tracing import log
+
+# Declarative scenario definitions. Each state has a response template (optionally a
+# variant per driver cooperation level) and ordered transitions; a transition fires
+# when the extracted field is present (and, with "in", has one of the listed values).
+# A transition without a field always fires. States must be ConversationState values.
+DRIVER_CHECKIN_FLOW: Dict[str, Any] = {
+    "initial_state": "opening",
+    "states": {
+        "opening": {
+            "template": {
+                "message": "Hi {driver_name}, this is dispatch with a check call on load {load_number}. Can you give me an update on your status?",
+                "follow_ups": ["What's your current status?", "Where are you right now?"]
+            },
+            "transitions": [{"to": "gathering_status"}]
+        },
+        "gathering_status": {
+            "template": {
+                "message": "Thank you. Can you tell me your current location and status?",
+                "follow_ups": ["Where are you currently?", "Are you driving or have you arrived?"]
+            },
+            "variants": {
+                "uncooperative": {
+                    "message": "I understand you might be busy {driver_name}, but I need a quick status update on load {load_number}. Are you driving, arrived, or delayed?",
+                    "state": "gathering_status_retry",
+                    "follow_ups": ["Just need to know if you're driving or arrived"],
+                    "priority": "high"
+                }
+            },
+            "transitions": [
+                {"field": "driver_status", "in": ["arrived", "unloading"], "to": "closing"},
+                {"field": "driver_status", "to": "location_update"}
+            ]
+        },
+        "location_update": {
+            "template": {
+                "message": "What's your current location? Are you on the highway or at the destination?",
+                "follow_ups": ["Which highway or mile marker?", "Are you at the pickup or delivery location?"]
+            },
+            "transitions": [{"field": "location", "to": "eta_confirmation"}]
+        },
+        "eta_confirmation": {
+            "template": {
+                "message": "Great! What's your estimated time of arrival or completion?",
+                "follow_ups": ["How much longer do you think?", "When should we expect completion?"]
+            },
+            "transitions": [{"field": "timing_info", "to": "closing"}]
+        },
+        "closing": {
+            "template": {
+                "message": "Perfect! Thanks for the update {driver_name}. Drive safely and call if you need anything.",
+                "follow_ups": []
+            }
+        },
+        "escalation": {
+            "template": {
+                "message": "{driver_name}, I'm going to connect you with a human dispatcher who can better assist you. Please hold on.",
+                "follow_ups": [],
+                "priority": "high"
+            }
+        }
+    },
+    "fallback": {
+        "message": "I understand. Can you provide more details about your current situation?",
+        "state": "gathering_info",
+        "follow_ups": ["What's your current status?"]
+    }
+}
+
+FLOW_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    "driver_checkin": DRIVER_CHECKIN_FLOW
+}
+
+# agent_configurations.scenario values that share a flow
+SCENARIO_ALIASES = {
+    "logistics": "driver_checkin"
+}
+
+DEFAULT_SCENARIO = "driver_checkin"
+
+class ResponseTemplate:
+    """Response guidance with its static parts built once; only the message is formatted per turn"""
+
+    __slots__ = ("message", "needs_format", "state", "follow_ups", "priority")
+
+    def __init__(self, state: str, definition: Dict[str, Any]):
+        self.message = definition["message"]
+        self.needs_format = "{" in self.message
+        self.state = definition.get("state", state)
+        self.follow_ups = tuple(definition.get("follow_ups", ()))
+        self.priority = definition.get("priority", "normal")
+
+    def render(self, driver_name: str, load_number: str) -> Dict[str, Any]:
+        return {
+            "message": self.message.format(driver_name=driver_name, load_number=load_number) if self.needs_format else self.message,
+            "state": self.state,
+            "follow_ups": list(self.follow_ups),
+            "priority": self.priority
+        }
+
+# (field, accepted values or None for "present", target state)
+Transition = Tuple[Optional[str], Optional[FrozenSet[str]], str]
+
+class CompiledFlow:
+    """
+    Lookup-table state machine for one scenario
+    Transitions and templates are indexed by state, so a turn costs a dict lookup
+    plus the few rules of the current state, however many scenarios exist.
+    """
+
+    def __init__(self, name: str, definition: Dict[str, Any], valid_states: FrozenSet[str]):
+        self.name = name
+        self.initial_state = definition.get("initial_state", "opening")
+        self.transitions: Dict[str, List[Transition]] = {}
+        self.templates: Dict[str, ResponseTemplate] = {}
+        self.variants: Dict[Tuple[str, str], ResponseTemplate] = {}
+        self.fallback = ResponseTemplate("gathering_info", definition.get("fallback", DRIVER_CHECKIN_FLOW["fallback"]))
+        self._check_state(self.initial_state, valid_states)
+
+        for state, spec in definition["states"].items():
+            self._check_state(state, valid_states)
+            if "template" in spec:
+                self.templates[state] = ResponseTemplate(state, spec["template"])
+            for cooperation_level, variant in spec.get("variants", {}).items():
+                self.variants[(state, cooperation_level)] = ResponseTemplate(state, variant)
+            rules = []
+            for rule in spec.get("transitions", []):
+                self._check_state(rule["to"], valid_states)
+                accepted = frozenset(rule["in"]) if "in" in rule else None
+                rules.append((rule.get("field"), accepted, rule["to"]))
+            self.transitions[state] = rules
+
+    def _check_state(self, state: str, valid_states: FrozenSet[str]):
+        if state not in valid_states:
+            raise ValueError(f"Flow {self.name!r} uses unknown conversation state {state!r}")
+
+    def next_state(self, state: str, extracted_info: Dict[str, Any]) -> str:
+        for field, accepted, target in self.transitions.get(state, ()):
+            if field is None:
+                return target
+            if field in extracted_info and (accepted is None or extracted_info[field] in accepted):
+                return target
+        return state
+
+    def render(self, state: str, cooperation_level: str, driver_name: str, load_number: str) -> Dict[str, Any]:
+        template = self.variants.get((state, cooperation_level)) or self.templates.get(state) or self.fallback
+        return template.render(driver_name, load_number)
+
+class FlowRegistry:
+    """
+    Compiles scenario flows once and hands them out per agent
+    Built-in scenarios compile on first use; an agent carrying its own flow_definition
+    is compiled once per agent version (updated_at), replacing its previous version.
+    """
+
+    def __init__(self, definitions: Dict[str, Dict[str, Any]], aliases: Dict[str, str], valid_states: FrozenSet[str]):
+        self.definitions = definitions
+        self.aliases = aliases
+        self.valid_states = valid_states
+        self.compiled: Dict[str, CompiledFlow] = {}
+        # agent id -> (updated_at, flow); one entry per agent however often it is edited
+        self.agents: Dict[Any, Tuple[str, CompiledFlow]] = {}
+
+    def compile(self, name: str, definition: Dict[str, Any]) -> CompiledFlow:
+        """Compile a flow definition; raises AttributeError/KeyError/TypeError/ValueError when it is invalid"""
+        return CompiledFlow(name, definition, self.valid_states)
+
+    def for_agent(self, agent_config: Dict[str, Any]) -> CompiledFlow:
+        if agent_config.get("flow_definition"):
+            agent_id = agent_config.get("id")
+            version = str(agent_config.get("updated_at"))
+            cached = self.agents.get(agent_id)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            try:
+                flow = self.compile(str(agent_id), agent_config["flow_definition"])
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                log(f"Invalid flow definition for agent {agent_id}: {e}")
+                flow = self.for_scenario(agent_config.get("scenario"))
+            self.agents[agent_id] = (version, flow)
+            return flow
+        return self.for_scenario(agent_config.get("scenario"))
+
+    def for_scenario(self, scenario: Optional[str]) -> CompiledFlow:
+        name = self.aliases.get(scenario, scenario)
+        if name not in self.definitions:
+            name = DEFAULT_SCENARIO
+        flow = self.compiled.get(name)
+        if flow is None:
+            flow = self.compile(name, self.definitions[name])
+            self.compiled[name] = flow
+        return flow
@@ -0,0 +1,155 @@
+from typing import Dict, Any, Optional, List
+from collections import OrderedDict, deque
+from datetime import datetime
+import time
+import uuid
+from app.core.config import settings
+from app.core.tracing import log
+from app.services.connection_manager import ConnectionManager, MonitorConnection, monitor_connections
+
+class LatencyWindow:
+    """Most recent latency samples in milliseconds"""
+
+    def __init__(self, size: int = 1000):
+        self.samples: deque = deque(maxlen=size)
+
+    def add(self, ms: float):
+        self.samples.append(ms)
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        return {
+            "count": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 2),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            "max_ms": round(ordered[-1], 2)
+        }
+
+class EmergencyAlertChannel:
+    """
+    Priority delivery of emergency detections to dispatchers
+    Alerts go to the dedicated alert connections and, ahead of any queued transcript
+    traffic, to monitor connections. Raising is synchronous and never waits on a socket,
+    so it can be called right at detection time. Latency from detection to each live
+    socket write and to the first acknowledgment is recorded; replays of pending alerts
+    to dispatchers who connect later are only counted.
+    """
+
+    def __init__(self, connections: ConnectionManager, history: int):
+        self.connections = connections
+        self.history = history
+        self.alerts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.detected: Dict[str, float] = {}
+        self.delivery_latency = LatencyWindow()
+        self.ack_latency = LatencyWindow()
+        self.raised = 0
+        self.duplicates = 0
+        self.replayed = 0
+
+    def raise_alert(self, call_id: Optional[str], emergency_type: str, source: str,
+                    driver_name: Optional[str] = None, load_number: Optional[str] = None,
+                    utterance: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create and push an alert; an unacknowledged alert of the same type for the call is reused
+        Alerts without a call_id are never merged, they may come from unrelated calls.
+        """
+        detected = time.perf_counter()
+        if call_id is not None:
+            for alert in reversed(self.alerts.values()):
+                if alert["call_id"] == call_id and alert["emergency_type"] == emergency_type and not alert["acknowledged"]:
+                    self.duplicates += 1
+                    return alert
+
+        alert_id = uuid.uuid4().hex
+        alert = {
+            "type": "emergency_alert",
+            "alert_id": alert_id,
+            "call_id": call_id,
+            "emergency_type": emergency_type,
+            "source": source,
+            "driver_name": driver_name,
+            "load_number": load_number,
+            "utterance": utterance,
+            "detected_at": datetime.now().isoformat(),
+            "acknowledged": False,
+            "delivered": 0
+        }
+        self.alerts[alert_id] = alert
+        self.detected[alert_id] = detected
+        while len(self.alerts) > self.history:
+            expired, _ = self.alerts.popitem(last=False)
+            self.detected.pop(expired, None)
+        self.raised += 1
+
+        on_sent = lambda connection: self._delivered(alert_id)
+        self.connections.broadcast_urgent(alert, on_sent)
+        monitor_connections.broadcast_urgent(alert)
+        log(f"EMERGENCY alert {alert_id}: {emergency_type} on call {call_id} ({source})")
+        return alert
+
+    def _delivered(self, alert_id: str, replay: bool = False):
+        detected = self.detected.get(alert_id)
+        alert = self.alerts.get(alert_id)
+        if detected is None or alert is None:
+            return
+        # A replay's age is how long the dispatcher was away, not delivery latency
+        if replay:
+            self.replayed += 1
+        else:
+            self.delivery_latency.add((time.perf_counter() - detected) * 1000)
+        alert["delivered"] += 1
+
+    def acknowledge(self, alert_id: str, acknowledged_by: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Mark an alert handled and tell the other dispatchers; None for unknown alerts"""
+        alert = self.alerts.get(alert_id)
+        if alert is None or alert["acknowledged"]:
+            return alert
+        alert["acknowledged"] = True
+        alert["acknowledged_at"] = datetime.now().isoformat()
+        alert["acknowledged_by"] = acknowledged_by
+        self.ack_latency.add((time.perf_counter() - self.detected[alert_id]) * 1000)
+        self.connections.broadcast_urgent({
+            "type": "alert_acknowledged",
+            "alert_id": alert_id,
+            "call_id": alert["call_id"],
+            "acknowledged_by": acknowledged_by,
+            "acknowledged_at": alert["acknowledged_at"]
+        })
+        return alert
+
+    def pending(self) -> List[Dict[str, Any]]:
+        return [alert for alert in self.alerts.values() if not alert["acknowledged"]]
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return list(self.alerts.values())[-limit:][::-1]
+
+    def subscribe(self, connection: MonitorConnection):
+        """Deliver every unacknowledged alert to a dispatcher that just connected"""
+        for alert in self.pending():
+            alert_id = alert["alert_id"]
+            connection.enqueue_urgent(connection.encode(alert), lambda _, alert_id=alert_id: self._delivered(alert_id, replay=True))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "raised": self.raised,
+            "duplicates_suppressed": self.duplicates,
+            "replayed": self.replayed,
+            "pending": len(self.pending()),
+            "subscribers": len(self.connections),
+            "delivery_latency": self.delivery_latency.summary(),
+            "ack_latency": self.ack_latency.summary()
+        }
+
+# Alert subscribers are kept apart from the monitor stream so alerts never queue behind transcripts
+alert_connections = ConnectionManager(
+    max_connections=settings.EMERGENCY_ALERT_MAX_CONNECTIONS,
+    ping_interval=settings.MONITOR_PING_INTERVAL_SECONDS,
+    idle_timeout=settings.MONITOR_IDLE_TIMEOUT_SECONDS,
+    max_queued_bytes=settings.MONITOR_SEND_QUEUE_BYTES,
+    send_timeout=settings.MONITOR_SEND_TIMEOUT_SECONDS
+)
+
+# Global emergency alert channel
+emergency_alerts = EmergencyAlertChannel(alert_connections, history=settings.EMERGENCY_ALERT_HISTORY)
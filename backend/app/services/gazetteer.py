@@ -0,0 +1,71 @@
+from typing import Dict, List, Tuple
+
+# US state and territory codes
+US_STATES: Dict[str, str] = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia",
+    "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+    "PR": "Puerto Rico"
+}
+
+# Major US cities and freight hubs with their state code
+US_CITIES: List[Tuple[str, str]] = [
+    ("Albuquerque", "NM"), ("Allentown", "PA"), ("Amarillo", "TX"), ("Anchorage", "AK"),
+    ("Atlanta", "GA"), ("Austin", "TX"), ("Bakersfield", "CA"), ("Baltimore", "MD"),
+    ("Barstow", "CA"), ("Baton Rouge", "LA"), ("Billings", "MT"), ("Birmingham", "AL"),
+    ("Boise", "ID"), ("Boston", "MA"), ("Buffalo", "NY"), ("Charleston", "SC"),
+    ("Charlotte", "NC"), ("Chattanooga", "TN"), ("Cheyenne", "WY"), ("Chicago", "IL"),
+    ("Cincinnati", "OH"), ("Cleveland", "OH"), ("Colorado Springs", "CO"), ("Columbus", "OH"),
+    ("Corpus Christi", "TX"), ("Dallas", "TX"), ("Denver", "CO"), ("Des Moines", "IA"),
+    ("Detroit", "MI"), ("El Paso", "TX"), ("Fargo", "ND"), ("Flagstaff", "AZ"),
+    ("Fort Worth", "TX"), ("Fresno", "CA"), ("Gary", "IN"), ("Grand Rapids", "MI"),
+    ("Green Bay", "WI"), ("Greensboro", "NC"), ("Harrisburg", "PA"), ("Hartford", "CT"),
+    ("Houston", "TX"), ("Indianapolis", "IN"), ("Jackson", "MS"), ("Jacksonville", "FL"),
+    ("Joliet", "IL"), ("Kansas City", "MO"), ("Knoxville", "TN"), ("Laredo", "TX"),
+    ("Las Vegas", "NV"), ("Lexington", "KY"), ("Lincoln", "NE"), ("Little Rock", "AR"),
+    ("Long Beach", "CA"), ("Los Angeles", "CA"), ("Louisville", "KY"), ("Lubbock", "TX"),
+    ("Memphis", "TN"), ("Miami", "FL"), ("Milwaukee", "WI"), ("Minneapolis", "MN"),
+    ("Mobile", "AL"), ("Montgomery", "AL"), ("Nashville", "TN"), ("New Orleans", "LA"),
+    ("New York", "NY"), ("Newark", "NJ"), ("Norfolk", "VA"), ("Oakland", "CA"),
+    ("Oklahoma City", "OK"), ("Omaha", "NE"), ("Ontario", "CA"), ("Orlando", "FL"),
+    ("Philadelphia", "PA"), ("Phoenix", "AZ"), ("Pittsburgh", "PA"), ("Portland", "OR"),
+    ("Raleigh", "NC"), ("Reno", "NV"), ("Richmond", "VA"), ("Riverside", "CA"),
+    ("Sacramento", "CA"), ("Salt Lake City", "UT"), ("San Antonio", "TX"), ("San Bernardino", "CA"),
+    ("San Diego", "CA"), ("San Francisco", "CA"), ("San Jose", "CA"), ("Savannah", "GA"),
+    ("Seattle", "WA"), ("Shreveport", "LA"), ("Sioux Falls", "SD"), ("Spokane", "WA"),
+    ("Springfield", "MO"), ("St. Louis", "MO"), ("Stockton", "CA"), ("Syracuse", "NY"),
+    ("Tacoma", "WA"), ("Tampa", "FL"), ("Toledo", "OH"), ("Tucson", "AZ"),
+    ("Tulsa", "OK"), ("Wichita", "KS"), ("Yuma", "AZ")
+]
+
+def _build_phrase_index(phrases: Dict[Tuple[str, ...], object]) -> Dict[str, List[Tuple[Tuple[str, ...], object]]]:
+    """Index phrases by first token, longest phrase first, for greedy token matching"""
+    index: Dict[str, List[Tuple[Tuple[str, ...], object]]] = {}
+    for tokens, value in phrases.items():
+        index.setdefault(tokens[0], []).append((tokens, value))
+    for candidates in index.values():
+        candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+    return index
+
+def _city_tokens(name: str) -> Tuple[str, ...]:
+    return tuple(name.lower().replace(".", "").split())
+
+# Precomputed indexes, built once at import time
+STATE_CODES: Dict[str, str] = {code.lower(): code for code in US_STATES}
+STATE_NAME_INDEX = _build_phrase_index({
+    tuple(name.lower().split()): code for code, name in US_STATES.items()
+})
+CITY_INDEX = _build_phrase_index({
+    _city_tokens(name): (name, state) for name, state in US_CITIES
+})
+
+# City names that are also everyday words or first names; only trusted when capitalized or followed by a state
+AMBIGUOUS_CITY_TOKENS = {"mobile", "gary", "buffalo", "jackson", "lincoln", "ontario", "austin"}
@@ -0,0 +1,225 @@
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+import re
+from app.services.gazetteer import STATE_CODES, STATE_NAME_INDEX, CITY_INDEX, AMBIGUOUS_CITY_TOKENS
+
+# One tokenizer pass: clock times, road designators (I-10), words, numbers and commas
+TOKEN_PATTERN = re.compile(r"\d{1,2}:\d{2}|[A-Za-z]+-\d+|[A-Za-z]+(?:'[A-Za-z]+)?|\d+|,")
+ROAD_TOKEN_PATTERN = re.compile(r"^(i|us|sr|hwy)-(\d+)$")
+
+ROAD_PREFIXES = {"i": "I-", "us": "US-", "sr": "SR-", "hwy": "Highway "}
+ROAD_WORDS = {"interstate": "I-", "highway": "Highway ", "hwy": "Highway ", "route": "Route "}
+FACILITY_WORDS = {"dock": "Dock", "door": "Door", "bay": "Bay"}
+
+WORD_NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "ninety": 90
+}
+MINUTE_UNITS = {"minute": 1, "minutes": 1, "min": 1, "mins": 1, "hour": 60, "hours": 60, "hr": 60, "hrs": 60}
+MERIDIEMS = {"am", "pm"}
+DAY_WORDS = {"tomorrow", "today", "tonight", "morning", "afternoon", "evening"}
+
+# Status phrases in token form; when several match, the earlier status in STATUS_PRIORITY wins
+STATUS_PHRASES = {
+    "unloading": [("unloading",), ("unload",), ("getting", "unloaded"), ("backing", "up"),
+                  ("backed", "in"), ("dock",), ("making", "the", "delivery")],
+    "delayed": [("delayed",), ("running", "late"), ("behind", "schedule"), ("stuck",),
+                ("traffic",), ("late",)],
+    "arrived": [("arrived",), ("here",), ("made", "it"), ("checked", "in"), ("at", "the")],
+    "driving": [("driving",), ("on", "the", "road"), ("en", "route"), ("enroute",), ("heading",),
+                ("on", "my", "way"), ("rolling",), ("in", "transit")]
+}
+STATUS_PRIORITY = {status: rank for rank, status in enumerate(STATUS_PHRASES)}
+
+def _build_status_index() -> Dict[str, List[Tuple[Tuple[str, ...], str]]]:
+    index: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+    for status, phrases in STATUS_PHRASES.items():
+        for phrase in phrases:
+            index.setdefault(phrase[0], []).append((phrase, status))
+    for candidates in index.values():
+        candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+    return index
+
+STATUS_INDEX = _build_status_index()
+
+@dataclass
+class ExtractedInformation:
+    """Typed fields extracted from a single utterance"""
+    highway: Optional[str] = None
+    mile_marker: Optional[int] = None
+    dock: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    driver_status: Optional[str] = None
+    eta_clock: Optional[str] = None
+    eta_minutes: Optional[int] = None
+    eta_day: Optional[str] = None
+    eta_text: Optional[str] = None
+
+    @property
+    def location(self) -> Optional[str]:
+        """Best human readable location: road position, place and facility"""
+        road = " ".join(part for part in [
+            self.highway,
+            f"mile marker {self.mile_marker}" if self.mile_marker is not None else None
+        ] if part)
+        place = ", ".join(part for part in [self.city, self.state] if part)
+        location = ", ".join(part for part in [road, place, self.dock] if part)
+        return location or None
+
+    @property
+    def timing(self) -> Optional[str]:
+        return self.eta_text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Non-empty fields plus the composed location and timing_info keys"""
+        data = {key: value for key, value in asdict(self).items() if value is not None}
+        data.pop("eta_text", None)
+        if self.location:
+            data["location"] = self.location
+        if self.timing:
+            data["timing_info"] = self.timing
+        return data
+
+class InformationExtractor:
+    """
+    Single-pass extractor for driver check-in utterances
+    Tokenizes once and resolves roads, mile markers, docks, gazetteer cities/states,
+    driver status and ETA expressions while walking the tokens
+    """
+
+    def extract(self, text: str) -> ExtractedInformation:
+        info = ExtractedInformation()
+        if not text:
+            return info
+
+        originals = TOKEN_PATTERN.findall(text)
+        tokens = [token.lower() for token in originals]
+        count = len(tokens)
+        best_status_rank = len(STATUS_PRIORITY)
+        duration_text = None
+        i = 0
+
+        while i < count:
+            token = tokens[i]
+            following = tokens[i + 1] if i + 1 < count else None
+            consumed = 1
+
+            if token in STATUS_INDEX:
+                rank = self._match_status(tokens, i)
+                if rank is not None:
+                    best_status_rank = min(best_status_rank, rank)
+
+            # Road designators: "I-10", "interstate 40", "highway 60", "route 66"
+            road_match = ROAD_TOKEN_PATTERN.match(token)
+            if road_match:
+                info.highway = info.highway or ROAD_PREFIXES[road_match.group(1)] + road_match.group(2)
+            elif token in ROAD_WORDS and following and following.isdigit():
+                info.highway = info.highway or ROAD_WORDS[token] + following
+                consumed = 2
+            elif token == "us" and originals[i] == "US" and following and following.isdigit():
+                info.highway = info.highway or "US-" + following
+                consumed = 2
+
+            # Mile markers: "mile marker 44", "mm 44"
+            elif token == "mile" and following == "marker" and i + 2 < count and tokens[i + 2].isdigit():
+                if info.mile_marker is None:
+                    info.mile_marker = int(tokens[i + 2])
+                consumed = 3
+            elif token in ("mm", "marker") and following and following.isdigit():
+                if info.mile_marker is None:
+                    info.mile_marker = int(following)
+                consumed = 2
+
+            # Facility positions: "dock 5", "door 12", "bay 3"
+            elif token in FACILITY_WORDS and following and following.isdigit():
+                info.dock = info.dock or f"{FACILITY_WORDS[token]} {following}"
+                consumed = 2
+
+            # Clock times: "3:30", "3:30 pm", "3 pm"
+            elif ":" in token or (token.isdigit() and following in MERIDIEMS):
+                clock = token
+                if following in MERIDIEMS:
+                    clock = f"{token} {following}"
+                    consumed = 2
+                info.eta_clock = info.eta_clock or clock
+
+            # Durations: "45 minutes", "two hours", "an hour", "half an hour"
+            elif (token.isdigit() or token in WORD_NUMBERS or token in ("a", "an")) and following in MINUTE_UNITS:
+                if info.eta_minutes is None:
+                    amount = int(token) if token.isdigit() else WORD_NUMBERS.get(token, 1)
+                    info.eta_minutes = amount * MINUTE_UNITS[following]
+                    duration_text = f"{token} {following}"
+                consumed = 2
+            elif token == "half" and following in ("an", "a") and i + 2 < count and tokens[i + 2] == "hour":
+                if info.eta_minutes is None:
+                    info.eta_minutes = 30
+                    duration_text = "half an hour"
+                consumed = 3
+
+            elif token in DAY_WORDS:
+                info.eta_day = info.eta_day or token
+
+            # Gazetteer places: "Phoenix", "Phoenix, AZ", "Salt Lake City", "Texas"
+            elif token in CITY_INDEX or token in STATE_NAME_INDEX:
+                consumed = self._match_place(info, tokens, originals, i) or 1
+
+            i += consumed
+
+        if best_status_rank < len(STATUS_PRIORITY):
+            info.driver_status = list(STATUS_PHRASES)[best_status_rank]
+
+        # Same precedence as before: clock time, then duration, then day word
+        info.eta_text = info.eta_clock or duration_text or info.eta_day
+        return info
+
+    def _match_place(self, info: ExtractedInformation, tokens: List[str], originals: List[str], i: int) -> int:
+        """Match a gazetteer city (optionally followed by a state) or a state; returns tokens consumed"""
+        for city_tokens, (city, city_state) in CITY_INDEX.get(tokens[i], []):
+            end = i + len(city_tokens)
+            if tuple(tokens[i:end]) != city_tokens:
+                continue
+            state, state_length = self._match_state(tokens, originals, end, allow_code=True)
+            if tokens[i] in AMBIGUOUS_CITY_TOKENS and not state and not originals[i][0].isupper():
+                continue
+            if not info.city:
+                info.city = city
+                info.state = state or city_state
+            return end - i + state_length
+
+        state, state_length = self._match_state(tokens, originals, i, allow_code=False)
+        if state:
+            if not info.state:
+                info.state = state
+            return state_length
+        return 0
+
+    def _match_state(self, tokens: List[str], originals: List[str], i: int, allow_code: bool) -> Tuple[Optional[str], int]:
+        """Match a state name, or a ", XX" code when it follows a city"""
+        offset = 0
+        if i < len(tokens) and tokens[i] == ",":
+            offset = 1
+        start = i + offset
+        if start >= len(tokens):
+            return None, 0
+
+        token = tokens[start]
+        if allow_code and token in STATE_CODES and (offset or originals[start].isupper()):
+            return STATE_CODES[token], offset + 1
+
+        for state_tokens, code in STATE_NAME_INDEX.get(token, []):
+            end = start + len(state_tokens)
+            if tuple(tokens[start:end]) == state_tokens:
+                return code, offset + len(state_tokens)
+        return None, 0
+
+    def _match_status(self, tokens: List[str], i: int) -> Optional[int]:
+        """Match a status phrase starting at position i; returns its priority rank"""
+        for phrase, status in STATUS_INDEX[tokens[i]]:
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                return STATUS_PRIORITY[status]
+        return None
+
+# Global extractor instance
+information_extractor = InformationExtractor()
@@ -0,0 +1,112 @@
+from typing import Dict, Any, Optional, Union, Tuple, FrozenSet
+from collections import OrderedDict
+from dataclasses import dataclass
+import msgpack
+from app.core.serialization import dumps
+
+ENCODINGS = ("json", "msgpack")
+TRANSCRIPT_MODES = ("full", "delta")
+
+# Keys whose values grow turn by turn and are re-sent in full by Retell
+TRANSCRIPT_KEYS = ("transcript", "transcript_object", "transcript_with_tool_calls")
+MAX_TRANSCRIPT_DEPTH = 3
+
+# A payload is text (JSON frames) or bytes (MessagePack binary frames)
+Payload = Union[str, bytes]
+
+@dataclass(frozen=True)
+class MonitorProtocol:
+    """Wire format a monitor client asked for when connecting"""
+    encoding: str = "json"
+    transcript_mode: str = "full"
+
+    @classmethod
+    def from_query(cls, params) -> "MonitorProtocol":
+        """?encoding=json|msgpack&transcript=full|delta; raises ValueError on unknown values"""
+        encoding = params.get("encoding", "json")
+        transcript_mode = params.get("transcript", "full")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+        if transcript_mode not in TRANSCRIPT_MODES:
+            raise ValueError(f"Unsupported transcript mode: {transcript_mode}")
+        return cls(encoding, transcript_mode)
+
+def encode(message: Dict[str, Any], encoding: str) -> Payload:
+    if encoding == "msgpack":
+        return msgpack.packb(message, default=str)
+    return dumps(message)
+
+def _find_transcripts(value: Any, path: Tuple[str, ...], found: Dict[Tuple[str, ...], Any], depth: int):
+    if not isinstance(value, dict) or depth > MAX_TRANSCRIPT_DEPTH:
+        return
+    for key, child in value.items():
+        if key in TRANSCRIPT_KEYS and isinstance(child, (str, list)):
+            found[path + (key,)] = child
+        elif isinstance(child, dict):
+            _find_transcripts(child, path + (key,), found, depth + 1)
+
+def _delta(previous: Any, current: Any) -> Optional[Dict[str, Any]]:
+    """{"offset", "append"} when current extends previous, None when it has to be sent in full"""
+    if type(previous) is not type(current) or len(current) < len(previous):
+        return None
+    offset = len(previous)
+    if isinstance(current, str):
+        if not current.startswith(previous):
+            return None
+    elif offset and current[offset - 1] != previous[-1]:
+        return None
+    return {"offset": offset, "append": current[offset:]}
+
+def _replace_path(message: Dict[str, Any], path: Tuple[str, ...], value: Any) -> Dict[str, Any]:
+    """Copy of message with the value at path replaced, copying only the dicts along the path"""
+    copy = dict(message)
+    if len(path) == 1:
+        copy[path[0]] = value
+    else:
+        copy[path[0]] = _replace_path(message[path[0]], path[1:], value)
+    return copy
+
+class TranscriptDeltaTracker:
+    """
+    Latest transcript value broadcast per call and key, to turn full re-sends into deltas
+    Events nest transcripts differently (raw_data.call.transcript vs call_data.transcript),
+    so deltas are taken against the last value of the same key at any depth. A field in
+    delta form is {"$delta": {"offset": n, "append": tail}}: the client keeps the first n
+    characters/items of the value it last received for that key (in an earlier message)
+    and appends tail.
+    """
+
+    def __init__(self, max_calls: int):
+        self.max_calls = max_calls
+        self.calls: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def advance(self, call_id: str, message: Dict[str, Any]) -> Tuple[Dict[Tuple[str, ...], Any], FrozenSet[str]]:
+        """
+        Record the transcripts of message
+        Returns the previous value of each transcript path's key and the transcript keys present
+        """
+        found: Dict[Tuple[str, ...], Any] = {}
+        _find_transcripts(message, (), found, 0)
+        known = self.calls.get(call_id)
+        if known is None:
+            known = {}
+            self.calls[call_id] = known
+        self.calls.move_to_end(call_id)
+        while len(self.calls) > self.max_calls:
+            self.calls.popitem(last=False)
+        previous = {path: known[path[-1]] for path in found if path[-1] in known}
+        for path, value in found.items():
+            known[path[-1]] = value
+        return previous, frozenset(path[-1] for path in found)
+
+    @staticmethod
+    def with_deltas(message: Dict[str, Any], previous: Dict[Tuple[str, ...], Any]) -> Dict[str, Any]:
+        """Copy of message with every transcript that extends its previous value replaced by a delta"""
+        for path, last in previous.items():
+            current = message
+            for key in path:
+                current = current[key]
+            delta = _delta(last, current)
+            if delta is not None:
+                message = _replace_path(message, path, {"$delta": delta})
+        return message
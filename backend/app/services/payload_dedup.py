@@ -0,0 +1,49 @@
+from typing import Dict, Any, Tuple
+import hashlib
+from app.core.serialization import dumps_bytes
+
+def content_hash(value: Any) -> Tuple[str, int]:
+    """SHA-256 of a payload's canonical JSON (or a string's UTF-8) and its size in bytes"""
+    if isinstance(value, str):
+        data = value.encode()
+    else:
+        data = dumps_bytes(value, sort_keys=True)
+    return hashlib.sha256(data).hexdigest(), len(data)
+
+class PayloadDeduplicator:
+    """
+    Content hashes of the blobs already written for a call, kept in the call's actor state
+    Retell repeats the transcript and call object across call_ended, call_analyzed and
+    retries; a repeat costs one hash instead of another multi-kilobyte write. Hashes are
+    only recorded after a successful write, so a failed write is retried. The database
+    keeps the same hashes (call_transcripts.content_hash, calls.transcript_hash) to stay
+    idempotent once the actor state has been evicted.
+    """
+
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+        self.bytes_skipped = 0
+
+    def check(self, call_state: Dict[str, Any], kind: str, value: Any) -> Tuple[str, bool]:
+        """(hash, True when this exact blob was already written for the call)"""
+        digest, size = content_hash(value)
+        if digest in call_state.get("content_hashes", {}).get(kind, ()):
+            self.skipped += 1
+            self.bytes_skipped += size
+            return digest, True
+        return digest, False
+
+    def mark_written(self, call_state: Dict[str, Any], kind: str, digest: str):
+        call_state.setdefault("content_hashes", {}).setdefault(kind, set()).add(digest)
+        self.written += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "written": self.written,
+            "skipped_duplicates": self.skipped,
+            "bytes_skipped": self.bytes_skipped
+        }
+
+# Global deduplicator for webhook payload writes
+payload_dedup = PayloadDeduplicator()
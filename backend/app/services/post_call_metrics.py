@@ -0,0 +1,231 @@
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.tracing import span, log
+from app.services.information_extractor import information_extractor
+
+# Outcome recorded in call_results for the driver status extracted from the call
+STATUS_OUTCOMES = {
+    "driving": "In-Transit Update",
+    "delayed": "In-Transit Update",
+    "arrived": "Arrival Confirmation",
+    "unloading": "Arrival Confirmation"
+}
+
+_engine = None
+
+def _get_engine():
+    """Conversation engine used for emergency and cooperation detection, one per worker process"""
+    global _engine
+    if _engine is None:
+        from app.services.conversation_engine import ConversationEngine
+        _engine = ConversationEngine({})
+    return _engine
+
+def _utterances(call_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    (role, text, start, end) per utterance, in seconds from call start
+    Timing comes from the word timestamps of Retell's transcript_object; a plain
+    "Agent: ..." transcript still yields turns, just without timing.
+    """
+    utterances = []
+    for turn in call_data.get("transcript_object") or []:
+        if not isinstance(turn, dict) or turn.get("role") not in ("agent", "user"):
+            continue
+        words = [word for word in turn.get("words") or [] if "start" in word and "end" in word]
+        utterances.append({
+            "role": turn["role"],
+            "text": turn.get("content", ""),
+            "start": words[0]["start"] if words else None,
+            "end": words[-1]["end"] if words else None
+        })
+    if utterances:
+        return utterances
+
+    for line in (call_data.get("transcript") or "").splitlines():
+        speaker, _, text = line.partition(":")
+        role = {"agent": "agent", "user": "user", "driver": "user"}.get(speaker.strip().lower())
+        if role and text.strip():
+            utterances.append({"role": role, "text": text.strip(), "start": None, "end": None})
+    return utterances
+
+def _gap_summary(gaps: List[float]) -> Dict[str, Any]:
+    if not gaps:
+        return {"count": 0}
+    ordered = sorted(gaps)
+    return {
+        "count": len(ordered),
+        "avg_seconds": round(sum(ordered) / len(ordered), 3),
+        "p50_seconds": round(ordered[len(ordered) // 2], 3),
+        "max_seconds": round(ordered[-1], 3)
+    }
+
+def compute_call_metrics(call_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Derived metrics for one completed call
+    Pure function of the Retell call object so it can run in a worker process.
+    """
+    engine = _get_engine()
+    utterances = _utterances(call_data)
+    turns = {"agent": 0, "user": 0}
+    talk_seconds = {"agent": 0.0, "user": 0.0}
+    interruptions = {"agent": 0, "user": 0}
+    response_gaps: List[float] = []
+    timeline: List[Dict[str, Any]] = []
+    extracted: Dict[str, Any] = {}
+    untimed_turns = 0
+    previous: Optional[Dict[str, Any]] = None
+
+    for utterance in utterances:
+        role = utterance["role"]
+        turns[role] += 1
+        start, end = utterance["start"], utterance["end"]
+        if start is None:
+            untimed_turns += 1
+        else:
+            talk_seconds[role] += max(0.0, end - start)
+            if previous is not None and previous["end"] is not None and previous["role"] != role:
+                if start < previous["end"]:
+                    interruptions[role] += 1
+                elif role == "agent":
+                    response_gaps.append(start - previous["end"])
+
+        if role == "user":
+            text = utterance["text"]
+            emergency_type = engine.detect_emergency(text.lower())
+            timeline.append({
+                "turn": turns["user"],
+                "at_seconds": start,
+                "cooperation_level": engine.assess_cooperation(text).value,
+                "emergency_type": emergency_type
+            })
+            # Later answers win: drivers correct their status and ETA as the call goes on
+            extracted.update(information_extractor.extract(text).to_dict())
+        previous = utterance
+
+    # Timing metrics cover the timed utterances; a few turns without word timestamps don't void them
+    timed = untimed_turns < len(utterances)
+    total_talk = talk_seconds["agent"] + talk_seconds["user"]
+    emergencies = [entry["emergency_type"] for entry in timeline if entry["emergency_type"]]
+    start_ms, end_ms = call_data.get("start_timestamp") or 0, call_data.get("end_timestamp") or 0
+    return {
+        "duration_seconds": round((end_ms - start_ms) / 1000, 3) if end_ms > start_ms else None,
+        "turns": turns,
+        "untimed_turns": untimed_turns,
+        "talk_seconds": {role: round(seconds, 3) for role, seconds in talk_seconds.items()} if timed else None,
+        "agent_talk_ratio": round(talk_seconds["agent"] / total_talk, 3) if timed and total_talk else None,
+        "response_gaps": _gap_summary(response_gaps),
+        "interruptions": interruptions if timed else None,
+        "emergency_types": sorted(set(emergencies)),
+        "timeline": timeline,
+        "extracted": extracted
+    }
+
+def derive_outcome(metrics: Dict[str, Any]) -> str:
+    if metrics["emergency_types"]:
+        return "Emergency Escalation"
+    return STATUS_OUTCOMES.get(metrics["extracted"].get("driver_status"), "Unknown")
+
+def summarize_metrics(metrics: Dict[str, Any]) -> str:
+    """One-paragraph analysis of a call's derived metrics for the transcript view"""
+    parts = [f"{metrics['turns']['agent']} agent and {metrics['turns']['user']} driver turns."]
+    if metrics.get("agent_talk_ratio") is not None:
+        parts.append(f"Agent talked {round(metrics['agent_talk_ratio'] * 100)}% of the time.")
+        if metrics.get("untimed_turns"):
+            parts.append(f"{metrics['untimed_turns']} turns had no word timing and are left out of timing metrics.")
+    gaps = metrics.get("response_gaps") or {}
+    if gaps.get("count"):
+        parts.append(f"Average agent response gap {gaps['avg_seconds']}s (max {gaps['max_seconds']}s).")
+    if metrics.get("interruptions"):
+        parts.append(f"Driver interrupted {metrics['interruptions']['user']} times, agent {metrics['interruptions']['agent']} times.")
+    if metrics.get("emergency_types"):
+        parts.append(f"Emergency detected: {', '.join(metrics['emergency_types'])}.")
+    if metrics.get("extracted"):
+        parts.append("Extracted " + ", ".join(f"{key}: {value}" for key, value in metrics["extracted"].items()) + ".")
+    return " ".join(parts)
+
+class PostCallPipeline:
+    """
+    Runs compute_call_metrics for finished calls in a process pool and stores the result
+    The pool is created on first use with the spawn start method, so workers never
+    inherit the server's event loop or open sockets. Submissions return immediately;
+    the webhook never waits for the analysis.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: set = set()
+        self._in_flight: set = set()
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, call_db_id: str, call_data: Dict[str, Any]):
+        """Schedule metrics for a call row without waiting for them; a call already in flight is skipped"""
+        if call_db_id in self._in_flight:
+            return
+        self._in_flight.add(call_db_id)
+        task = asyncio.create_task(self.process(call_db_id, call_data))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._in_flight.discard(call_db_id))
+
+    async def process(self, call_db_id: str, call_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            loop = asyncio.get_running_loop()
+            with span("post_call_metrics.compute", call_db_id=call_db_id):
+                metrics = await loop.run_in_executor(self.executor, compute_call_metrics, call_data)
+            with span("supabase.insert", table="call_results"):
+                await asyncio.to_thread(self._store, call_db_id, metrics)
+            self.completed += 1
+            return metrics
+        except Exception as e:
+            self.failed += 1
+            log(f"Post-call metrics failed for call {call_db_id}: {e}")
+            return None
+
+    def _store(self, call_db_id: str, metrics: Dict[str, Any]):
+        """One metrics row per call: a retried call_ended replaces it instead of adding another"""
+        row = {
+            "call_id": call_db_id,
+            "call_outcome": derive_outcome(metrics),
+            "structured_data": metrics["extracted"],
+            "metrics": metrics,
+            "processing_notes": "Derived post-call metrics"
+        }
+        existing = supabase.table("call_results").select("id").eq("call_id", call_db_id).not_.is_("metrics", "null").limit(1).execute()
+        if existing.data:
+            supabase.table("call_results").update(row).eq("id", existing.data[0]["id"]).execute()
+        else:
+            supabase.table("call_results").insert(row).execute()
+
+    async def shutdown(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pool_started": self._executor is not None,
+            "in_flight": len(self._tasks),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+# Global post-call pipeline
+post_call_pipeline = PostCallPipeline(settings.POST_CALL_METRICS_WORKERS)
@@ -0,0 +1,97 @@
+from typing import Dict, Any, List
+from collections import OrderedDict, deque
+from app.core.config import settings
+
+class CallEventLog:
+    """Recent serialized monitor messages for one call, bounded by count and bytes"""
+
+    def __init__(self, max_events: int, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.events: deque = deque(maxlen=max_events)
+        self.size_bytes = 0
+        self.last_seq = 0
+
+    def append(self, seq: int, text: str):
+        size = len(text.encode())
+        if len(self.events) == self.events.maxlen:
+            self.size_bytes -= self.events[0][2]
+        self.events.append((seq, text, size))
+        self.size_bytes += size
+        self.last_seq = seq
+        while self.size_bytes > self.max_bytes and len(self.events) > 1:
+            self.size_bytes -= self.events.popleft()[2]
+
+    @property
+    def first_seq(self) -> int:
+        return self.events[0][0] if self.events else self.last_seq + 1
+
+class MonitorReplayBuffer:
+    """
+    Memory-bounded per-call ring buffer of monitor messages
+    Every message of a call gets a sequence number so clients that (re)connect can
+    ask for everything after the last seq they saw and catch up from memory.
+    The least recently active calls are evicted once max_calls is exceeded. Sequence
+    counters are kept separately for max_sequences calls (an int each), so a call whose
+    log was evicted keeps counting up instead of restarting at 1.
+    """
+
+    def __init__(self, max_calls: int = 200, max_events_per_call: int = 500, max_bytes_per_call: int = 512 * 1024,
+                 max_sequences: int = 10000):
+        self.max_calls = max_calls
+        self.max_events_per_call = max_events_per_call
+        self.max_bytes_per_call = max_bytes_per_call
+        self.max_sequences = max_sequences
+        self.calls: "OrderedDict[str, CallEventLog]" = OrderedDict()
+        self.sequences: "OrderedDict[str, int]" = OrderedDict()
+
+    def next_seq(self, call_id: str) -> int:
+        seq = self.sequences.get(call_id, 0) + 1
+        self.sequences[call_id] = seq
+        self.sequences.move_to_end(call_id)
+        while len(self.sequences) > self.max_sequences:
+            self.sequences.popitem(last=False)
+        return seq
+
+    def append(self, call_id: str, seq: int, text: str):
+        log = self.calls.get(call_id)
+        if log is None:
+            log = CallEventLog(self.max_events_per_call, self.max_bytes_per_call)
+            self.calls[call_id] = log
+        log.append(seq, text)
+        self.calls.move_to_end(call_id)
+        while len(self.calls) > self.max_calls:
+            self.calls.popitem(last=False)
+
+    def since(self, call_id: str, since_seq: int = 0) -> Dict[str, Any]:
+        """
+        Buffered messages with seq > since_seq
+        truncated is set when messages after since_seq were evicted, or when since_seq is
+        ahead of this buffer (numbering restarted, e.g. after a server restart).
+        """
+        log = self.calls.get(call_id)
+        if log is None:
+            last_seq = self.sequences.get(call_id, 0)
+            return {"messages": [], "last_seq": last_seq, "truncated": since_seq != last_seq}
+        return {
+            "messages": [text for seq, text, _ in log.events if seq > since_seq],
+            "last_seq": log.last_seq,
+            "truncated": log.first_seq > since_seq + 1 or since_seq > log.last_seq
+        }
+
+    def call_ids(self) -> List[str]:
+        return list(self.calls.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered_calls": len(self.calls),
+            "buffered_events": sum(len(log.events) for log in self.calls.values()),
+            "buffered_bytes": sum(log.size_bytes for log in self.calls.values())
+        }
+
+# Global replay buffer for the conversation monitor
+monitor_replay_buffer = MonitorReplayBuffer(
+    max_calls=settings.MONITOR_REPLAY_MAX_CALLS,
+    max_events_per_call=settings.MONITOR_REPLAY_EVENTS_PER_CALL,
+    max_bytes_per_call=settings.MONITOR_REPLAY_BYTES_PER_CALL,
+    max_sequences=settings.MONITOR_REPLAY_MAX_SEQUENCES
+)
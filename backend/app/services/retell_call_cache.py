@@ -0,0 +1,84 @@
+from typing import Dict, Any, Optional
+import os
+import re
+from app.core.config import settings
+from app.core.serialization import loads, dumps_bytes
+from app.core.tracing import log
+
+# Retell call ids are used as file names, so anything else is never cached
+CALL_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+def is_final(details: Dict[str, Any]) -> bool:
+    """
+    Whether Retell will not change these call details any more
+    Calls that never connected or errored are final right away; ended calls only
+    once call_analysis has been attached.
+    """
+    status = details.get("call_status")
+    if status in ("error", "not_connected"):
+        return True
+    return status == "ended" and bool(details.get("call_analysis"))
+
+class RetellCallCache:
+    """
+    Finished Retell call details kept on disk, one JSON file per call
+    Final details are immutable, so entries never expire and survive restarts; a call
+    is fetched from Retell at most once after it has finished.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def _path(self, call_id: str) -> Optional[str]:
+        if not self.directory or not CALL_ID_PATTERN.match(call_id):
+            return None
+        return os.path.join(self.directory, f"{call_id}.json")
+
+    def get(self, call_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(call_id)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                details = loads(f.read())
+            self.hits += 1
+            return details
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            log(f"Ignoring unreadable Retell call cache entry {path}: {e}")
+            self.misses += 1
+            return None
+
+    def put(self, call_id: str, details: Dict[str, Any]) -> bool:
+        """Store details if they are final; returns whether they were written"""
+        path = self._path(call_id)
+        if path is None or not is_final(details):
+            return False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename so a crash never leaves a truncated entry behind
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(dumps_bytes(details))
+            os.replace(temp_path, path)
+            self.stored += 1
+            return True
+        except OSError as e:
+            log(f"Could not cache Retell call {call_id}: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored
+        }
+
+# Global cache of finished Retell call details
+retell_call_cache = RetellCallCache(settings.RETELL_CALL_CACHE_DIR)
@@ -1,10 +1,19 @@
-import retell
 from typing import Dict, Any, Optional
+import asyncio
 from app.core.config import settings
+from app.services.retell_call_cache import retell_call_cache
 
 class RetellClient:
     def __init__(self):
-        self.client = retell.Retell(api_key=settings.RETELL_API_KEY)
+        self._client = None
+
+    @property
+    def client(self):
+        # The retell SDK takes over a second to import, so it is loaded on first use
+        if self._client is None:
+            import retell
+            self._client = retell.Retell(api_key=settings.RETELL_API_KEY, base_url=settings.RETELL_BASE_URL or None)
+        return self._client
 
     async def create_phone_call(
         self,
@@ -61,12 +70,19 @@ class RetellClient:
     async def get_call_details(self, call_id: str) -> Dict[str, Any]:
         """
         Get details of a specific call
+        Finished calls are served from the on-disk cache; the SDK request runs in a
+        thread so concurrent lookups do not block the event loop.
         """
+        cached = retell_call_cache.get(call_id)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.call.retrieve(call_id=call_id)
-            return response.model_dump()
+            response = await asyncio.to_thread(self.client.call.retrieve, call_id=call_id)
+            details = response.model_dump()
         except Exception as e:
             raise Exception(f"Failed to get call details: {str(e)}")
+        retell_call_cache.put(call_id, details)
+        return details
 
     # REMOVED: No agent creation allowed - only configuration of existing agents
 
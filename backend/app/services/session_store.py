@@ -0,0 +1,131 @@
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+import asyncio
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.tracing import log
+
+# Bump when the ConversationContext snapshot layout changes; older snapshots are ignored
+SNAPSHOT_FORMAT = 1
+
+@dataclass
+class SessionSnapshot:
+    """Versioned conversation context snapshot for a single call"""
+    call_id: str
+    version: int
+    history_length: int
+    last_user_input: Optional[str]
+    context: Dict[str, Any]
+
+class ConversationSessionStore:
+    """
+    Shared store for conversation context snapshots
+    Snapshots live in the conversation_sessions table so any worker can pick up a call.
+    An in-process LRU of the latest snapshot (and its version) per call is read through,
+    so a turn handled by the same worker only writes to the database. A stale cached
+    version is caught by the optimistic save, which then drops it. Database calls run
+    in a thread so the event loop never waits on them.
+    """
+
+    def __init__(self, table: str = "conversation_sessions", max_local_sessions: int = 1000):
+        self.table = table
+        self.max_local_sessions = max_local_sessions
+        self._local: "OrderedDict[str, SessionSnapshot]" = OrderedDict()
+
+    async def load(self, call_id: str) -> Optional[SessionSnapshot]:
+        """Load the latest snapshot for a call, None if the call has no usable snapshot"""
+        snapshot = self._local.get(call_id)
+        if snapshot is not None:
+            self._local.move_to_end(call_id)
+            return snapshot
+
+        try:
+            response = await asyncio.to_thread(
+                lambda: supabase.table(self.table).select("*").eq("call_id", call_id).execute()
+            )
+        except Exception as e:
+            log(f"Error loading session {call_id}, starting without a snapshot: {e}")
+            return None
+
+        if not response.data:
+            return None
+
+        row = response.data[0]
+        if row.get("format") != SNAPSHOT_FORMAT:
+            return None
+
+        snapshot = SessionSnapshot(
+            call_id=call_id,
+            version=row["version"],
+            history_length=row.get("history_length", 0),
+            last_user_input=row.get("last_user_input"),
+            context=row["context"]
+        )
+        self._remember(snapshot)
+        return snapshot
+
+    async def save(self,
+                   call_id: str,
+                   context: Dict[str, Any],
+                   history_length: int,
+                   last_user_input: Optional[str] = None,
+                   expected_version: Optional[int] = None) -> SessionSnapshot:
+        """
+        Save a new snapshot version using optimistic concurrency
+        If another worker already advanced the session the newer snapshot wins
+        """
+        snapshot = SessionSnapshot(
+            call_id=call_id,
+            version=(expected_version or 0) + 1,
+            history_length=history_length,
+            last_user_input=last_user_input,
+            context=context
+        )
+        row = {
+            "call_id": call_id,
+            "format": SNAPSHOT_FORMAT,
+            "version": snapshot.version,
+            "history_length": history_length,
+            "last_user_input": last_user_input,
+            "context": context
+        }
+
+        try:
+            if expected_version is None:
+                await asyncio.to_thread(
+                    lambda: supabase.table(self.table).upsert(row, on_conflict="call_id").execute()
+                )
+            else:
+                response = await asyncio.to_thread(
+                    lambda: supabase.table(self.table).update(row).eq("call_id", call_id).eq("version", expected_version).execute()
+                )
+                if not response.data:
+                    log(f"Session {call_id} was advanced by another worker, keeping newer snapshot")
+                    # The cached version is stale; the next turn reads the newer one
+                    self._local.pop(call_id, None)
+                    return snapshot
+        except Exception as e:
+            log(f"Error saving session {call_id}: {e}")
+
+        self._remember(snapshot)
+        return snapshot
+
+    async def delete(self, call_id: str):
+        """Drop the session once the call is over"""
+        self._local.pop(call_id, None)
+        try:
+            await asyncio.to_thread(
+                lambda: supabase.table(self.table).delete().eq("call_id", call_id).execute()
+            )
+        except Exception as e:
+            log(f"Error deleting session {call_id}: {e}")
+
+    def _remember(self, snapshot: SessionSnapshot):
+        self._local[snapshot.call_id] = snapshot
+        self._local.move_to_end(snapshot.call_id)
+        while len(self._local) > self.max_local_sessions:
+            self._local.popitem(last=False)
+
+# Global store instance
+session_store = ConversationSessionStore(max_local_sessions=settings.SESSION_CACHE_SIZE)
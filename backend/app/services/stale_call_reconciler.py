@@ -0,0 +1,199 @@
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.tracing import span, log
+from app.services.retell_client import retell_client
+from app.services.retell_call_cache import retell_call_cache
+from app.services.payload_dedup import content_hash
+from app.services.transcript_search import transcript_search
+from app.services.post_call_metrics import post_call_pipeline
+from app.services.call_snapshots import call_snapshots
+
+# Statuses a call keeps until its call_ended webhook arrives
+STALE_STATUSES = ("in_progress", "emergency")
+STALE_CALL_COLUMNS = "id,retell_call_id,status,driver_name,load_number,updated_at"
+
+def completion_update(row: Dict[str, Any], details: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The calls update the lost call_ended webhook would have made
+    None while Retell still has the call open. Calls that errored or never connected
+    are marked failed instead of completed.
+    """
+    retell_status = details.get("call_status")
+    if retell_status == "ended":
+        status = "completed"
+    elif retell_status in ("error", "not_connected"):
+        status = "failed"
+    else:
+        return None
+    start_time = details.get("start_timestamp") or 0
+    end_time = details.get("end_timestamp") or 0
+    transcript = details.get("transcript") or ""
+    return {
+        "id": row["id"],
+        "status": status,
+        "completed_at": datetime.fromtimestamp(end_time / 1000, timezone.utc).isoformat() if end_time else None,
+        "duration_seconds": (end_time - start_time) // 1000 if end_time > start_time else 0,
+        "transcript": transcript or None,
+        "transcript_hash": content_hash(transcript)[0] if transcript else None
+    }
+
+class StaleCallReconciler:
+    """
+    Repairs calls left in in_progress/emergency because their call_ended webhook was lost
+    Stale rows are read a page at a time through the (status, updated_at) index, their
+    Retell details fetched with bounded concurrency (finished calls come from the on-disk
+    cache), and each page's completions written by one reconcile_stale_calls RPC. The RPC
+    only touches rows still in a stale status, so a webhook arriving meanwhile wins.
+    """
+
+    def __init__(self, interval_seconds: float, stale_after_minutes: int, batch_size: int, concurrency: int):
+        self.interval_seconds = interval_seconds
+        self.stale_after_minutes = stale_after_minutes
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.passes = 0
+        self.last_run_at: Optional[str] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.totals = {"checked": 0, "completed": 0, "failed": 0, "still_open": 0, "errors": 0}
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                log(f"Stale call reconciliation failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self) -> Dict[str, Any]:
+        """One pass over every stale call; concurrent callers wait for the pass in progress"""
+        async with self._lock:
+            with span("reconciler.pass"):
+                result = await self._reconcile()
+        self.passes += 1
+        self.last_run_at = datetime.now(timezone.utc).isoformat()
+        self.last_result = result
+        for key in self.totals:
+            self.totals[key] += result[key]
+        if result["completed"] or result["failed"]:
+            log(f"Reconciled stale calls: {result}")
+        return result
+
+    async def _reconcile(self) -> Dict[str, Any]:
+        result = {"checked": 0, "completed": 0, "failed": 0, "still_open": 0, "errors": 0}
+        cutoff = (datetime.now(timezone.utc) - timedelta(minutes=self.stale_after_minutes)).isoformat()
+        slots = asyncio.Semaphore(self.concurrency)
+        after = None
+        while True:
+            rows = await asyncio.to_thread(self._stale_page, cutoff, after)
+            if not rows:
+                break
+            # Keyset on (updated_at, id): rows still open are not read again, ties are not skipped
+            after = (rows[-1]["updated_at"], rows[-1]["id"])
+            result["checked"] += len(rows)
+
+            fetched = await asyncio.gather(*(self._details(row, slots) for row in rows))
+            updates: List[Dict[str, Any]] = []
+            finished: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+            for row, details in fetched:
+                if details is None:
+                    result["errors"] += 1
+                    continue
+                update = completion_update(row, details)
+                if update is None:
+                    result["still_open"] += 1
+                    continue
+                updates.append(update)
+                finished[row["id"]] = (row, details)
+
+            if updates:
+                with span("supabase.rpc", function="reconcile_stale_calls", calls=len(updates)):
+                    applied = await asyncio.to_thread(self._apply, updates, finished)
+                for update in updates:
+                    if update["id"] in applied:
+                        result[update["status"]] += 1
+                        self._after_completion(update, *finished[update["id"]])
+
+            if len(rows) < self.batch_size:
+                break
+        return result
+
+    def _stale_page(self, cutoff: str, after: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        query = supabase.table("calls").select(STALE_CALL_COLUMNS).in_("status", list(STALE_STATUSES)).lt("updated_at", cutoff).not_.is_("retell_call_id", "null")
+        if after:
+            updated_at, call_id = after
+            query = query.or_(f'updated_at.gt."{updated_at}",and(updated_at.eq."{updated_at}",id.gt.{call_id})')
+        return query.order("updated_at").order("id").limit(self.batch_size).execute().data or []
+
+    async def _details(self, row: Dict[str, Any], slots: asyncio.Semaphore) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        async with slots:
+            try:
+                return row, await retell_client.get_call_details(row["retell_call_id"])
+            except Exception as e:
+                log(f"Reconciler could not fetch Retell call {row['retell_call_id']}: {e}")
+                return row, None
+
+    def _apply(self, updates: List[Dict[str, Any]], finished: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]) -> set:
+        """Bulk-complete the calls, then store the Retell call objects; returns the ids actually updated"""
+        response = supabase.rpc("reconcile_stale_calls", {"updates": updates}).execute()
+        applied = {row["call_id"] for row in response.data or []}
+        payloads = []
+        for call_db_id in applied:
+            details = finished[call_db_id][1]
+            payloads.append({
+                "call_id": call_db_id,
+                "content_hash": content_hash(details)[0],
+                "transcript_data": details,
+                "raw_transcript": details.get("transcript") or ""
+            })
+        if payloads:
+            supabase.table("call_transcripts").upsert(payloads, on_conflict="call_id,content_hash", ignore_duplicates=True).execute()
+        return applied
+
+    def _after_completion(self, update: Dict[str, Any], row: Dict[str, Any], details: Dict[str, Any]):
+        """The in-process follow-ups call_ended triggers: search index, metrics, dashboard grid"""
+        if update["transcript"]:
+            transcript_search.index_transcript(row["id"], update["transcript"], {
+                "driver_name": row["driver_name"],
+                "load_number": row["load_number"],
+                "status": update["status"]
+            })
+            if settings.POST_CALL_METRICS_ENABLED:
+                post_call_pipeline.submit(row["id"], details)
+        if row["retell_call_id"] in call_snapshots.calls:
+            call_snapshots.record({
+                "event_type": "call_ended",
+                "call_id": row["retell_call_id"],
+                "raw_data": {"call": details}
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "passes": self.passes,
+            "last_run_at": self.last_run_at,
+            "last_result": self.last_result,
+            "totals": self.totals,
+            "call_cache": retell_call_cache.stats()
+        }
+
+# Global reconciler, started with the application
+stale_call_reconciler = StaleCallReconciler(
+    interval_seconds=settings.STALE_CALL_INTERVAL_SECONDS,
+    stale_after_minutes=settings.STALE_CALL_AFTER_MINUTES,
+    batch_size=settings.STALE_CALL_BATCH_SIZE,
+    concurrency=settings.STALE_CALL_CONCURRENCY
+)
@@ -0,0 +1,199 @@
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import html
+import math
+import re
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.tracing import log
+from app.services.call_export import iter_call_pages
+
+# calls columns the local index is rebuilt from at startup
+BACKFILL_COLUMNS = "id,created_at,driver_name,load_number,status,transcript"
+
+# Same road designator normalization as the Postgres index (I-10 -> i10)
+ROAD_DESIGNATOR_PATTERN = re.compile(r"([a-z]+)-(\d+)")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {"a", "an", "and", "are", "at", "be", "i", "in", "is", "it", "me", "my", "of", "on", "the", "to", "we", "you"}
+SUFFIXES = ("ing", "ed", "es", "s")
+
+def normalize_text(text: str) -> str:
+    return ROAD_DESIGNATOR_PATTERN.sub(r"\1\2", text.lower())
+
+def stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    return [stem(word) for word in WORD_PATTERN.findall(normalize_text(text)) if word not in STOP_WORDS]
+
+class LocalTranscriptIndex:
+    """
+    In-memory inverted index over call transcripts for non-Postgres backends
+    Terms map to per-call frequencies; queries match all terms and rank with BM25
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.total_length = 0
+
+    def index(self, call_id: str, transcript: str, metadata: Optional[Dict[str, Any]] = None):
+        self.remove(call_id)
+        terms = tokenize(transcript)
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[call_id] = frequency
+        self.documents[call_id] = {
+            "transcript": transcript,
+            "length": len(terms),
+            "terms": list(frequencies),
+            "metadata": metadata or {}
+        }
+        self.total_length += len(terms)
+
+    def remove(self, call_id: str):
+        document = self.documents.pop(call_id, None)
+        if not document:
+            return
+        self.total_length -= document["length"]
+        for term in document["terms"]:
+            call_ids = self.postings.get(term)
+            if call_ids:
+                call_ids.pop(call_id, None)
+                if not call_ids:
+                    del self.postings[term]
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or any(term not in self.postings for term in terms):
+            return {"total": 0, "results": []}
+
+        # Intersect starting from the rarest term
+        terms.sort(key=lambda term: len(self.postings[term]))
+        candidates = set(self.postings[terms[0]])
+        for term in terms[1:]:
+            candidates &= self.postings[term].keys()
+
+        document_count = len(self.documents)
+        average_length = self.total_length / document_count if document_count else 0
+        scored: List[Tuple[float, str]] = []
+        for call_id in candidates:
+            length = self.documents[call_id]["length"]
+            score = 0.0
+            for term in terms:
+                frequency = self.postings[term][call_id]
+                matches = len(self.postings[term])
+                idf = math.log(1 + (document_count - matches + 0.5) / (matches + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * length / average_length) if average_length else self.k1
+                score += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            scored.append((score, call_id))
+        scored.sort(reverse=True)
+
+        results = []
+        for score, call_id in scored[offset:offset + limit]:
+            document = self.documents[call_id]
+            results.append({
+                "call_id": call_id,
+                **document["metadata"],
+                "rank": round(score, 4),
+                "snippet": highlight_snippet(document["transcript"], terms)
+            })
+        return {"total": len(scored), "results": results}
+
+def highlight_snippet(transcript: str, terms: List[str], context_words: int = 10) -> str:
+    """Short excerpt around the first match with matching words wrapped in <mark>; the text is HTML-escaped"""
+    words = transcript.split()
+    marked = []
+    first_match = None
+    for position, word in enumerate(words):
+        word_terms = tokenize(word)
+        if word_terms and any(term in terms for term in word_terms):
+            marked.append(f"<mark>{html.escape(word)}</mark>")
+            if first_match is None:
+                first_match = position
+        else:
+            marked.append(html.escape(word))
+    start = max((first_match or 0) - context_words, 0)
+    return " ".join(marked[start:start + 2 * context_words])
+
+def escape_headline(snippet: Optional[str]) -> str:
+    """HTML-escape a ts_headline snippet, keeping only its <mark> highlight tags"""
+    escaped = html.escape(snippet or "")
+    return escaped.replace("&lt;mark&gt;", "<mark>").replace("&lt;/mark&gt;", "</mark>")
+
+class TranscriptSearch:
+    """Transcript search using the Postgres full-text index, or the local inverted index (rebuilt from calls at startup)"""
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self.local_index = LocalTranscriptIndex()
+        self._backfill: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Rebuild the local index from stored transcripts in the background; Postgres needs nothing"""
+        if self.backend == "local":
+            self._backfill = asyncio.create_task(self.backfill())
+
+    async def stop(self):
+        if self._backfill:
+            self._backfill.cancel()
+            await asyncio.gather(self._backfill, return_exceptions=True)
+            self._backfill = None
+
+    async def backfill(self, page_size: int = 1000) -> int:
+        """Index every stored transcript, a keyset page at a time; pages are read off the event loop"""
+        pages = iter_call_pages(page_size=page_size, columns=BACKFILL_COLUMNS)
+        indexed = 0
+        try:
+            while True:
+                rows = await asyncio.to_thread(next, pages, None)
+                if rows is None:
+                    break
+                for row in rows:
+                    # A call indexed by its call_ended webhook meanwhile keeps its entry
+                    if row.get("transcript") and row["id"] not in self.local_index.documents:
+                        self.local_index.index(row["id"], row["transcript"], {
+                            "driver_name": row.get("driver_name"),
+                            "load_number": row.get("load_number"),
+                            "status": row.get("status"),
+                            "created_at": row.get("created_at")
+                        })
+                        indexed += 1
+        except Exception as e:
+            log(f"Local transcript index backfill failed after {indexed} calls: {e}")
+            return indexed
+        log(f"Local transcript index backfilled with {indexed} calls")
+        return indexed
+
+    def index_transcript(self, call_id: str, transcript: str, metadata: Optional[Dict[str, Any]] = None):
+        """Keep the local index current; Postgres maintains calls.transcript_tsv itself"""
+        if self.backend == "local" and transcript:
+            self.local_index.index(call_id, transcript, metadata)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        if self.backend == "local":
+            return self.local_index.search(query, limit, offset)
+
+        response = supabase.rpc("search_call_transcripts", {
+            "search_query": query,
+            "result_limit": limit,
+            "result_offset": offset
+        }).execute()
+        rows = response.data or []
+        return {
+            "total": rows[0]["total_count"] if rows else 0,
+            "results": [
+                {key: escape_headline(value) if key == "snippet" else value for key, value in row.items() if key != "total_count"}
+                for row in rows
+            ]
+        }
+
+# Global search instance
+transcript_search = TranscriptSearch(settings.TRANSCRIPT_SEARCH_BACKEND)
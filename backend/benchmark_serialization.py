@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+CPU cost of the JSON paths touched per request, stdlib/response_model vs the fast path
+
+    python benchmark_serialization.py [--rows 500] [--turns 60] [--iterations 200]
+
+Webhook: parse a Retell call_ended body, label it for the profiler and encode the
+monitor broadcast. List: GET returning call rows through response_model=List[Call]
+validation vs trusted_rows, measured end to end through FastAPI (no database).
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.serialization import loads, dumps, peek_string_field, trusted_rows
+from app.models.call import Call
+
+def retell_payload(turns: int) -> bytes:
+    transcript_object = []
+    for i in range(turns):
+        role = "agent" if i % 2 == 0 else "user"
+        content = "I'm on I-10 near mile marker 45, should be there in about two hours" if role == "user" else "Thanks, can you confirm your ETA?"
+        words = [{"word": word, "start": i * 5 + j * 0.3, "end": i * 5 + j * 0.3 + 0.25} for j, word in enumerate(content.split())]
+        transcript_object.append({"role": role, "content": content, "words": words})
+    transcript = "\n".join(f"{turn['role'].title()}: {turn['content']}" for turn in transcript_object)
+    return json.dumps({
+        "event": "call_ended",
+        "call": {
+            "call_id": "call_bench", "agent_id": "agent_bench", "call_status": "ended",
+            "start_timestamp": 1700000000000, "end_timestamp": 1700000300000,
+            "transcript": transcript, "transcript_object": transcript_object,
+            "retell_llm_dynamic_variables": {"driver_name": "Mike", "load_number": "7891-B"},
+            "metadata": {"call_db_id": "5f0c1f7e-0000-0000-0000-000000000000"}
+        }
+    }).encode()
+
+def call_rows(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": f"00000000-0000-0000-0000-{i:012d}", "driver_name": "Mike Johnson", "driver_phone": "+15551234567",
+        "load_number": f"LD-{i}", "agent_configuration_id": "logistics-agent", "pickup_location": "Dallas, TX",
+        "delivery_location": "Phoenix, AZ", "notes": None, "status": "completed", "retell_call_id": f"call_{i}",
+        "duration": None, "transcript": "Agent: Hi Mike, checking on your load.\nUser: On I-10, two hours out.\n" * 10,
+        "structured_data": {"call_outcome": "In-Transit Update", "driver_status": "Driving", "current_location": "I-10 mile marker 45"},
+        "emergency_triggered": False, "emergency_type": None, "completed_at": (now - timedelta(minutes=i)).isoformat(),
+        "duration_seconds": 180, "created_at": (now - timedelta(minutes=i, seconds=200)).isoformat(),
+        "updated_at": (now - timedelta(minutes=i)).isoformat()
+    } for i in range(count)]
+
+def cpu_per_call(fn, iterations: int) -> float:
+    """Process CPU milliseconds per call, after a warm-up call"""
+    fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) * 1000 / iterations
+
+def report(name: str, before: float, after: float):
+    print(f"{name:<40} {before:9.3f} ms {after:9.3f} ms {before / after:7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500, help="Call rows per list response")
+    parser.add_argument("--turns", type=int, default=60, help="Transcript turns in the webhook payload")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    body = retell_payload(args.turns)
+
+    def webhook_stdlib():
+        json.loads(body).get("event")  # profiler label
+        data = json.loads(body)
+        json.dumps({"timestamp": datetime.now().isoformat(), "type": "webhook_event", "data": {"event_type": data["event"], "raw_data": data}})
+
+    def webhook_fast():
+        peek_string_field(body, "event")
+        data = loads(body)
+        dumps({"timestamp": datetime.now().isoformat(), "type": "webhook_event", "data": {"event_type": data["event"], "raw_data": data}})
+
+    rows = call_rows(args.rows)
+    app = FastAPI()
+
+    @app.get("/validated", response_model=List[Call])
+    async def validated():
+        return rows
+
+    @app.get("/trusted", response_model=List[Call])
+    async def trusted():
+        return trusted_rows(rows)
+
+    client = TestClient(app)
+    # Same payload; pydantic writes UTC as "Z" where Postgres rows carry "+00:00"
+    same = lambda a, b: a == b or (isinstance(a, str) and datetime.fromisoformat(a) == datetime.fromisoformat(b))
+    for validated_row, trusted_row in zip(client.get("/validated").json(), client.get("/trusted").json()):
+        assert validated_row.keys() == trusted_row.keys()
+        assert all(same(validated_row[key], trusted_row[key]) for key in validated_row)
+
+    print(f"Webhook body {len(body) / 1024:.0f} KB, list of {args.rows} calls, CPU per request")
+    print(f"{'':<40} {'before':>12} {'after':>12} {'speedup':>8}")
+    report("webhook parse + label + broadcast", cpu_per_call(webhook_stdlib, args.iterations), cpu_per_call(webhook_fast, args.iterations))
+    report(f"GET calls ({args.rows} rows)", cpu_per_call(lambda: client.get("/validated"), args.iterations // 4 or 1),
+           cpu_per_call(lambda: client.get("/trusted"), args.iterations // 4 or 1))
+
+if __name__ == "__main__":
+    main()
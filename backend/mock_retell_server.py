@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Retell API, for load-testing the dial path without real phone calls
+
+    python mock_retell_server.py --port 8090 --webhook-url http://localhost:8000/api/v1/webhooks/retell
+    RETELL_BASE_URL=http://localhost:8090 uvicorn app.main:app --port 8000
+
+Implements the endpoints RetellClient uses (list phone numbers, create phone/web call,
+get call, get/update/list agents) with configurable latency, error rate and rate limit.
+Every created call plays back call_started, agent_response_required turns, call_ended
+and call_analyzed webhooks to --webhook-url; --drop-ended-rate loses the last two for
+some calls to exercise the stale-call reconciler. GET /mock/stats reports API and
+webhook latencies; POST /mock/reset clears them between runs.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse
+
+DRIVER_REPLIES = [
+    "Yeah, I'm driving on I-10 near mile marker 45",
+    "Should be there in about two hours",
+    "Traffic is slow around Phoenix but I'm moving",
+    "I'm at the receiver now, backing into dock 4"
+]
+EMERGENCY_REPLIES = [
+    "I just had an accident, a car hit my trailer",
+    "My engine is overheating and there's smoke, I'm pulled over",
+    "I'm not feeling well, chest pain, I need help"
+]
+
+class LatencyWindow:
+    def __init__(self, size: int = 5000):
+        self.samples: deque = deque(maxlen=size)
+
+    def add(self, ms: float):
+        self.samples.append(ms)
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        return {
+            "count": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 2),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            "max_ms": round(ordered[-1], 2)
+        }
+
+class MockRetell:
+    """State and fault injection of the mock server"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.calls: Dict[str, Dict[str, Any]] = {}
+        self.agents: Dict[str, Dict[str, Any]] = {}
+        self.tokens = float(args.rate_limit)
+        self.refilled = time.monotonic()
+        self.http: Optional[httpx.AsyncClient] = None
+        self._playing: set = set()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.injected_errors = 0
+        self.rate_limited = 0
+        self.calls_completed = 0
+        self.webhook_failures: Dict[str, int] = {}
+        self.dropped_webhooks = 0
+        self.api_latency: Dict[str, LatencyWindow] = {}
+        self.webhook_latency: Dict[str, LatencyWindow] = {}
+        self.trigger_to_completion = LatencyWindow()
+
+    def _take_token(self) -> bool:
+        if self.args.rate_limit <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.args.rate_limit, self.tokens + (now - self.refilled) * self.args.rate_limit)
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    async def gate(self, endpoint: str):
+        """Simulated network/processing latency, rate limiting and injected failures"""
+        self.requests += 1
+        if not self._take_token():
+            self.rate_limited += 1
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": "1"})
+        delay = max(0.0, random.gauss(self.args.latency_ms, self.args.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        self.api_latency.setdefault(endpoint, LatencyWindow()).add(delay * 1000)
+        if random.random() < self.args.error_rate:
+            self.injected_errors += 1
+            raise HTTPException(status_code=500, detail="Injected mock failure")
+
+    def agent(self, agent_id: str) -> Dict[str, Any]:
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            agent = {
+                "agent_id": agent_id,
+                "agent_name": f"Mock agent {agent_id[-6:]}",
+                "voice_id": "11labs-Adrian",
+                "language": "en-US",
+                "response_engine": {"type": "custom-llm", "llm_websocket_url": "ws://mock"},
+                "webhook_url": self.args.webhook_url,
+                "last_modification_timestamp": int(time.time() * 1000)
+            }
+            self.agents[agent_id] = agent
+        return agent
+
+    def new_call(self, call_type: str, agent_id: str, metadata: Dict[str, Any],
+                 from_number: Optional[str] = None, to_number: Optional[str] = None) -> Dict[str, Any]:
+        call_id = f"call_{uuid.uuid4().hex[:24]}"
+        call = {
+            "call_id": call_id,
+            "call_type": call_type,
+            "agent_id": agent_id,
+            "call_status": "registered",
+            "metadata": metadata,
+            "retell_llm_dynamic_variables": {
+                key: str(metadata[key]) for key in ("driver_name", "load_number") if key in metadata
+            },
+            "direction": "outbound",
+            "from_number": from_number,
+            "to_number": to_number,
+            "access_token": uuid.uuid4().hex if call_type == "web_call" else None,
+            "created_monotonic": time.monotonic()
+        }
+        self.calls[call_id] = call
+        task = asyncio.create_task(self.play_call(call))
+        self._playing.add(task)
+        task.add_done_callback(self._playing.discard)
+        return public(call)
+
+    async def send_webhook(self, event: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.args.webhook_url:
+            return None
+        body = {"event": event, **payload}
+        started = time.perf_counter()
+        try:
+            response = await self.http.post(self.args.webhook_url, json=body, timeout=30)
+            self.webhook_latency.setdefault(event, LatencyWindow()).add((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                self.webhook_failures[event] = self.webhook_failures.get(event, 0) + 1
+                return None
+            return response.json()
+        except (httpx.HTTPError, ValueError):
+            self.webhook_failures[event] = self.webhook_failures.get(event, 0) + 1
+            return None
+
+    async def play_call(self, call: Dict[str, Any]):
+        """call_started, driver turns, call_ended, call_analyzed, spread over the call duration"""
+        args = self.args
+        call_id = call["call_id"]
+        emergency = random.random() < args.emergency_rate
+        # A lost call_ended/call_analyzed leaves the call in_progress on our side until the reconciler repairs it
+        drop_ended = random.random() < args.drop_ended_rate
+        turn_gap = args.call_seconds / (args.turns + 1)
+        start_ms = int(time.time() * 1000)
+        common = {"call_id": call_id, "metadata": call["metadata"]}
+
+        await asyncio.sleep(args.ring_seconds)
+        call["call_status"] = "ongoing"
+        call["start_timestamp"] = start_ms
+        await self.send_webhook("call_started", {**common, "call": public(call)})
+
+        conversation: List[Dict[str, str]] = []
+        transcript_object: List[Dict[str, Any]] = []
+        offset = 0.0
+        for turn in range(args.turns):
+            await asyncio.sleep(turn_gap)
+            reply = random.choice(EMERGENCY_REPLIES) if emergency and turn == args.turns // 2 else DRIVER_REPLIES[turn % len(DRIVER_REPLIES)]
+            conversation.append({"role": "user", "content": reply})
+            guidance = await self.send_webhook("agent_response_required", {
+                **common, "conversation": conversation, "last_user_input": reply
+            }) or {}
+            agent_text = guidance.get("response") or "Thanks for the update."
+            conversation.append({"role": "agent", "content": agent_text})
+            for role, text in (("user", reply), ("agent", agent_text)):
+                words = [{"word": word, "start": round(offset + i * 0.3, 2), "end": round(offset + i * 0.3 + 0.25, 2)}
+                         for i, word in enumerate(text.split())]
+                transcript_object.append({"role": role, "content": text, "words": words})
+                offset += len(words) * 0.3 + 0.6
+
+        await asyncio.sleep(turn_gap)
+        call.update({
+            "call_status": "ended",
+            "end_timestamp": int(time.time() * 1000),
+            "disconnection_reason": "agent_hangup",
+            "transcript": "\n".join(f"{'Agent' if turn['role'] == 'agent' else 'User'}: {turn['content']}" for turn in transcript_object),
+            "transcript_object": transcript_object
+        })
+        if drop_ended:
+            self.dropped_webhooks += 2
+        else:
+            await self.send_webhook("call_ended", {**common, "call": public(call)})
+
+        call["call_analysis"] = {
+            "call_summary": "Driver reported an emergency." if emergency else "Driver check-in completed.",
+            "user_sentiment": "Neutral",
+            "call_successful": not emergency,
+            "custom_analysis_data": {"emergency": emergency}
+        }
+        if not drop_ended:
+            await self.send_webhook("call_analyzed", {**common, "call": public(call)})
+        self.calls_completed += 1
+        self.trigger_to_completion.add((time.monotonic() - call["created_monotonic"]) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "injected_errors": self.injected_errors,
+            "rate_limited": self.rate_limited,
+            "calls_created": len(self.calls),
+            "calls_completed": self.calls_completed,
+            "calls_in_progress": sum(1 for call in self.calls.values() if call["call_status"] in ("registered", "ongoing")),
+            "webhook_failures": self.webhook_failures,
+            "dropped_webhooks": self.dropped_webhooks,
+            "api_latency": {endpoint: window.summary() for endpoint, window in self.api_latency.items()},
+            "webhook_latency": {event: window.summary() for event, window in self.webhook_latency.items()},
+            "trigger_to_completion": self.trigger_to_completion.summary()
+        }
+
+def public(call: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in call.items() if key != "created_monotonic" and value is not None}
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    mock = MockRetell(args)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        mock.http = httpx.AsyncClient(limits=httpx.Limits(max_connections=args.webhook_concurrency))
+        yield
+        for task in mock._playing:
+            task.cancel()
+        await asyncio.gather(*mock._playing, return_exceptions=True)
+        await mock.http.aclose()
+
+    app = FastAPI(title="Mock Retell API", lifespan=lifespan)
+
+    @app.exception_handler(HTTPException)
+    async def http_error(request: Request, exc: HTTPException):
+        return JSONResponse({"error_message": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+    @app.get("/v2/list-phone-numbers")
+    async def list_phone_numbers():
+        await mock.gate("list-phone-numbers")
+        return [{
+            "phone_number": args.phone_number,
+            "phone_number_type": "retell-twilio",
+            "outbound_agent_id": None,
+            "last_modification_timestamp": int(time.time() * 1000)
+        }]
+
+    @app.post("/v2/create-phone-call")
+    async def create_phone_call(body: Dict[str, Any]):
+        await mock.gate("create-phone-call")
+        if not body.get("to_number") or not body.get("from_number"):
+            raise HTTPException(status_code=400, detail="from_number and to_number are required")
+        agent_id = body.get("override_agent_id") or "agent_mock_default"
+        return mock.new_call("phone_call", agent_id, body.get("metadata") or {}, body["from_number"], body["to_number"])
+
+    @app.post("/v3/create-web-call")
+    async def create_web_call(body: Dict[str, Any]):
+        await mock.gate("create-web-call")
+        return mock.new_call("web_call", body.get("agent_id") or "agent_mock_default", body.get("metadata") or {})
+
+    @app.get("/v2/get-call/{call_id}")
+    async def get_call(call_id: str):
+        await mock.gate("get-call")
+        call = mock.calls.get(call_id)
+        if call is None:
+            raise HTTPException(status_code=404, detail="Call not found")
+        return public(call)
+
+    @app.get("/get-agent/{agent_id}")
+    async def get_agent(agent_id: str):
+        await mock.gate("get-agent")
+        return mock.agent(agent_id)
+
+    @app.patch("/update-agent/{agent_id}")
+    async def update_agent(agent_id: str, body: Dict[str, Any]):
+        await mock.gate("update-agent")
+        agent = mock.agent(agent_id)
+        agent.update(body)
+        agent["last_modification_timestamp"] = int(time.time() * 1000)
+        return agent
+
+    @app.post("/v2/list-agents")
+    async def list_agents():
+        await mock.gate("list-agents")
+        return list(mock.agents.values())
+
+    @app.get("/mock/stats")
+    async def stats():
+        return mock.stats()
+
+    @app.post("/mock/reset")
+    async def reset():
+        mock.reset()
+        return {"status": "reset"}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Retell API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Mean API latency")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Standard deviation of API latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests failing with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="API requests per second before 429s (0 = unlimited)")
+    parser.add_argument("--phone-number", default="+15550001111", help="Number returned by list-phone-numbers")
+    parser.add_argument("--webhook-url", default="http://localhost:8000/api/v1/webhooks/retell", help="Empty to disable webhooks")
+    parser.add_argument("--webhook-concurrency", type=int, default=100, help="Concurrent webhook requests")
+    parser.add_argument("--ring-seconds", type=float, default=1.0, help="Delay before call_started")
+    parser.add_argument("--call-seconds", type=float, default=10.0, help="Time between call_started and call_ended")
+    parser.add_argument("--turns", type=int, default=4, help="agent_response_required events per call")
+    parser.add_argument("--drop-ended-rate", type=float, default=0.0, help="Fraction of calls whose call_ended and call_analyzed webhooks are never sent")
+    parser.add_argument("--emergency-rate", type=float, default=0.05, help="Fraction of calls where the driver reports an emergency")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
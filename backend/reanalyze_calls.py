@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Re-score stored calls with the current ConversationEngine patterns and extraction rules
+
+    python reanalyze_calls.py --start 2025-01-01 --end 2026-01-01
+    python reanalyze_calls.py            # resumes from reanalysis_checkpoint.json if present
+    python reanalyze_calls.py --restart  # ignore the checkpoint and start over
+"""
+
+import argparse
+import sys
+from app.services.call_reanalysis import CallReanalysisJob, ReanalysisCheckpoint
+
+def print_progress(job: CallReanalysisJob):
+    checkpoint = job.checkpoint
+    rate = job.rate()
+    line = f"{checkpoint.processed}/{job.total} calls"
+    if job.total:
+        line += f" ({checkpoint.processed * 100 // job.total}%)"
+    line += f", {rate:.0f} calls/s, {checkpoint.skipped} without transcript, {checkpoint.failed} failed"
+    if rate and job.total:
+        line += f", ~{max(0, job.total - checkpoint.processed) / rate / 60:.1f} min left"
+    print(line, file=sys.stderr, flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-analyze historical calls in parallel")
+    parser.add_argument("--start", help="Only calls created at or after this timestamp")
+    parser.add_argument("--end", help="Only calls created before this timestamp")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--page-size", type=int, default=500, help="Calls fetched per request")
+    parser.add_argument("--chunk-size", type=int, default=25, help="Calls per worker task")
+    parser.add_argument("--checkpoint", default="reanalysis_checkpoint.json", help="Progress file used to resume")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Score calls without writing results or the checkpoint")
+    args = parser.parse_args()
+
+    checkpoint = None if args.restart else ReanalysisCheckpoint.load(args.checkpoint)
+    if checkpoint and not checkpoint.finished:
+        if (args.start or args.end) and (args.start, args.end) != (checkpoint.start, checkpoint.end):
+            parser.error(f"{args.checkpoint} covers --start {checkpoint.start} --end {checkpoint.end}; pass --restart to re-analyze a different range")
+        print(f"Resuming after {checkpoint.processed} calls from {args.checkpoint}", file=sys.stderr)
+    else:
+        checkpoint = ReanalysisCheckpoint(start=args.start, end=args.end)
+
+    job = CallReanalysisJob(
+        checkpoint, args.checkpoint,
+        workers=args.workers,
+        page_size=args.page_size,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+        on_progress=print_progress
+    )
+    job.run()
+    print(f"Done: {checkpoint.processed} calls, {checkpoint.skipped} without transcript, {checkpoint.failed} failed", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
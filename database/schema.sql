@@ -1,5 +1,8 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+DROP TABLE IF EXISTS check_call_schedules CASCADE;
+DROP TABLE IF EXISTS call_rollups CASCADE;
+DROP TABLE IF EXISTS conversation_sessions CASCADE;
 DROP TABLE IF EXISTS call_results CASCADE;
 DROP TABLE IF EXISTS call_transcripts CASCADE;
 DROP TABLE IF EXISTS calls CASCADE;
@@ -18,6 +21,8 @@ CREATE TABLE agent_configurations (
     enable_filler_words BOOLEAN DEFAULT FALSE,
     ambient_sound_suppression VARCHAR(20) DEFAULT 'medium',
     retell_agent_id VARCHAR(100),
+    -- Optional declarative conversation flow (states, transitions, templates) overriding the scenario's built-in one
+    flow_definition JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -36,6 +41,23 @@ CREATE TABLE calls (
     duration INTEGER,
     transcript TEXT,
     structured_data JSONB,
+    duration_seconds INTEGER,
+    emergency_triggered BOOLEAN DEFAULT FALSE,
+    emergency_type VARCHAR(50),
+    completed_at TIMESTAMP WITH TIME ZONE,
+    -- SHA-256 of transcript; completion writes skip rows already holding the same transcript
+    transcript_hash CHAR(64),
+    -- Digits-only E.164 form of driver_phone (10-digit numbers are assumed to be +1)
+    driver_phone_e164 VARCHAR(24) GENERATED ALWAYS AS (
+        CASE WHEN length(regexp_replace(driver_phone, '[^0-9]', '', 'g')) = 10
+             THEN '+1' || regexp_replace(driver_phone, '[^0-9]', '', 'g')
+             ELSE '+' || regexp_replace(driver_phone, '[^0-9]', '', 'g')
+        END
+    ) STORED,
+    -- Road designators like I-10 are indexed as i10 so they survive tokenization
+    transcript_tsv TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('english', regexp_replace(COALESCE(transcript, ''), '([A-Za-z]+)-([0-9]+)', '\1\2', 'g'))
+    ) STORED,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -46,6 +68,8 @@ CREATE TABLE call_transcripts (
     speaker VARCHAR(20) NOT NULL,
     message TEXT NOT NULL,
     timestamp_ms BIGINT NOT NULL,
+    -- SHA-256 of the stored payload; one row per distinct payload per call
+    content_hash CHAR(64),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
@@ -56,14 +80,65 @@ CREATE TABLE call_results (
     structured_data JSONB NOT NULL,
     confidence_score DECIMAL(3,2),
     processing_notes TEXT,
+    -- Derived post-call metrics (turns, talk time, response gaps, interruptions, timeline)
+    metrics JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+CREATE TABLE conversation_sessions (
+    call_id VARCHAR(100) PRIMARY KEY,
+    format INTEGER NOT NULL DEFAULT 1,
+    version INTEGER NOT NULL DEFAULT 1,
+    history_length INTEGER NOT NULL DEFAULT 0,
+    last_user_input TEXT,
+    context JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Call analytics rollups, maintained incrementally by trigger on calls
+-- granularity: 'hour' | 'day' | 'all' (bucket_start is the epoch for 'all')
+CREATE TABLE call_rollups (
+    agent_configuration_id VARCHAR(50) NOT NULL,
+    granularity VARCHAR(5) NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    emergency_type VARCHAR(50) NOT NULL DEFAULT '',
+    call_count BIGINT NOT NULL DEFAULT 0,
+    duration_samples BIGINT NOT NULL DEFAULT 0,
+    total_duration_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (agent_configuration_id, granularity, bucket_start, status, emergency_type)
+);
+
+-- Recurring check-in calls per load; the scheduler reloads active rows on startup
+CREATE TABLE check_call_schedules (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    agent_configuration_id VARCHAR(50) REFERENCES agent_configurations(id),
+    driver_name VARCHAR(100) NOT NULL,
+    driver_phone VARCHAR(20) NOT NULL,
+    load_number VARCHAR(50) NOT NULL,
+    interval_minutes INTEGER NOT NULL DEFAULT 120 CHECK (interval_minutes > 0),
+    next_run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    last_run_at TIMESTAMP WITH TIME ZONE,
+    last_call_id UUID REFERENCES calls(id) ON DELETE SET NULL,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 CREATE INDEX idx_calls_agent_config ON calls(agent_configuration_id);
-CREATE INDEX idx_calls_status ON calls(status);
-CREATE INDEX idx_calls_created_at ON calls(created_at);
+-- (status, updated_at) serves status filters and the stale-call reconciler's scan for old in_progress rows
+CREATE INDEX idx_calls_status_updated_at ON calls(status, updated_at);
+-- (created_at, id) also serves keyset pagination for the streaming export
+CREATE INDEX idx_calls_created_at ON calls(created_at, id);
+CREATE INDEX idx_calls_driver_phone_created_at ON calls(driver_phone_e164, created_at DESC);
+CREATE INDEX idx_calls_load_number_created_at ON calls(load_number, created_at DESC);
+CREATE INDEX idx_calls_transcript_tsv ON calls USING GIN (transcript_tsv);
 CREATE INDEX idx_call_transcripts_call_id ON call_transcripts(call_id);
+CREATE UNIQUE INDEX idx_call_transcripts_call_id_content_hash ON call_transcripts(call_id, content_hash);
 CREATE INDEX idx_call_results_call_id ON call_results(call_id);
+CREATE INDEX idx_check_call_schedules_due ON check_call_schedules(next_run_at) WHERE active;
 
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -83,6 +158,130 @@ CREATE TRIGGER update_calls_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+CREATE OR REPLACE FUNCTION apply_call_rollup(call_row calls, sign INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    bucket RECORD;
+BEGIN
+    FOR bucket IN
+        SELECT 'hour' AS granularity, date_trunc('hour', call_row.created_at) AS bucket_start
+        UNION ALL SELECT 'day', date_trunc('day', call_row.created_at)
+        UNION ALL SELECT 'all', 'epoch'::timestamptz
+    LOOP
+        INSERT INTO call_rollups AS r (
+            agent_configuration_id, granularity, bucket_start, status, emergency_type,
+            call_count, duration_samples, total_duration_seconds
+        ) VALUES (
+            COALESCE(call_row.agent_configuration_id, ''),
+            bucket.granularity,
+            bucket.bucket_start,
+            call_row.status,
+            COALESCE(call_row.emergency_type, ''),
+            sign,
+            CASE WHEN call_row.duration_seconds IS NULL THEN 0 ELSE sign END,
+            sign * COALESCE(call_row.duration_seconds, 0)
+        )
+        ON CONFLICT (agent_configuration_id, granularity, bucket_start, status, emergency_type) DO UPDATE SET
+            call_count = r.call_count + EXCLUDED.call_count,
+            duration_samples = r.duration_samples + EXCLUDED.duration_samples,
+            total_duration_seconds = r.total_duration_seconds + EXCLUDED.total_duration_seconds;
+    END LOOP;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION maintain_call_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_call_rollup(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_call_rollup(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER maintain_calls_rollups
+    AFTER INSERT OR DELETE OR UPDATE OF status, emergency_type, duration_seconds, agent_configuration_id ON calls
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_call_rollups();
+
+-- Ranked, paginated transcript search with highlighted snippets (headlines only for the returned page)
+CREATE OR REPLACE FUNCTION search_call_transcripts(search_query TEXT, result_limit INTEGER DEFAULT 20, result_offset INTEGER DEFAULT 0)
+RETURNS TABLE (
+    call_id UUID,
+    driver_name VARCHAR,
+    load_number VARCHAR,
+    status VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE,
+    rank REAL,
+    snippet TEXT,
+    total_count BIGINT
+) AS $$
+    WITH query AS (
+        SELECT websearch_to_tsquery('english', regexp_replace(search_query, '([A-Za-z]+)-([0-9]+)', '\1\2', 'g')) AS tsq
+    ),
+    hits AS (
+        SELECT c.id, c.driver_name, c.load_number, c.status, c.created_at, c.transcript,
+               ts_rank_cd(c.transcript_tsv, query.tsq) AS rank,
+               COUNT(*) OVER () AS total_count
+        FROM calls c, query
+        WHERE c.transcript_tsv @@ query.tsq
+        ORDER BY rank DESC, c.created_at DESC
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT hits.id, hits.driver_name, hits.load_number, hits.status, hits.created_at, hits.rank,
+           ts_headline('english', regexp_replace(COALESCE(hits.transcript, ''), '([A-Za-z]+)-([0-9]+)', '\1\2', 'g'), query.tsq,
+                       'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5'),
+           hits.total_count
+    FROM hits, query
+    ORDER BY hits.rank DESC, hits.created_at DESC;
+$$ LANGUAGE sql STABLE;
+
+-- Completion updates from the stale-call reconciler in one statement; rows that left
+-- in_progress/emergency meanwhile (a late call_ended webhook) are not touched
+CREATE OR REPLACE FUNCTION reconcile_stale_calls(updates JSONB)
+RETURNS TABLE (call_id UUID) AS $$
+    UPDATE calls c SET
+        status = u.status,
+        completed_at = COALESCE(u.completed_at, NOW()),
+        duration_seconds = u.duration_seconds,
+        transcript = COALESCE(u.transcript, c.transcript),
+        transcript_hash = COALESCE(u.transcript_hash, c.transcript_hash)
+    FROM jsonb_to_recordset(updates) AS u(
+        id UUID, status VARCHAR(20), completed_at TIMESTAMP WITH TIME ZONE,
+        duration_seconds INTEGER, transcript TEXT, transcript_hash CHAR(64)
+    )
+    WHERE c.id = u.id AND c.status IN ('in_progress', 'emergency')
+    RETURNING c.id;
+$$ LANGUAGE sql;
+
+-- Re-analysis results: the derived metrics rows of each call are replaced in one
+-- transaction, so a failed write never leaves a call without its result
+CREATE OR REPLACE FUNCTION replace_call_metrics(results JSONB)
+RETURNS VOID AS $$
+    DELETE FROM call_results r
+    USING jsonb_to_recordset(results) AS u(call_id UUID)
+    WHERE r.call_id = u.call_id AND r.metrics IS NOT NULL;
+
+    INSERT INTO call_results (call_id, call_outcome, structured_data, metrics, processing_notes)
+    SELECT u.call_id, u.call_outcome, u.structured_data, u.metrics, u.processing_notes
+    FROM jsonb_to_recordset(results) AS u(
+        call_id UUID, call_outcome VARCHAR(100), structured_data JSONB, metrics JSONB, processing_notes TEXT
+    );
+$$ LANGUAGE sql;
+
+CREATE TRIGGER update_conversation_sessions_updated_at
+    BEFORE UPDATE ON conversation_sessions
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_check_call_schedules_updated_at
+    BEFORE UPDATE ON check_call_schedules
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
 INSERT INTO agent_configurations (
     id, 
     name, 
@@ -79,7 +79,18 @@ const LiveConversationMonitor: React.FC<LiveConversationMonitorProps> = ({ onCal
 
     ws.onmessage = (event) => {
       try {
-        const webhookEvent: WebhookEvent = JSON.parse(event.data)
+        const message = JSON.parse(event.data)
+
+        // Answer server heartbeats so the connection isn't reaped as idle
+        if (message.type === 'ping') {
+          ws.send(JSON.stringify({ action: 'pong' }))
+          return
+        }
+        if (message.type !== 'webhook_event') {
+          return
+        }
+
+        const webhookEvent: WebhookEvent = message
         setEvents(prev => [...prev, webhookEvent])
         
         // Track current call and handle call start